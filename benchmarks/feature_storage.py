@@ -0,0 +1,116 @@
+"""
+Compares the storage options of feature containers: size on disk, write time and read throughput.
+
+Random MFCC-like features are written with every option set, then all utterances are read in random order,
+once with single reads (get) and once in batches (get_many).
+
+    python benchmarks/feature_storage.py --num-utterances 2000 --num-frames 300 --feature-size 40
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from spych.data import features  # noqa: E402
+
+CONFIGURATIONS = [
+    ('hdf5 lzf (default)', features.BACKEND_HDF5, {}),
+    ('hdf5 none', features.BACKEND_HDF5, {'compression': 'none'}),
+    ('hdf5 lzf shuffle', features.BACKEND_HDF5, {'shuffle': True}),
+    ('hdf5 gzip 1 shuffle', features.BACKEND_HDF5, {'compression': 'gzip', 'compression_level': 1, 'shuffle': True}),
+    ('hdf5 gzip 6 shuffle', features.BACKEND_HDF5, {'compression': 'gzip', 'compression_level': 6, 'shuffle': True}),
+    ('hdf5 none float16', features.BACKEND_HDF5, {'compression': 'none', 'dtype': 'float16'}),
+    ('hdf5 lzf shuffle float16', features.BACKEND_HDF5, {'shuffle': True, 'dtype': 'float16'}),
+    ('hdf5 lzf chunk 64', features.BACKEND_HDF5, {'chunk_frames': 64}),
+    ('flat', features.BACKEND_FLAT, {}),
+]
+
+
+def random_features(num_utterances, num_frames, feature_size, seed=0):
+    """ Return a dictionary utterance-id/features with smooth (compressible like real features) random values. """
+    rng = np.random.RandomState(seed)
+    matrices = {}
+
+    for index in range(num_utterances):
+        length = max(1, int(rng.normal(num_frames, num_frames / 4)))
+        noise = rng.normal(0, 1, (length, feature_size)).astype(np.float32)
+        matrices['utt-{:07d}'.format(index)] = np.cumsum(noise, axis=0) * np.float32(0.1)
+
+    return matrices
+
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    return sum(os.path.getsize(os.path.join(root, name)) for root, __, names in os.walk(path) for name in names)
+
+
+def run(name, backend, options, matrices, batch_size, folder):
+    path = os.path.join(folder, name.replace(' ', '_'))
+    fc = features.create_container(path, backend=backend, **options)
+    utterance_ids = list(matrices.keys())
+    num_bytes = sum(matrix.nbytes for matrix in matrices.values())
+
+    start = time.perf_counter()
+
+    with fc:
+        for utterance_idx in utterance_ids:
+            fc.add(utterance_idx, matrices[utterance_idx])
+
+    write_seconds = time.perf_counter() - start
+    size = directory_size(path)
+
+    read_order = list(np.random.RandomState(1).permutation(utterance_ids))
+
+    fc.open(mode='r')
+
+    start = time.perf_counter()
+    for utterance_idx in read_order:
+        np.asarray(fc.get(utterance_idx)).sum()
+    get_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for index in range(0, len(read_order), batch_size):
+        frames, offsets = fc.get_many(read_order[index:index + batch_size], packed=True)
+        frames.sum()
+    get_many_seconds = time.perf_counter() - start
+
+    fc.close()
+    features.pool.default_pool.close_idle()
+
+    return [name, size / 1e6, size / num_bytes, num_bytes / 1e6 / write_seconds, num_bytes / 1e6 / get_seconds, num_bytes / 1e6 / get_many_seconds]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-utterances', type=int, default=2000)
+    parser.add_argument('--num-frames', type=int, default=300, help='Average number of frames per utterance.')
+    parser.add_argument('--feature-size', type=int, default=40)
+    parser.add_argument('--batch-size', type=int, default=32, help='Number of utterances per get_many call.')
+    parser.add_argument('--folder', default=None, help='Folder to write the containers to (default: a temporary folder).')
+    args = parser.parse_args()
+
+    matrices = random_features(args.num_utterances, args.num_frames, args.feature_size)
+    folder = args.folder or tempfile.mkdtemp()
+
+    header = ['configuration', 'size MB', 'ratio', 'write MB/s', 'get MB/s', 'get_many MB/s']
+    print('{:<26} {:>9} {:>6} {:>11} {:>9} {:>14}'.format(*header))
+
+    try:
+        for name, backend, options in CONFIGURATIONS:
+            print('{:<26} {:>9.1f} {:>6.2f} {:>11.0f} {:>9.0f} {:>14.0f}'.format(*run(name, backend, options, matrices, args.batch_size, folder)))
+    finally:
+        if args.folder is None:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import collections
+import os
 
 import numpy as np
 
@@ -6,6 +7,8 @@ import torch
 from torch.utils import data
 from torch.utils.data import dataloader
 
+from spych.data.features import pool
+
 string_classes = (str, bytes)
 
 
@@ -69,12 +72,20 @@ def _utterance_len_collate(batch):
     return data_parts + len_parts
 
 
+def worker_init_fn(worker_id):
+    """
+    Initialization function for the workers of a DataLoader with a :class:`Dataset`.
+    Opens the feature containers in the worker process (otherwise they are opened on the first access).
+    """
+    data.get_worker_info().dataset.open_in_process()
+
+
 def frame_batch_loader(dataset, batch_size=1, shuffle=False, num_workers=0, pin_memory=False):
     """
     Returns a dataloader which generates batches with concatenated frame from [batch_size] utterances.
     """
     return dataloader.DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=num_workers, collate_fn=_custom_collate,
-                                 pin_memory=pin_memory)
+                                 pin_memory=pin_memory, worker_init_fn=worker_init_fn)
 
 
 def frame_with_lengths_batch_loader(dataset, batch_size=1, shuffle=False, num_workers=0, pin_memory=False):
@@ -82,7 +93,7 @@ def frame_with_lengths_batch_loader(dataset, batch_size=1, shuffle=False, num_wo
     Returns a dataloader which generates batches with concatenated frame from [batch_size] utterances and appends the lengths.
     """
     return dataloader.DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=num_workers, collate_fn=_utterance_len_collate,
-                                 pin_memory=pin_memory)
+                                 pin_memory=pin_memory, worker_init_fn=worker_init_fn)
 
 
 class Dataset(data.Dataset):
@@ -91,6 +102,10 @@ class Dataset(data.Dataset):
 
     This dataset contains samples for every utterance that is available in all base datasets.
 
+    The feature containers are opened read-only without file locks (mode 'swmr', see :class:`spych.data.features.pool.HandlePool`),
+    so DataLoader workers read in parallel. Every process opens its own files: a worker (forked or spawned) opens them
+    on its first access, or in :func:`worker_init_fn`.
+
     Arguments:
         base_datasets: list of tuples (dataset, feature-name, feature-pipeline)
     """
@@ -101,6 +116,16 @@ class Dataset(data.Dataset):
 
         self.utterance_ids = self._get_utterances_contained_in_all_datasets()
 
+        self._is_open = False
+        self._pid = None
+
+    def __getstate__(self):
+        # Open files can't be transferred, the containers are opened again in the other process
+        state = dict(self.__dict__)
+        state['feature_containers'] = []
+        state['_pid'] = None
+        return state
+
     def _get_utterances_contained_in_all_datasets(self):
         common = set(self.base_datasets[0][0].utterances.keys())
 
@@ -111,6 +136,15 @@ class Dataset(data.Dataset):
         return list(common)
 
     def open(self):
+        self._is_open = True
+        self.open_in_process()
+
+    def open_in_process(self):
+        """ Open the feature containers in the current process, if the dataset is open and they aren't yet. """
+        if not self._is_open or self._pid == os.getpid():
+            return
+
+        # Containers inherited from the parent process (fork) stay referenced there, they are just replaced
         self.feature_containers = []
 
         for item in self.base_datasets:
@@ -118,7 +152,7 @@ class Dataset(data.Dataset):
             fc_name = item[1]
 
             fc = dataset.features[fc_name]
-            fc.open()
+            fc.open(mode=pool.SWMR)
 
             fpipe = None
 
@@ -127,24 +161,45 @@ class Dataset(data.Dataset):
 
             self.feature_containers.append((fc, fpipe))
 
+        self._pid = os.getpid()
+
     def close(self):
-        for fc in self.feature_containers:
-            fc.close()
+        if self._pid == os.getpid():
+            for fc, __ in self.feature_containers:
+                fc.close()
 
         self.feature_containers = []
+        self._is_open = False
+        self._pid = None
 
     def __len__(self):
         return len(self.utterance_ids)
 
     def __getitem__(self, item):
+        self.open_in_process()
         utt_id = self.utterance_ids[item]
 
         output = []
 
         for fc, feat_pipe in self.feature_containers:
             if feat_pipe:
-                output.append(feat_pipe.process(fc.get(utt_id)))
+                output.append(feat_pipe.process(fc.get(utt_id), utterance_idx=utt_id))
             else:
                 output.append(fc.get(utt_id))
 
         return output
+
+    def __getitems__(self, items):
+        """ Return the samples of multiple items (used by the DataLoader to fetch a whole batch at once). """
+        self.open_in_process()
+        utt_ids = [self.utterance_ids[item] for item in items]
+        outputs = [[] for __ in utt_ids]
+
+        for fc, feat_pipe in self.feature_containers:
+            for utt_id, output, features in zip(utt_ids, outputs, fc.get_many(utt_ids)):
+                if feat_pipe:
+                    output.append(feat_pipe.process(features, utterance_idx=utt_id))
+                else:
+                    output.append(features)
+
+        return outputs
@@ -0,0 +1,80 @@
+import collections
+
+import numpy as np
+
+
+class SampleCache(object):
+    """
+    LRU cache for decoded audio signals, bounded by the number of bytes of the cached sample arrays.
+    The cached arrays are set read-only, since they are returned to every consumer requesting the same signal.
+
+    :param max_bytes: Maximum number of bytes of all cached sample arrays.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def key(file_path, start, end, dtype):
+        """ Return the cache key for the signal of the given file between start and end [seconds], decoded as dtype. """
+        return file_path, float(start), float(end), np.dtype(dtype).str
+
+    def get(self, key):
+        """ Return the cached tuple (samples, sampling-rate) for the key, None if not cached. """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return entry
+
+    def put(self, key, samples, sampling_rate):
+        """ Add the signal to the cache and return the (read-only) cached samples. Signals larger than the cache are not cached. """
+        if samples.nbytes > self.max_bytes:
+            return samples
+
+        if key in self._entries:
+            self.num_bytes -= self._entries.pop(key)[0].nbytes
+
+        samples.flags.writeable = False
+        self._entries[key] = (samples, sampling_rate)
+        self.num_bytes += samples.nbytes
+
+        while self.num_bytes > self.max_bytes:
+            __, (evicted_samples, __) = self._entries.popitem(last=False)
+            self.num_bytes -= evicted_samples.nbytes
+            self.evictions += 1
+
+        return samples
+
+    def clear(self):
+        """ Remove all cached signals (the counters are kept). """
+        self._entries.clear()
+        self.num_bytes = 0
+
+    def stats(self):
+        """ Return a dictionary with the counters and the current size of the cache. """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.num_bytes
+        }
@@ -0,0 +1,245 @@
+"""
+Memory-mapped access to uncompressed WAV files.
+
+The data chunk of a PCM (or IEEE float) WAV file is memory-mapped with numpy, so reading a part of a file
+only touches the pages of that part and slices are returned as views on the mapping without copying.
+"""
+
+import collections
+import os
+import struct
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class MappedWav(object):
+    """
+    A WAV file with its data chunk memory-mapped.
+
+    :param path: Path of the WAV file.
+    :raises ValueError: If the file is not a WAV file with PCM (8, 16, 32 bit) or 32/64 bit float samples.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        format_tag, self.num_channels, self.sampling_rate, bits_per_sample, data_offset, data_size = _parse_header(path)
+        self.bits_per_sample = bits_per_sample
+        self.dtype = _sample_dtype(format_tag, bits_per_sample)
+
+        # The size in the header may be wrong (e.g. files written by streaming tools)
+        data_size = min(data_size, os.path.getsize(path) - data_offset)
+
+        frame_size = self.dtype.itemsize * self.num_channels
+        self.num_frames = data_size // frame_size
+
+        if self.num_frames > 0:
+            self.samples = np.memmap(path, dtype=self.dtype, mode='r', offset=data_offset, shape=(self.num_frames, self.num_channels))
+        else:
+            self.samples = np.zeros((0, self.num_channels), dtype=self.dtype)
+
+    @property
+    def duration(self):
+        """ Return the duration of the file [seconds]. """
+        return self.num_frames / self.sampling_rate
+
+    def frames(self, start=0, end=-1):
+        """
+        Return a view on the frames between start and end [seconds] with shape (num-frames, num-channels) in the sample format of the file.
+        The sample positions are computed like ``librosa.core.load`` computes them for offset/duration.
+
+        :param start: Start [seconds]
+        :param end: End [seconds], -1 for the end of the file.
+        """
+        start_frame = int(start * self.sampling_rate)
+
+        if end < 0:
+            return self.samples[start_frame:]
+
+        return self.samples[start_frame:start_frame + int((end - start) * self.sampling_rate)]
+
+    def read(self, start=0, end=-1, dtype=np.float32, as_float=True):
+        """
+        Return the (mono) samples between start and end [seconds].
+
+        :param start: Start [seconds]
+        :param end: End [seconds], -1 for the end of the file.
+        :param dtype: Type of the returned samples, if converted to float.
+        :param as_float: If True the samples are converted to floats in the range [-1, 1] (and multiple channels are averaged).
+                         Otherwise a zero-copy view with the samples as stored in the file is returned (1-D for mono files).
+        :return: nd-array samples
+        """
+        frames = self.frames(start=start, end=end)
+
+        if not as_float:
+            if self.num_channels == 1:
+                return frames[:, 0]
+
+            return frames
+
+        samples = to_float(frames, dtype=dtype)
+
+        if self.num_channels == 1:
+            return samples[:, 0]
+
+        return np.mean(samples, axis=1, dtype=dtype)
+
+    def close(self):
+        """
+        Release the mapping of the file. The file is unmapped as soon as no view returned by :meth:`frames` or :meth:`read`
+        (without conversion) is referenced anymore.
+        """
+        self.samples = np.zeros((0, self.num_channels), dtype=self.dtype)
+        self.num_frames = 0
+
+
+class MappedWavCache(object):
+    """
+    LRU cache of memory-mapped WAV files, so reading multiple utterances of the same file doesn't parse the header
+    and map the file again. Files are closed when they are evicted. A file that changed (size, modification time or inode)
+    since it was mapped is mapped again.
+
+    :param max_files: Maximum number of mapped files.
+    """
+
+    def __init__(self, max_files=64):
+        self.max_files = max_files
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path):
+        """ Return the :class:`MappedWav` of the file at the given path, None if it is not an uncompressed WAV file. """
+        stat = _file_stat(path)
+        entry = self._entries.get(path)
+
+        if entry is not None and entry[0] == stat:
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+
+        if entry is not None:
+            self._close(self._entries.pop(path))
+
+        try:
+            wav = MappedWav(path)
+        except ValueError:
+            wav = None
+
+        self._entries[path] = (stat, wav)
+
+        while len(self._entries) > self.max_files:
+            self._close(self._entries.popitem(last=False)[1])
+            self.evictions += 1
+
+        return wav
+
+    def clear(self):
+        """ Close all files (the counters are kept). """
+        for entry in self._entries.values():
+            self._close(entry)
+
+        self._entries.clear()
+
+    @staticmethod
+    def _close(entry):
+        if entry[1] is not None:
+            entry[1].close()
+
+    def stats(self):
+        """ Return a dictionary with the counters and the current number of mapped files. """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries)
+        }
+
+
+def to_float(samples, dtype=np.float32):
+    """ Convert samples in a WAV sample format (uint8, int16, int32, float) to floats in the range [-1, 1]. """
+    samples = np.asarray(samples)
+
+    if samples.dtype.kind == 'f':
+        return samples.astype(dtype)
+
+    if samples.dtype.kind == 'u':
+        # 8 bit WAV is unsigned with 128 as zero
+        return (samples.astype(dtype) - 128) / dtype(128)
+
+    return samples.astype(dtype) / dtype(2 ** (8 * samples.dtype.itemsize - 1))
+
+
+def _sample_dtype(format_tag, bits_per_sample):
+    if format_tag == WAVE_FORMAT_PCM:
+        if bits_per_sample == 8:
+            return np.dtype('u1')
+        elif bits_per_sample in (16, 32):
+            return np.dtype('<i{}'.format(bits_per_sample // 8))
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT and bits_per_sample in (32, 64):
+        return np.dtype('<f{}'.format(bits_per_sample // 8))
+
+    raise ValueError('Unsupported WAV sample format (format {}, {} bits).'.format(format_tag, bits_per_sample))
+
+
+def _parse_header(path):
+    """ Return tuple (format-tag, num-channels, sampling-rate, bits-per-sample, data-offset, data-size) of the WAV file. """
+    fmt = None
+
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+
+        if len(riff) < 12 or riff[0:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            raise ValueError('{} is not a RIFF/WAVE file.'.format(path))
+
+        while True:
+            chunk_header = f.read(8)
+
+            if len(chunk_header) < 8:
+                raise ValueError('{} has no data chunk.'.format(path))
+
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+            if chunk_id == b'fmt ':
+                fmt_data = f.read(chunk_size)
+
+                if len(fmt_data) < 16:
+                    raise ValueError('{} has an invalid fmt chunk.'.format(path))
+
+                format_tag, num_channels, sampling_rate, __, __, bits_per_sample = struct.unpack('<HHIIHH', fmt_data[:16])
+
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt_data) >= 26:
+                    format_tag = struct.unpack('<H', fmt_data[24:26])[0]
+
+                fmt = (format_tag, num_channels, sampling_rate, bits_per_sample)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError('{} has no fmt chunk before the data chunk.'.format(path))
+
+                return fmt + (f.tell(), chunk_size)
+            else:
+                f.seek(chunk_size, 1)
+
+            # chunks are word aligned
+            if chunk_size % 2 == 1:
+                f.seek(1, 1)
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+default_cache = MappedWavCache()
@@ -1,3 +1,4 @@
+import json
 import os
 
 from cement.core import controller
@@ -5,6 +6,7 @@ from cement.core import controller
 from spych.data import dataset
 from spych.data import segmentation
 from spych.data.dataset import io
+from spych.data.features.pipeline import profiling
 
 
 def format_argument():
@@ -27,6 +29,8 @@ class MainController(controller.CementBaseController):
             (['-f', '--format'], format_argument()),
             (['--detailed'], dict(action='store_true',
                                   help='Show detailed info or validation results.')),
+            (['--num-workers'], dict(action='store', type=int, default=1,
+                                     help='Number of processes to compute the feature statistics with.')),
         ]
 
     @controller.expose(hide=True)
@@ -41,16 +45,25 @@ class MainController(controller.CementBaseController):
 
         if self.app.pargs.detailed:
             for feature_name, feature_container in dset.features.items():
-                stats = feature_container.get_statistics()
-                feature_stats.append({
-                    "name": feature_name,
-                    "min": stats[0],
-                    "max": stats[1],
-                    "mean": stats[2],
-                    "var": stats[3],
-                    "stdv": stats[4],
-                    "dim": feature_container.feature_size()
-                })
+                stats = feature_container.get_statistics(num_workers=self.app.pargs.num_workers) or (None,) * 5
+                feature_container.open(mode='r')
+
+                try:
+                    profile = feature_container.attributes.get('pipeline_profile')
+
+                    feature_stats.append({
+                        "name": feature_name,
+                        "min": stats[0],
+                        "max": stats[1],
+                        "mean": stats[2],
+                        "var": stats[3],
+                        "stdv": stats[4],
+                        "dim": feature_container.feature_size(),
+                        "has_profile": profile is not None,
+                        "profile": profiling.PipelineProfile.from_dict(json.loads(profile)).summary() if profile is not None else []
+                    })
+                finally:
+                    feature_container.close()
 
         info_data = {
             "name": dset.name,
@@ -120,6 +133,16 @@ class MainController(controller.CementBaseController):
 
         dset.save()
 
+    @controller.expose(help="Write a binary snapshot of a spych dataset, which speeds up loading as long as the dataset is unchanged.")
+    def snapshot(self):
+        if self.app.pargs.format != 'spych':
+            print('Snapshots are only supported for the spych format.')
+            return
+
+        ds_loader = io.SpychDatasetLoader()
+        dset = ds_loader.load(self.app.pargs.path)
+        ds_loader.write_snapshot(dset)
+
     @controller.expose(help="Print all utterance-ids.")
     def print_utterance_ids(self):
         dset = dataset.Dataset.load(self.app.pargs.path, loader=self.app.pargs.format)
@@ -168,7 +191,7 @@ class CopyController(controller.CementBaseController):
         copy_ds = source_ds
 
         if self.app.pargs.subview is not None:
-            copy_ds = source_ds.export_subview(self.app.pargs.subview)
+            copy_ds = source_ds.export_subview(self.app.pargs.subview, shared=True)
 
         target_loader.save(copy_ds, self.app.pargs.targetpath, copy_files=self.app.pargs.copy_files)
 
@@ -1,4 +1,5 @@
 from .features import FeatureContainer
+from .features import FlatFeatureContainer
 from .file import File
 
 from .segmentation import Token
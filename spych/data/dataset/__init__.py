@@ -1,5 +1,6 @@
 from .dataset import Dataset
 from .subview import Subview
+from .columnar import UtteranceTable
 
 from .validation import ValidationMetric
 from .validation import Validator
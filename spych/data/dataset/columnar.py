@@ -0,0 +1,320 @@
+import collections.abc
+
+import numpy as np
+
+from spych import data
+
+
+class UtteranceView(data.Utterance):
+    """
+    Lightweight utterance object, which reads and writes its attributes directly from/to a row of an :class:`UtteranceTable`.
+    Views compare equal if they point to the same row of the same table.
+
+    The id of a view is read-only. To change the speaker use :meth:`spych.data.dataset.Dataset.set_speaker_of_utterance`,
+    which keeps the indexes of the dataset up to date.
+    """
+
+    __slots__ = ['_table', '_row']
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    @property
+    def idx(self):
+        return self._table._ids[self._row]
+
+    @property
+    def file_idx(self):
+        return self._table._file_pool.value(self._table._file_codes[self._row])
+
+    @file_idx.setter
+    def file_idx(self, value):
+        self._table._file_codes[self._row] = self._table._file_pool.code(value)
+        self._table._group_index.clear()
+
+    @property
+    def speaker_idx(self):
+        return self._table._speaker_pool.value(self._table._speaker_codes[self._row])
+
+    @speaker_idx.setter
+    def speaker_idx(self, value):
+        self._table._speaker_codes[self._row] = self._table._speaker_pool.code(value)
+        self._table._group_index.clear()
+
+    @property
+    def start(self):
+        return float(self._table._starts[self._row])
+
+    @start.setter
+    def start(self, value):
+        self._table._starts[self._row] = _float_or_default(value, data.Utterance.START_FULL_FILE)
+
+    @property
+    def end(self):
+        return float(self._table._ends[self._row])
+
+    @end.setter
+    def end(self, value):
+        self._table._ends[self._row] = _float_or_default(value, data.Utterance.END_FULL_FILE)
+
+    def __eq__(self, other):
+        return isinstance(other, UtteranceView) and self._table is other._table and self._row == other._row
+
+    def __hash__(self):
+        return hash((id(self._table), self._row))
+
+    def __copy__(self):
+        return data.Utterance(self.idx, self.file_idx, speaker_idx=self.speaker_idx, start=self.start, end=self.end)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+
+class _StringPool(object):
+    """ Interns string ids to integer codes. The code -1 represents None. """
+
+    def __init__(self):
+        self._codes = {}
+        self._values = []
+
+    def code(self, value):
+        if value is None:
+            return -1
+
+        code = self._codes.get(value)
+
+        if code is None:
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+
+        return code
+
+    def value(self, code):
+        if code < 0:
+            return None
+
+        return self._values[code]
+
+    def lookup(self, value):
+        """ Return the code of the value without interning it (-2 if unknown). """
+        if value is None:
+            return -1
+
+        return self._codes.get(value, -2)
+
+    def values_of(self, codes):
+        return [self.value(code) for code in codes]
+
+
+class UtteranceTable(collections.abc.MutableMapping):
+    """
+    Columnar storage for utterances. It can be used instead of a dict as utterance storage of a :class:`spych.data.dataset.Dataset`
+    (see the ``columnar`` option), when the number of utterances gets very large.
+
+    Utterance-id, file-id, speaker-id, start and end are stored in numpy arrays (file and speaker ids are interned).
+    The table behaves like a dict utterance-id/utterance, but returns :class:`UtteranceView` objects instead of stored utterance objects.
+    The mapping from utterance-id to row is only built when an utterance is accessed by id.
+    Rows of removed utterances are not reused, call :meth:`compact` to free them (this invalidates all views obtained before).
+
+    :param capacity: Initial number of rows to allocate.
+    """
+
+    def __init__(self, capacity=1024):
+        self._num_rows = 0
+        self._num_utterances = 0
+        self._file_pool = _StringPool()
+        self._speaker_pool = _StringPool()
+
+        self._ids = np.empty(capacity, dtype=object)
+        self._file_codes = np.empty(capacity, dtype=np.int32)
+        self._speaker_codes = np.empty(capacity, dtype=np.int32)
+        self._starts = np.empty(capacity, dtype=np.float64)
+        self._ends = np.empty(capacity, dtype=np.float64)
+        self._alive = np.zeros(capacity, dtype=np.bool_)
+
+        # Utterance-id -> row, built on demand
+        self._row_map = None
+
+        # Column name -> (rows sorted by code, sorted codes), built on demand and dropped when codes change
+        self._group_index = {}
+
+    def __getitem__(self, utterance_idx):
+        return UtteranceView(self, self._rows()[utterance_idx])
+
+    def __setitem__(self, utterance_idx, utterance):
+        row = self._rows().get(utterance_idx)
+
+        if row is None:
+            row = self._append_row(utterance_idx)
+
+        self._file_codes[row] = self._file_pool.code(utterance.file_idx)
+        self._speaker_codes[row] = self._speaker_pool.code(utterance.speaker_idx)
+        self._starts[row] = _float_or_default(utterance.start, data.Utterance.START_FULL_FILE)
+        self._ends[row] = _float_or_default(utterance.end, data.Utterance.END_FULL_FILE)
+        self._group_index.clear()
+
+    def __delitem__(self, utterance_idx):
+        row = self._rows().pop(utterance_idx)
+        self._ids[row] = None
+        self._alive[row] = False
+        self._num_utterances -= 1
+
+    def __iter__(self):
+        return iter(self._used('_ids')[self._used('_alive')].tolist())
+
+    def __len__(self):
+        return self._num_utterances
+
+    def __contains__(self, utterance_idx):
+        return utterance_idx in self._rows()
+
+    def _rows(self):
+        """ Return the dictionary utterance-id/row (built on first use). """
+        if self._row_map is None:
+            rows = np.flatnonzero(self._used('_alive'))
+            self._row_map = dict(zip(self._ids[rows].tolist(), rows.tolist()))
+
+        return self._row_map
+
+    def _append_row(self, utterance_idx):
+        row = self._num_rows
+
+        if row >= self._alive.size:
+            self._grow(max(2 * self._alive.size, 1024))
+
+        self._rows()[utterance_idx] = row
+        self._ids[row] = utterance_idx
+        self._alive[row] = True
+        self._num_rows += 1
+        self._num_utterances += 1
+
+        return row
+
+    def _grow(self, capacity):
+        for name in ['_ids', '_file_codes', '_speaker_codes', '_starts', '_ends', '_alive']:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype) if old.dtype != object else np.empty(capacity, dtype=object)
+            new[:old.size] = old
+            setattr(self, name, new)
+
+    def _used(self, name):
+        """ Return the used part of the column with the given name. """
+        return getattr(self, name)[:self._num_rows]
+
+    def compact(self):
+        """ Remove the rows of deleted utterances. Invalidates all views created before. """
+        alive = self._used('_alive')
+
+        for name in ['_ids', '_file_codes', '_speaker_codes', '_starts', '_ends']:
+            setattr(self, name, self._used(name)[alive].copy())
+
+        self._num_rows = self._num_utterances
+        self._alive = np.ones(self._num_rows, dtype=np.bool_)
+        self._row_map = None
+        self._group_index.clear()
+
+    def in_order(self, utterance_ids):
+        """ Return the given ids of utterances in the table sorted by their rows (the order of the table). """
+        return sorted(utterance_ids, key=self._rows().__getitem__)
+
+    def subset(self, utterance_ids):
+        """ Return a new table containing only the given utterances. """
+        row_map = self._rows()
+        rows = np.array([row_map[utterance_idx] for utterance_idx in utterance_ids], dtype=np.int64)
+
+        table = UtteranceTable(capacity=max(rows.size, 1))
+        table._file_pool = self._file_pool
+        table._speaker_pool = self._speaker_pool
+
+        for name in ['_ids', '_file_codes', '_speaker_codes', '_starts', '_ends']:
+            getattr(table, name)[:rows.size] = getattr(self, name)[rows]
+
+        table._alive[:rows.size] = True
+        table._num_rows = rows.size
+        table._num_utterances = rows.size
+
+        return table
+
+    #
+    #   Vectorized queries
+    #
+
+    def durations(self):
+        """
+        Return the utterance-ids and the durations [seconds] of all utterances as tuple (list, ndarray).
+        Utterances that last until the end of the file (end = -1) have a duration of NaN, since the file length is unknown here.
+        """
+        alive = self._used('_alive')
+        starts = self._used('_starts')[alive]
+        ends = self._used('_ends')[alive]
+
+        durations = np.where(ends == data.Utterance.END_FULL_FILE, np.nan, ends - starts)
+
+        return self._used('_ids')[alive].tolist(), durations
+
+    def filter_by_duration(self, min_duration=None, max_duration=None):
+        """
+        Return the ids of all utterances with a duration within the given range [seconds].
+        Utterances with unknown duration (end = -1) are never returned.
+        """
+        utterance_ids, durations = self.durations()
+        mask = ~np.isnan(durations)
+
+        if min_duration is not None:
+            mask &= durations >= min_duration
+
+        if max_duration is not None:
+            mask &= durations <= max_duration
+
+        return [utterance_ids[index] for index in np.flatnonzero(mask)]
+
+    def total_duration_per_speaker(self):
+        """
+        Return a dictionary speaker-id/total duration [seconds] of the speaker's utterances.
+        Utterances with unknown duration (end = -1) are not counted.
+        """
+        alive = self._used('_alive')
+        speaker_codes = self._used('_speaker_codes')[alive]
+        starts = self._used('_starts')[alive]
+        ends = self._used('_ends')[alive]
+
+        known = (ends != data.Utterance.END_FULL_FILE) & (speaker_codes >= 0)
+        totals = np.bincount(speaker_codes[known], weights=(ends - starts)[known])
+        speaker_codes_present = np.unique(speaker_codes[speaker_codes >= 0])
+
+        return {self._speaker_pool.value(code): float(totals[code]) if code < totals.size else 0.0 for code in speaker_codes_present}
+
+    def utterance_ids_of_speaker(self, speaker_idx):
+        """ Return the ids of all utterances of the given speaker (in the order of the table). """
+        return self._ids_of_group('_speaker_codes', self._speaker_pool.lookup(speaker_idx))
+
+    def utterance_ids_in_file(self, file_idx):
+        """ Return the ids of all utterances in the given file (in the order of the table). """
+        return self._ids_of_group('_file_codes', self._file_pool.lookup(file_idx))
+
+    def _ids_of_group(self, name, code):
+        """
+        Return the ids of the utterances with the given code in the given column. The rows are looked up in the sorted column,
+        which is sorted once and kept until codes are changed (removing utterances doesn't require a new sort).
+        """
+        index = self._group_index.get(name)
+
+        if index is None:
+            codes = self._used(name)
+            order = np.argsort(codes, kind='stable')
+            index = (order, codes[order])
+            self._group_index[name] = index
+
+        order, sorted_codes = index
+        rows = order[np.searchsorted(sorted_codes, code, side='left'):np.searchsorted(sorted_codes, code, side='right')]
+
+        return self._ids[rows[self._alive[rows]]].tolist()
+
+
+def _float_or_default(value, default):
+    if value is None:
+        return default
+
+    return float(value)
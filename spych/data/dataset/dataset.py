@@ -1,5 +1,8 @@
 import collections
 import copy
+import functools
+import json
+import multiprocessing
 import os
 import random
 import shutil
@@ -10,6 +13,7 @@ import numpy as np
 import librosa
 
 from spych import data
+from spych.audio import mapped
 from spych.audio import signal
 from spych.utils import naming
 
@@ -19,6 +23,9 @@ class DatasetBase(metaclass=abc.ABCMeta):
     Defines the base interface for an audio dataset.
     """
 
+    # Optional :class:`spych.audio.cache.SampleCache` for signals read with read_utterance_data/read_utterances_data
+    sample_cache = None
+
     @property
     @abc.abstractmethod
     def name(self):
@@ -128,14 +135,17 @@ class DatasetBase(metaclass=abc.ABCMeta):
         else:
             return self.speakers[self.utterances[utt_idx].speaker_idx]
 
-    def read_utterance_data(self, utterance_idx, without_start_end_silence=False, word_alignment_key=None, dtype=np.float32):
+    def read_utterance_data(self, utterance_idx, without_start_end_silence=False, word_alignment_key=None, dtype=np.float32, as_float=True):
         """
-        Read the audio signal for the given utterance. This uses librosa.core.load.
+        Read the audio signal for the given utterance. Uncompressed WAV files are read memory-mapped (see :mod:`spych.audio.mapped`),
+        all other files with librosa.core.load.
 
         :param utterance_idx: Utterance-Id to read signal for.
         :param without_start_end_silence: If True tries to cut off start and end silence based on word alignment.
         :param word_alignment_key: Key of the segmentation with the word alignment for silence cutoff.
-        :return: tuple (nd-array samples, sampling-rate)
+        :param as_float: If False and the file is a memory-mapped mono WAV file, the samples are returned as zero-copy view
+                         in the sample format of the file (e.g. int16). Otherwise they are converted to dtype.
+        :return: tuple (nd-array samples, sampling-rate), if the signal comes from the sample cache the samples are read-only
         """
         utt = self.utterances[utterance_idx]
         file_path = self.files[utt.file_idx].path
@@ -152,6 +162,68 @@ class DatasetBase(metaclass=abc.ABCMeta):
             start += seg.first_segment.start
             end = utt.start + seg.last_segment.end
 
+        cache = self.sample_cache if as_float else None
+
+        if cache is not None:
+            key = cache.key(file_path, start, end, dtype)
+            cached = cache.get(key)
+
+            if cached is not None:
+                return cached
+
+        samples, sampling_rate = self._read_signal(file_path, start, end, dtype=dtype, as_float=as_float)
+
+        if cache is not None:
+            samples = cache.put(key, samples, sampling_rate)
+
+        return samples, sampling_rate
+
+    def read_utterances_data(self, utterance_ids, dtype=np.float32):
+        """
+        Read the audio signals for the given utterances. The utterances are grouped by file and every file is read only once
+        (the part from the first start to the last end of the requested utterances), the utterance signals are sliced out of it.
+        Signals found in the sample cache are not read again.
+
+        :param utterance_ids: Utterance-Ids to read signals for.
+        :return: Generator yielding tuples (utterance-id, nd-array samples, sampling-rate), grouped by file.
+        """
+        file_utterances = collections.OrderedDict()
+        cache = self.sample_cache
+
+        for utterance_idx in utterance_ids:
+            utt = self.utterances[utterance_idx]
+            file_utterances.setdefault(utt.file_idx, []).append(utt)
+
+        for file_idx, utterances in file_utterances.items():
+            file_path = self.files[file_idx].path
+
+            if cache is not None:
+                missing_utterances = []
+
+                for utt in utterances:
+                    cached = cache.get(cache.key(file_path, utt.start, utt.end, dtype))
+
+                    if cached is None:
+                        missing_utterances.append(utt)
+                    else:
+                        yield (utt.idx,) + cached
+
+                utterances = missing_utterances
+
+            for utt, samples, sampling_rate in self._read_file_utterances(file_path, utterances, dtype=dtype):
+                if cache is not None:
+                    samples = cache.put(cache.key(file_path, utt.start, utt.end, dtype), samples, sampling_rate)
+
+                yield utt.idx, samples, sampling_rate
+
+    @staticmethod
+    def _read_signal(file_path, start, end, dtype=np.float32, as_float=True):
+        """ Read the signal of the file between start and end [seconds]. Return tuple (nd-array samples, sampling-rate). """
+        wav = DatasetBase._mapped_wav(file_path)
+
+        if wav is not None:
+            return wav.read(start=start, end=end, dtype=dtype, as_float=as_float or wav.num_channels > 1), wav.sampling_rate
+
         if end != data.Utterance.END_FULL_FILE:
             samples, sampling_rate = librosa.core.load(file_path, sr=None, offset=start, duration=end - start, dtype=dtype)
         else:
@@ -159,6 +231,51 @@ class DatasetBase(metaclass=abc.ABCMeta):
 
         return samples, sampling_rate
 
+    @staticmethod
+    def _read_file_utterances(file_path, utterances, dtype=np.float32):
+        """ Read the signals of the given utterances, which are all in the given file. Yield tuples (utterance, samples, sampling-rate). """
+        wav = DatasetBase._mapped_wav(file_path)
+
+        if wav is not None:
+            for utt in utterances:
+                yield utt, wav.read(start=utt.start, end=utt.end, dtype=dtype), wav.sampling_rate
+
+            return
+
+        if len(utterances) == 1:
+            samples, sampling_rate = DatasetBase._read_signal(file_path, utterances[0].start, utterances[0].end, dtype=dtype)
+            yield utterances[0], samples, sampling_rate
+            return
+
+        if len(utterances) == 0:
+            return
+
+        offset = min(utt.start for utt in utterances)
+
+        if any(utt.end == data.Utterance.END_FULL_FILE for utt in utterances):
+            file_samples, sampling_rate = librosa.core.load(file_path, sr=None, offset=offset, dtype=dtype)
+        else:
+            end = max(utt.end for utt in utterances)
+            file_samples, sampling_rate = librosa.core.load(file_path, sr=None, offset=offset, duration=end - offset, dtype=dtype)
+
+        # Same sample positions as a single read with offset/duration would use
+        offset_sample = int(offset * sampling_rate)
+
+        for utt in utterances:
+            start_sample = int(utt.start * sampling_rate) - offset_sample
+
+            if utt.end == data.Utterance.END_FULL_FILE:
+                samples = file_samples[start_sample:]
+            else:
+                samples = file_samples[start_sample:start_sample + int((utt.end - utt.start) * sampling_rate)]
+
+            yield utt, samples, sampling_rate
+
+    @staticmethod
+    def _mapped_wav(file_path):
+        """ Return the file memory-mapped (from :data:`spych.audio.mapped.default_cache`), None if it is not an uncompressed WAV file. """
+        return mapped.default_cache.get(file_path)
+
     #
     #   Speakers
     #
@@ -195,8 +312,13 @@ class DatasetBase(metaclass=abc.ABCMeta):
         """ Return the features (np array) for the given utterance of the given container. """
 
         if feature_container in self.features.keys():
-            with self.features[feature_container] as fc:
+            fc = self.features[feature_container]
+            fc.open(mode='r')
+
+            try:
                 return fc.get(utterance_idx)
+            finally:
+                fc.close()
 
 
 class Dataset(DatasetBase):
@@ -210,12 +332,27 @@ class Dataset(DatasetBase):
                 If no path is given the dataset cannot be saved on disk.
     :param loader: This object is used to save the dataset. By default :class:`spych.data.dataset.io.SpychDatasetLoader` is used.
     :type loader: :class:`spych.data.dataset.io.DatasetLoader`
+    :param columnar: If True the utterances are stored in a :class:`spych.data.dataset.columnar.UtteranceTable` instead of a dict.
+                     This reduces memory for very large datasets, ``utterances`` then returns views on the table rows.
+    :param lazy_segmentations: If True the segmentations are stored in a :class:`spych.data.dataset.lazy.LazySegmentations`,
+                               which allows loaders to register sources that are only read when a segmentation is accessed.
+    :param id_seed: Seed for the :class:`spych.utils.naming.IdAllocator` generating ids for new files, utterances and speakers.
+                    With a seed the generated ids are reproducible.
+    :param sample_cache: A :class:`spych.audio.cache.SampleCache` to cache decoded audio signals in (shared by the subviews).
+
+    The dataset keeps indexes of the utterances per file and per speaker (used by :meth:`utterances_in_file`,
+    :meth:`utterances_of_speaker`, :meth:`speaker_to_utterance_dict` and materialized subviews). They are only maintained by the
+    methods of the dataset (e.g. :meth:`add_utterance`, :meth:`remove_utterances`, :meth:`set_speaker_of_utterance`).
+    Utterances added to, removed from or changed in ``utterances`` directly are not reflected by these queries
+    (removed utterances are skipped, but added ones are missing).
     """
 
     _default_file_folder = 'audio_files'
 
-    def __init__(self, path=None, loader=None):
+    def __init__(self, path=None, loader=None, columnar=False, lazy_segmentations=False, id_seed=None, sample_cache=None):
         self.path = path
+        self.sample_cache = sample_cache
+        self.id_allocator = naming.IdAllocator(seed=id_seed)
 
         if loader is None:
             from spych.data.dataset.io import spych
@@ -225,11 +362,36 @@ class Dataset(DatasetBase):
 
         self._files = {}
         self._utterances = {}
+
+        if columnar:
+            from spych.data.dataset import columnar as columnar_table
+            self._utterances = columnar_table.UtteranceTable()
+
         self._segmentations = collections.defaultdict(dict)
+
+        if lazy_segmentations:
+            from spych.data.dataset import lazy
+            self._segmentations = lazy.LazySegmentations()
+
         self._speakers = {}
         self.subviews = {}
         self._features = {}
 
+        # Reverse indexes (file-id/speaker-id -> utterance-ids), dicts are used as ordered sets.
+        # Not used for columnar storage, the table answers these queries from its columns.
+        self._file_utterance_idxs = collections.defaultdict(dict)
+        self._speaker_utterance_idxs = collections.defaultdict(dict)
+
+        # Insertion position of every utterance (only for dict storage, a columnar table knows the order by its rows)
+        self._utterance_positions = {}
+        self._next_utterance_position = 0
+
+        # Ids of utterances whose objects are shared with another dataset (see export_subview), they are copied before modification
+        self._shared_utterance_idxs = set()
+
+        # Incremented by every modification through the methods of the dataset (used by subviews to invalidate caches)
+        self.modification_count = 0
+
     @property
     def files(self):
         return self._files
@@ -315,16 +477,49 @@ class Dataset(DatasetBase):
         subview.dataset = self
         self.subviews[name] = subview
 
-    def export_subview(self, name):
-        """ Return a subview as a standalone dataset. """
+    def export_subview(self, name, shared=False):
+        """
+        Return a subview as a standalone dataset.
+
+        :param name: Name of the subview to export.
+        :param shared: If True the records (files, utterances, speakers, segmentations) are not copied but shared with this dataset.
+                       The containers (the dicts) of the exported dataset are its own, so all methods of the exported dataset,
+                       which add, remove or replace records, don't affect this dataset or the subview.
+                       :meth:`set_speaker_of_utterance` copies a shared utterance before it changes it.
+                       The record objects themselves must not be changed directly (e.g. ``file.path``, ``speaker.gender``,
+                       ``segmentation.segments`` or ``utterance.start``), these changes are visible in both datasets.
+        :return: Dataset
+        """
         sv = self.subviews[name]
 
         exported_set = Dataset(path=self.path)
-        exported_set._files = copy.deepcopy(sv.files)
-        exported_set._utterances = copy.deepcopy(sv.utterances)
-        exported_set._speakers = copy.deepcopy(sv.speakers)
-        exported_set._segmentations = copy.deepcopy(sv.segmentations)
-        exported_set._features = copy.deepcopy(sv.features)
+
+        if shared:
+            utterances = sv.utterances
+
+            exported_set._files = dict(sv.files)
+            exported_set._speakers = dict(sv.speakers)
+            # The per-utterance dicts may be cached by the subview
+            exported_set._segmentations = collections.defaultdict(dict, {utt_idx: dict(utt_segmentations)
+                                                                         for utt_idx, utt_segmentations in sv.segmentations.items()})
+            exported_set._features = {fc_name: copy.copy(fc) for fc_name, fc in sv.features.items()}
+
+            if hasattr(self._utterances, 'subset'):
+                exported_set._utterances = self._utterances.subset(utterances.keys())
+            else:
+                exported_set._utterances = dict(utterances)
+                exported_set._shared_utterance_idxs = set(utterances.keys())
+        else:
+            # A materialized subview returns read-only mappings
+            exported_set._files = copy.deepcopy(dict(sv.files))
+            exported_set._utterances = copy.deepcopy(dict(sv.utterances))
+            exported_set._speakers = copy.deepcopy(dict(sv.speakers))
+            exported_set._segmentations = collections.defaultdict(dict, {utt_idx: copy.deepcopy(dict(utt_segmentations))
+                                                                         for utt_idx, utt_segmentations in sv.segmentations.items()})
+            exported_set._features = copy.deepcopy(dict(sv.features))
+
+        for utt in exported_set.utterances.values():
+            exported_set._index_utterance(utt)
 
         return exported_set
 
@@ -349,7 +544,7 @@ class Dataset(DatasetBase):
             raise ValueError('No path defined for this dataset, cannot copy files.')
 
         if file_idx is None or file_idx in self.files.keys():
-            final_file_idx = naming.generate_name(length=15, not_in=self.files.keys())
+            final_file_idx = self.id_allocator.generate(not_in=self.files)
         else:
             final_file_idx = file_idx
 
@@ -361,7 +556,7 @@ class Dataset(DatasetBase):
             full_path = os.path.join(self.path, final_file_path)
 
             while os.path.exists(full_path):
-                final_file_path = os.path.join(self._default_file_folder, '{}.wav'.format(naming.generate_name(15)))
+                final_file_path = os.path.join(self._default_file_folder, '{}.wav'.format(self.id_allocator.generate()))
                 full_path = os.path.abspath(os.path.join(self.path, final_file_path))
 
             if not os.path.isdir(file_folder):
@@ -376,9 +571,49 @@ class Dataset(DatasetBase):
 
         file_obj = data.File(final_file_idx, final_file_path)
         self.files[final_file_idx] = file_obj
+        self.modification_count += 1
 
         return file_obj
 
+    def add_files(self, paths, file_ids=None):
+        """
+        Adds multiple files to the dataset at once. The files are not copied.
+
+        :param paths: List of paths of the files to add.
+        :param file_ids: List of ids to associate the files with (same length as paths). If None or an id is None/already exists, one is generated.
+        :return: List of file objects
+        """
+        paths = list(paths)
+        final_file_ids = self._final_ids(file_ids, len(paths), self.files)
+        file_objs = [data.File(file_idx, path if os.path.isabs(path) else os.path.abspath(path)) for file_idx, path in zip(final_file_ids, paths)]
+
+        self.files.update((file_obj.idx, file_obj) for file_obj in file_objs)
+        self.modification_count += 1
+
+        return file_objs
+
+    def _final_ids(self, ids, count, existing):
+        """ Return the list of ids to use for inserting ``count`` new entries, ids that are None or already in use are replaced by generated ones. """
+        if ids is None:
+            ids = [None] * count
+        else:
+            ids = list(ids)
+
+            if len(ids) != count:
+                raise ValueError('Number of ids ({}) does not match the number of entries ({})!'.format(len(ids), count))
+
+        used = set()
+        final_ids = []
+
+        for idx in ids:
+            while idx is None or idx in used or idx in existing:
+                idx = self.id_allocator.generate(not_in=existing)
+
+            used.add(idx)
+            final_ids.append(idx)
+
+        return final_ids
+
     def remove_files(self, file_ids, delete_files=False):
         """
         Deletes the given wavs.
@@ -398,13 +633,93 @@ class Dataset(DatasetBase):
                 if os.path.exists(path):
                     os.remove(path)
 
-            self.remove_utterances(self.utterances_in_file(file_idx))
+            self.remove_utterances(self.utterances_in_file(file_obj.idx))
 
             del self.files[file_obj.idx]
+            self.modification_count += 1
 
     #
     #   Utterance
     #
+    def utterances_in_file(self, file_idx):
+        """ Return all utterances that are in the given file. """
+        return set(self._indexed_utterances(self._utterance_ids_in_file(file_idx)))
+
+    def utterances_of_speaker(self, speaker_idx):
+        """ Returns all utterances of the given speaker. """
+        return set(self._indexed_utterances(self._utterance_ids_of_speaker(speaker_idx)))
+
+    def speaker_to_utterance_dict(self):
+        """ Return a dict with speaker to utterances mapping. Utterances without a known speaker are ignored. """
+
+        spk2utt = collections.defaultdict(list)
+
+        if isinstance(self._utterances, dict):
+            speaker_ids = self._speaker_utterance_idxs.keys()
+        else:
+            speaker_ids = self.speakers.keys()
+
+        for speaker_idx in speaker_ids:
+            utterances = self._indexed_utterances(self._utterance_ids_of_speaker(speaker_idx))
+
+            if speaker_idx in self.speakers.keys() and len(utterances) > 0:
+                spk2utt[self.speakers[speaker_idx]] = utterances
+
+        return spk2utt
+
+    def utterance_durations(self):
+        """
+        Return the utterance-ids and the durations [seconds] of all utterances as tuple (list, ndarray), computed on the columns
+        of the utterances (see :meth:`spych.data.dataset.columnar.UtteranceTable.durations`).
+        Utterances that last until the end of the file (end = -1) have a duration of NaN.
+        """
+        return self._utterance_table().durations()
+
+    def filter_utterances_by_duration(self, min_duration=None, max_duration=None):
+        """
+        Return the ids of all utterances with a duration within the given range [seconds].
+        Utterances that last until the end of the file (end = -1) are never returned.
+        """
+        return self._utterance_table().filter_by_duration(min_duration=min_duration, max_duration=max_duration)
+
+    def total_duration_per_speaker(self):
+        """
+        Return a dictionary speaker-id/total duration [seconds] of the speaker's utterances.
+        Utterances that last until the end of the file (end = -1) are not counted.
+        """
+        return self._utterance_table().total_duration_per_speaker()
+
+    def _utterance_table(self):
+        """ Return the utterances as columnar table (for dict storage a temporary table is built). """
+        if isinstance(self._utterances, dict):
+            from spych.data.dataset import columnar as columnar_table
+
+            table = columnar_table.UtteranceTable(capacity=max(len(self._utterances), 1))
+            table.update(self._utterances)
+
+            return table
+
+        return self._utterances
+
+    def _indexed_utterances(self, utterance_ids):
+        """ Return the utterances with the given ids taken from an index, ids of utterances removed from the dict directly are skipped. """
+        utterances = self.utterances
+        return [utterances[utt_idx] for utt_idx in utterance_ids if utt_idx in utterances]
+
+    def _utterance_ids_in_file(self, file_idx):
+        """ Return the ids of the utterances in the given file. """
+        if isinstance(self._utterances, dict):
+            return self._file_utterance_idxs.get(file_idx, ())
+
+        return self._utterances.utterance_ids_in_file(file_idx)
+
+    def _utterance_ids_of_speaker(self, speaker_idx):
+        """ Return the ids of the utterances of the given speaker. """
+        if isinstance(self._utterances, dict):
+            return self._speaker_utterance_idxs.get(speaker_idx, ())
+
+        return self._utterances.utterance_ids_of_speaker(speaker_idx)
+
     def import_utterance(self, utterance):
         """ Import a copy of the given utterance and return the new utterance. """
         return self.add_utterance(utterance.file_idx,
@@ -435,14 +750,86 @@ class Dataset(DatasetBase):
             raise ValueError('Speaker with id {} does not exist!'.format(speaker_idx))
 
         if utterance_idx is None or utterance_idx in self.utterances.keys():
-            final_utterance_idx = naming.generate_name(length=15, not_in=self.utterances.keys())
+            final_utterance_idx = self.id_allocator.generate(not_in=self.utterances)
         else:
             final_utterance_idx = utterance_idx
 
         utt = data.Utterance(final_utterance_idx, file_idx, speaker_idx=speaker_idx, start=start, end=end)
         self.utterances[final_utterance_idx] = utt
+        self._index_utterance(utt)
+
+        return self.utterances[final_utterance_idx]
+
+    def add_utterances(self, file_ids, utterance_ids=None, speaker_ids=None, starts=None, ends=None):
+        """
+        Adds multiple utterances to the dataset at once. All arguments are columns (lists/arrays) of the same length.
+        The columns are validated together before any utterance is inserted.
+
+        :param file_ids: The ids of the files the utterances are in.
+        :param utterance_ids: The ids to associate with the utterances. If None or an id is None/already exists, one is generated.
+        :param speaker_ids: The ids of the speakers of the utterances (None entries for utterances without speaker).
+        :param starts: Starts of the utterances within the files [seconds]. None entries are replaced by 0.
+        :param ends: Ends of the utterances within the files [seconds]. None entries are replaced by -1 (end of the file).
+        :return: List of utterance objects
+        """
+        file_ids = list(file_ids)
+        count = len(file_ids)
+
+        if speaker_ids is None:
+            speaker_ids = [None] * count
+        else:
+            speaker_ids = list(speaker_ids)
+
+        if len(speaker_ids) != count:
+            raise ValueError('Number of speaker ids ({}) does not match the number of utterances ({})!'.format(len(speaker_ids), count))
+
+        referenced_file_ids = set(file_ids)
+
+        if None in referenced_file_ids or any(file_idx.strip() == '' for file_idx in referenced_file_ids):
+            raise ValueError('No file id given. The utterance has to be associated with a file!')
+
+        missing_file_ids = referenced_file_ids.difference(self.files.keys())
+
+        if len(missing_file_ids) > 0:
+            raise ValueError('Files with ids {} do not exist!'.format(', '.join(sorted(missing_file_ids))))
+
+        missing_speaker_ids = set(speaker_ids).difference(self.speakers.keys())
+        missing_speaker_ids.discard(None)
+
+        if len(missing_speaker_ids) > 0:
+            raise ValueError('Speakers with ids {} do not exist!'.format(', '.join(sorted(missing_speaker_ids))))
+
+        starts = self._float_column(starts, count, data.Utterance.START_FULL_FILE)
+        ends = self._float_column(ends, count, data.Utterance.END_FULL_FILE)
+
+        final_utterance_ids = self._final_ids(utterance_ids, count, self.utterances)
+        utterances = []
+
+        for utt_idx, file_idx, speaker_idx, start, end in zip(final_utterance_ids, file_ids, speaker_ids, starts, ends):
+            utt = data.Utterance(utt_idx, file_idx, speaker_idx=speaker_idx, start=start, end=end)
+            self.utterances[utt_idx] = utt
+            self._index_utterance(utt)
+            utterances.append(utt)
 
-        return utt
+        if not isinstance(self.utterances, dict):
+            utterances = [self.utterances[utt_idx] for utt_idx in final_utterance_ids]
+
+        return utterances
+
+    @staticmethod
+    def _float_column(values, count, default):
+        """ Return the column as list of floats, with None replaced by the default value. """
+        if values is None:
+            return [default] * count
+
+        column = np.array(values, dtype=np.float64)
+
+        if column.shape != (count,):
+            raise ValueError('Number of values ({}) does not match the number of entries ({})!'.format(column.size, count))
+
+        column[np.isnan(column)] = default
+
+        return column.tolist()
 
     def remove_utterances(self, utterance_ids):
         """
@@ -451,16 +838,96 @@ class Dataset(DatasetBase):
         :param utterance_ids: List of utterance ids
         """
         for utt_id in utterance_ids:
-            if type(utt_id) == data.Utterance:
+            if isinstance(utt_id, data.Utterance):
                 utt = utt_id
             else:
                 utt = self.utterances[utt_id]
 
-            if utt.idx in self.utterances.keys():
-                del self.utterances[utt.idx]
+            # A columnar view doesn't know its id anymore after the row was deleted
+            utterance_idx = utt.idx
+
+            if utterance_idx in self.utterances.keys():
+                self._unindex_utterance(self.utterances[utterance_idx])
+                del self.utterances[utterance_idx]
+                self._utterance_positions.pop(utterance_idx, None)
+
+            if utterance_idx in self.segmentations.keys():
+                del self.segmentations[utterance_idx]
+                self.modification_count += 1
+
+    def set_speaker_of_utterance(self, utterance_idx, speaker_idx):
+        """
+        Change the speaker of the given utterance. Always use this method instead of setting ``speaker_idx`` on the utterance directly,
+        otherwise the speaker index of the dataset gets out of date.
+
+        :param utterance_idx: Id of the utterance to change.
+        :param speaker_idx: Id of the new speaker.
+        """
+        utt = self.utterances[utterance_idx]
+
+        if utterance_idx in self._shared_utterance_idxs:
+            utt = copy.copy(utt)
+            self.utterances[utterance_idx] = utt
+            self._shared_utterance_idxs.discard(utterance_idx)
+
+        self._unindex_utterance(utt)
+        utt.speaker_idx = speaker_idx
+        self._index_utterance(utt)
 
-            if utt.idx in self.segmentations.keys():
-                del self.segmentations[utt.idx]
+    def _index_utterance(self, utt):
+        """ Add the utterance to the file and speaker indexes. """
+        self.modification_count += 1
+
+        if not isinstance(self._utterances, dict):
+            return
+
+        self._file_utterance_idxs[utt.file_idx][utt.idx] = None
+        self._speaker_utterance_idxs[utt.speaker_idx][utt.idx] = None
+
+        if utt.idx not in self._utterance_positions:
+            self._utterance_positions[utt.idx] = self._next_utterance_position
+            self._next_utterance_position += 1
+
+    def _in_utterance_order(self, utterance_ids):
+        """ Return the given ids of existing utterances sorted in the order of :attr:`utterances`. """
+        if isinstance(self._utterances, dict):
+            positions = self._utterance_positions
+
+            if any(utterance_idx not in positions for utterance_idx in utterance_ids):
+                # Utterances inserted into the dict directly have no position, use the order of the dict
+                utterance_ids = set(utterance_ids)
+                return [utterance_idx for utterance_idx in self._utterances.keys() if utterance_idx in utterance_ids]
+
+            return sorted(utterance_ids, key=positions.__getitem__)
+
+        return self._utterances.in_order(utterance_ids)
+
+    def _unindex_utterance(self, utt):
+        """ Remove the utterance from the file and speaker indexes. """
+        self.modification_count += 1
+
+        if not isinstance(self._utterances, dict):
+            return
+
+        for index, key in ((self._file_utterance_idxs, utt.file_idx), (self._speaker_utterance_idxs, utt.speaker_idx)):
+            utt_idxs = index.get(key)
+
+            if utt_idxs is not None:
+                utt_idxs.pop(utt.idx, None)
+
+                if len(utt_idxs) == 0:
+                    del index[key]
+
+    def _move_utterance(self, utterance_idx, new_utterance_idx, speaker_idx):
+        """ Move the utterance (with its segmentations) to a new id and speaker. """
+        utt = self.utterances[utterance_idx]
+        moved_utt = data.Utterance(new_utterance_idx, utt.file_idx, speaker_idx=speaker_idx, start=utt.start, end=utt.end)
+
+        self.remove_utterances([utterance_idx])
+        self.utterances[new_utterance_idx] = moved_utt
+        self._index_utterance(moved_utt)
+
+        return self.utterances[new_utterance_idx]
 
     #
     #   Speaker
@@ -482,18 +949,28 @@ class Dataset(DatasetBase):
         """
 
         if speaker_idx is None or speaker_idx in self.speakers.keys():
-            final_speaker_idx = naming.generate_name(length=15, not_in=self.speakers.keys())
+            final_speaker_idx = self.id_allocator.generate(not_in=self.speakers)
         else:
             final_speaker_idx = speaker_idx
 
         spk = data.Speaker(final_speaker_idx, gender=gender)
         self.speakers[final_speaker_idx] = spk
+        self.modification_count += 1
 
         return spk
 
     #
     #   Segmentation
     #
+    @property
+    def all_segmentation_keys(self):
+        """ Return a set of all occuring segmentation keys. """
+        if hasattr(self._segmentations, 'segmentation_keys'):
+            # Lazily loaded segmentations know their keys without loading
+            return self._segmentations.segmentation_keys()
+
+        return super(Dataset, self).all_segmentation_keys
+
     def import_segmentation(self, segmentation):
         """ Import a copy of the given segmentation and return the new segmentation. """
         return self.add_segmentation(segmentation.utterance_idx, segments=copy.deepcopy(segmentation.segments), key=segmentation.key)
@@ -522,9 +999,51 @@ class Dataset(DatasetBase):
             return None
 
         self.segmentations[utterance_idx][segmentation_obj.key] = segmentation_obj
+        self.modification_count += 1
 
         return segmentation_obj
 
+    def add_segmentations(self, utterance_ids, segments, key=None):
+        """
+        Adds multiple segmentations with the same key at once. The utterance ids are validated together before any segmentation is inserted.
+
+        :param utterance_ids: Utterance ids the segmentations are associated with.
+        :param segments: List with the segments of every segmentation, an entry can be a string (will be space separated into tokens)
+                         or a list of segments.
+        :param key: A key the segmentations are assiciated with. (If None the default key is used.)
+        :return: List of segmentation objects
+        """
+        utterance_ids = list(utterance_ids)
+        segments = list(segments)
+
+        if len(utterance_ids) != len(segments):
+            raise ValueError('Number of utterance ids ({}) does not match the number of segmentations ({})!'.format(len(utterance_ids), len(segments)))
+
+        referenced_utterance_ids = set(utterance_ids)
+
+        if None in referenced_utterance_ids or any(utt_idx.strip() == '' for utt_idx in referenced_utterance_ids):
+            raise ValueError('No utterance id given. The segmentation has to be associated with an utterance!')
+
+        missing_utterance_ids = referenced_utterance_ids.difference(self.utterances.keys())
+
+        if len(missing_utterance_ids) > 0:
+            raise ValueError('Utterances with ids {} do not exist!'.format(', '.join(sorted(missing_utterance_ids))))
+
+        segmentation_objs = []
+
+        for utterance_idx, utt_segments in zip(utterance_ids, segments):
+            if type(utt_segments) == str:
+                segmentation_obj = data.Segmentation.from_text(utt_segments, utterance_idx=utterance_idx, key=key)
+            else:
+                segmentation_obj = data.Segmentation(segments=utt_segments, utterance_idx=utterance_idx, key=key)
+
+            self.segmentations[utterance_idx][segmentation_obj.key] = segmentation_obj
+            segmentation_objs.append(segmentation_obj)
+
+        self.modification_count += 1
+
+        return segmentation_objs
+
     def import_segmentation(self, segmentation):
         """ Adds an existing segmentation to the dataset. Uses key and utterance-id from the segmentation object. """
 
@@ -535,6 +1054,7 @@ class Dataset(DatasetBase):
             raise ValueError('Utterance with id {} does not exist!'.format(segmentation.utterance_idx))
 
         self.segmentations[segmentation.utterance_idx][segmentation.key] = segmentation
+        self.modification_count += 1
 
         return segmentation
 
@@ -542,8 +1062,15 @@ class Dataset(DatasetBase):
     #   FEATURES
     #
 
-    def create_feature_container(self, name, path=None):
-        """ Create a new feature container """
+    def create_feature_container(self, name, path=None, backend=None, **storage_options):
+        """
+        Create a new feature container.
+
+        :param name: Name of the container.
+        :param path: Path of the container (relative to the dataset path), by default features_[name].
+        :param backend: 'hdf5' (default) or 'flat' (see :func:`spych.data.features.create_container`).
+        :param storage_options: Storage options of a HDF5 container, e.g. compression='gzip' (see :class:`spych.data.FeatureContainer`).
+        """
 
         if name in self.features.keys():
             raise ValueError('Feature container with name {} already exists.'.format(name))
@@ -556,7 +1083,7 @@ class Dataset(DatasetBase):
         else:
             final_feature_path = os.path.join(self.path, path)
 
-        fc = data.FeatureContainer(final_feature_path)
+        fc = data.features.create_container(final_feature_path, backend=backend, **storage_options)
         self.features[name] = fc
 
         return fc
@@ -564,6 +1091,8 @@ class Dataset(DatasetBase):
     def add_features(self, utterance_idx, feature_matrix, feature_container):
         """
         Adds the given features to the dataset. Features are stored directly to the filesystem, so this dataset has to have a path set.
+        When adding the features of many utterances, keep the container open (``with dataset.features[name]:``),
+        otherwise the file is opened and closed for every call.
 
         :param utterance_idx: Utterance to which the features correspond.
         :param feature_matrix: A numpy array containing the features.
@@ -582,28 +1111,221 @@ class Dataset(DatasetBase):
         with self.features[feature_container] as fc:
             fc.add(utterance_idx, feature_matrix)
 
-    def generate_features(self, feature_pipeline, target_feature_name, source_feature_name=None):
+    def compute_cmvn_statistics(self, feature_name, mode='global', num_workers=1, force=False):
+        """
+        Return the CMVN statistics of the features of the utterances of the dataset
+        (to normalize with :class:`spych.data.features.pipeline.CMVNStage`).
+
+        The statistics are stored next to the feature container (see :func:`spych.data.features.cmvn.statistics_path`)
+        and are only recomputed if the container or the utterances (and their speakers) changed.
+
+        :param feature_name: Name of the feature container.
+        :param mode: 'global', 'speaker' or 'utterance'. Per speaker, utterances without a known speaker are ignored.
+        :param num_workers: Number of processes to read the features with.
+        :param force: If True, the statistics are recomputed in any case.
+        :return: The :class:`spych.data.features.CMVNStatistics`.
+        """
+        fc = self.features[feature_name]
+        fc.open(mode='r')
+
+        try:
+            stored_utterance_ids = set(fc.keys())
+        finally:
+            fc.close()
+
+        if mode == data.features.cmvn.MODE_SPEAKER:
+            utterance_keys = {utt.idx: speaker.idx for speaker, utterances in self.speaker_to_utterance_dict().items() for utt in utterances}
+        else:
+            utterance_keys = {utterance_idx: utterance_idx for utterance_idx in self.utterances.keys()}
+
+        utterance_keys = {utterance_idx: key for utterance_idx, key in utterance_keys.items() if utterance_idx in stored_utterance_ids}
+        statistics_path = data.features.cmvn.statistics_path(fc.path, mode)
+
+        if not force:
+            cmvn_statistics = data.features.cmvn.load_cached_statistics(fc.path, mode)
+
+            if cmvn_statistics is not None and self._cmvn_statistics_cover(cmvn_statistics, utterance_keys):
+                return cmvn_statistics
+
+        cmvn_statistics = data.features.cmvn.compute_cmvn_statistics(fc, mode=mode, utterance_keys=utterance_keys, num_workers=num_workers)
+        cmvn_statistics.save(statistics_path)
+
+        return cmvn_statistics
+
+    @staticmethod
+    def _cmvn_statistics_cover(cmvn_statistics, utterance_keys):
+        """ Return True if the statistics were computed from exactly the given utterances (with the given keys). """
+        stored_keys = cmvn_statistics.utterance_keys()
+
+        if cmvn_statistics.mode == data.features.cmvn.MODE_SPEAKER:
+            return stored_keys == {utterance_idx: str(key) for utterance_idx, key in utterance_keys.items()}
+
+        return set(stored_keys.keys()) == set(utterance_keys.keys())
+
+    def generate_features(self, feature_pipeline, target_feature_name, source_feature_name=None, num_workers=1, resume=False,
+                          incremental=False, progress=None, profile=False, backend=None, storage_options=None):
         """
         Creates new feature container with features generated with the given pipeline.
         If source_feature_name is not given the pipeline needs an extraction stage.
+
+        Every feature matrix is stored with the fingerprint of the pipeline (see :meth:`spych.data.features.pipeline.Pipeline.fingerprint`),
+        the modification time of its audio file and start/end of its utterance.
+
+        :param feature_pipeline: The pipeline to process the signals/features with.
+        :param target_feature_name: Name of the feature container to create.
+        :param source_feature_name: Name of the feature container with the features to process (instead of extracting from the audio).
+        :param num_workers: Number of processes to generate the features with. The features are always written by this process,
+                            in the order of the utterances. With more than one worker the pipeline has to be picklable.
+        :param resume: If True and the target container already exists, only the utterances without features in it are processed.
+        :param incremental: Like resume, but additionally features are regenerated if they are stale
+                            (the pipeline fingerprint, the audio file modification time or start/end of the utterance changed).
+                            Features of utterances which are not in the dataset anymore are removed.
+        :param progress: Callable, which is called with (number of done utterances, number of utterances to process)
+                         every time features were written.
+        :param profile: If True, profiling is enabled on the pipeline (see :meth:`spych.data.features.pipeline.Pipeline.enable_profiling`).
+                        The profile of a profiling pipeline (including the statistics of the workers) is stored
+                        as JSON in the attribute ``pipeline_profile`` of the container.
+        :param backend: Backend of the container, if it is created (see :meth:`create_feature_container`).
+        :param storage_options: Dictionary with the storage options of the container, if it is created.
+        :return: The profile of the pipeline, None if profiling is disabled.
         """
+        if (resume or incremental) and target_feature_name in self.features.keys():
+            target_fc = self.features[target_feature_name]
+        else:
+            target_fc = self.create_feature_container(target_feature_name, backend=backend, **(storage_options or {}))
 
-        target_fc = self.create_feature_container(target_feature_name)
         target_fc.open()
         source_fc = None
 
         if source_feature_name is not None:
             source_fc = self.features[source_feature_name]
-            source_fc.open()
+            source_fc.open(mode='r')
 
-        for utterance_id in self.utterances.keys():
-            if source_feature_name is not None:
-                output = feature_pipeline.process(source_fc.get(utterance_id))
+        utterance_ids = list(self.utterances.keys())
+        fingerprint = feature_pipeline.fingerprint()
+        entry_attributes = self._feature_source_attributes(utterance_ids, source_fc)
+
+        for attributes in entry_attributes.values():
+            attributes['pipeline_fingerprint'] = fingerprint
+
+        if incremental:
+            for utterance_id in set(target_fc.keys()).difference(self.utterances.keys()):
+                target_fc.remove(utterance_id)
+
+            utterance_ids = [utt_id for utt_id in utterance_ids if not self._are_features_up_to_date(target_fc, utt_id, entry_attributes[utt_id])]
+        elif resume:
+            done_utterance_ids = set(target_fc.keys())
+            utterance_ids = [utt_id for utt_id in utterance_ids if utt_id not in done_utterance_ids]
+
+        target_fc.attributes['pipeline_fingerprint'] = fingerprint
+
+        if profile:
+            feature_pipeline.enable_profiling()
+
+        pool = None
+
+        if num_workers > 1:
+            pool = multiprocessing.Pool(num_workers)
+
+            if source_fc is not None:
+                results = pool.imap(functools.partial(_run_worker_task, _process_features, feature_pipeline),
+                                    self._processing_tasks(source_fc, utterance_ids))
             else:
-                samples, sr = self.read_utterance_data(utterance_id)
-                output = feature_pipeline.process_signal(samples, sr)
+                results = pool.imap(functools.partial(_run_worker_task, _extract_features, feature_pipeline), self._extraction_tasks(utterance_ids))
+        elif source_fc is not None:
+            results = ((_process_features(feature_pipeline, task), None) for task in self._processing_tasks(source_fc, utterance_ids))
+        else:
+            results = (([(utt_id, feature_pipeline.process_signal(samples, sr, utterance_idx=utt_id))], None)
+                       for utt_id, samples, sr in self.read_utterances_data(utterance_ids))
+
+        num_done = 0
+
+        try:
+            for result, worker_profile in results:
+                if worker_profile is not None:
+                    feature_pipeline.profile.merge(worker_profile)
+
+                for utterance_id, output in result:
+                    target_fc.add(utterance_id, output, attributes=entry_attributes[utterance_id])
+
+                # Flush after every task, so an interrupted run can be resumed
+                target_fc.flush()
+                num_done += len(result)
+
+                if progress is not None:
+                    progress(num_done, len(utterance_ids))
+
+            if feature_pipeline.profile is not None:
+                target_fc.attributes['pipeline_profile'] = json.dumps(feature_pipeline.profile.to_dict())
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
 
-            target_fc.add(utterance_id, output)
+            target_fc.close()
+
+            if source_fc is not None:
+                source_fc.close()
+
+        return feature_pipeline.profile
+
+    def _feature_source_attributes(self, utterance_ids, source_fc=None):
+        """
+        Return a dictionary utterance-id/attributes describing the source of the features of the utterance
+        (modification time of the audio file and start/end of the utterance). If features are generated from other features,
+        the source information of those is used.
+        """
+        file_mtimes = {}
+        attributes = {}
+
+        for utterance_idx in utterance_ids:
+            utt = self.utterances[utterance_idx]
+
+            if source_fc is not None:
+                attributes[utterance_idx] = source_fc.get_attributes(utterance_idx) or {}
+
+                if 'pipeline_fingerprint' in attributes[utterance_idx]:
+                    attributes[utterance_idx]['source_pipeline_fingerprint'] = attributes[utterance_idx].pop('pipeline_fingerprint')
+
+                continue
+
+            if utt.file_idx not in file_mtimes:
+                file_path = self.files[utt.file_idx].path
+                file_mtimes[utt.file_idx] = os.stat(file_path).st_mtime_ns if os.path.isfile(file_path) else -1
+
+            attributes[utterance_idx] = {
+                'source_mtime': file_mtimes[utt.file_idx],
+                'start': float(utt.start),
+                'end': float(utt.end)
+            }
+
+        return attributes
+
+    @staticmethod
+    def _are_features_up_to_date(fc, utterance_idx, attributes):
+        """ Return True if the container has features of the utterance, which were stored with the given attributes. """
+        stored_attributes = fc.get_attributes(utterance_idx)
+
+        if stored_attributes is None:
+            return False
+
+        return all(key in stored_attributes and stored_attributes[key] == value for key, value in attributes.items())
+
+    @staticmethod
+    def _processing_tasks(source_fc, utterance_ids, batch_size=64):
+        """ Return a generator of tasks (list of (utterance-id, features)) for feature processing with :func:`_process_features`. """
+        for index in range(0, len(utterance_ids), batch_size):
+            yield [(utt_id, source_fc.get(utt_id)) for utt_id in utterance_ids[index:index + batch_size]]
+
+    def _extraction_tasks(self, utterance_ids):
+        """ Return a generator of tasks (file-path, list of utterances) for feature extraction with :func:`_extract_features`. """
+        file_utterances = collections.OrderedDict()
+
+        for utterance_idx in utterance_ids:
+            utt = self.utterances[utterance_idx]
+            file_utterances.setdefault(utt.file_idx, []).append(copy.copy(utt))
+
+        return ((self.files[file_idx].path, utterances) for file_idx, utterances in file_utterances.items())
 
     #
     #   DIV
@@ -665,7 +1387,7 @@ class Dataset(DatasetBase):
             print("Number of speakers already greater or equal to {}.".format(target_number_of_speakers))
             return
 
-        spk2utt = self.speaker_to_utterance_dict()
+        spk2utt = {speaker.idx: [utt.idx for utt in utterances] for speaker, utterances in self.speaker_to_utterance_dict().items()}
         spk2utt_count = {speaker_id: len(utterances) for speaker_id, utterances in spk2utt.items()}
 
         utt_count = sum(spk2utt_count.values())
@@ -700,7 +1422,7 @@ class Dataset(DatasetBase):
                     num_utts_rest -= 1
 
                 if i > 0:
-                    new_speaker_id = naming.generate_name(15, not_in=self.speakers.keys())
+                    new_speaker_id = self.id_allocator.generate(not_in=self.speakers)
                     new_speaker = self.add_speaker(new_speaker_id)
                     new_speaker.load_speaker_info_from_dict(self.speakers[speaker_id].get_speaker_info_dict())
                     new_speaker.part_from_speaker = speaker_id
@@ -708,21 +1430,44 @@ class Dataset(DatasetBase):
                     part_utt_ids = shuffled_utt_ids[start_index:start_index + num_utts_new]
 
                     for utt_id in part_utt_ids:
-                        if utt_id.starts_with(speaker_id):
-                            changed_utt_id = utt_id.replace(speaker_id, new_speaker_id)
+                        if utt_id.startswith(speaker_id):
+                            changed_utt_id = utt_id.replace(speaker_id, new_speaker_id, 1)
                         else:
-                            changed_utt_id = naming.generate_name(15, not_in=self.utterances.keys())
+                            changed_utt_id = self.id_allocator.generate(not_in=self.utterances)
 
-                        self.utterances[changed_utt_id] = self.utterances[utt_id]
-                        self.utterances[changed_utt_id].idx = changed_utt_id
+                        segmentations = list(self.segmentations.get(utt_id, {}).values())
 
-                        del self.utterances[utt_id]
+                        self._move_utterance(utt_id, changed_utt_id, new_speaker_id)
 
-                        self.segmentations[changed_utt_id] = self.segmentations[utt_id]
+                        for seg in segmentations:
+                            self.import_segmentation(data.Segmentation(segments=seg.segments, utterance_idx=changed_utt_id, key=seg.key))
 
-                        for key, seg in self.segmentations[changed_utt_id].items():
-                            seg.utterance_idx = changed_utt_id
+                start_index += num_utts_new
 
-                        del self.segmentations[utt_id]
 
-                start_index += num_utts_new
+def _run_worker_task(function, feature_pipeline, task):
+    """
+    Run the worker function of :meth:`Dataset.generate_features` for the task in a worker process.
+    Return tuple (result, profile of the task) - the profile is None if the pipeline isn't profiling.
+    """
+    if feature_pipeline.profile is not None:
+        # The pipeline is a copy, start from an empty profile so the parent doesn't count the statistics twice
+        feature_pipeline.enable_profiling()
+
+    return function(feature_pipeline, task), feature_pipeline.profile
+
+
+def _extract_features(feature_pipeline, task):
+    """ Worker function for :meth:`Dataset.generate_features`, which extracts the features of all utterances of one file. """
+    file_path, utterances = task
+
+    return [(utt.idx, feature_pipeline.process_signal(samples, sampling_rate, utterance_idx=utt.idx))
+            for utt, samples, sampling_rate in DatasetBase._read_file_utterances(file_path, utterances)]
+
+
+def _process_features(feature_pipeline, task):
+    """ Worker function for :meth:`Dataset.generate_features`, which processes the given features as one batch. """
+    utterance_ids = [utterance_idx for utterance_idx, feature_matrix in task]
+    outputs = feature_pipeline.process_batch([feature_matrix for utterance_idx, feature_matrix in task], utterance_ids=utterance_ids)
+
+    return list(zip(utterance_ids, outputs))
@@ -7,10 +7,14 @@ from spych.data import dataset
 class DatasetLoader(object):
     """
     A dataset loader is responsible to load a dataset from a filesystem or save a dataset to the filesystem.
+
+    :param main_features: Name of the feature container to export (for formats supporting only one).
+    :param columnar: If True loaded datasets store their utterances in a columnar table (see :class:`spych.data.dataset.Dataset`).
     """
 
-    def __init__(self, main_features=None):
+    def __init__(self, main_features=None, columnar=False):
         self.main_features = main_features
+        self.columnar = columnar
 
     @classmethod
     def type(cls):
@@ -29,12 +33,16 @@ class DatasetLoader(object):
         if missing_files is not None:
             raise IOError('Invalid dataset of type {}: files {} not found at {}'.format(self.type(), ' '.join(missing_files), path))
 
-        loading_dataset = dataset.Dataset(path, loader=self)
+        loading_dataset = dataset.Dataset(path, loader=self, **self._dataset_options())
 
         self._load(loading_dataset)
 
         return loading_dataset
 
+    def _dataset_options(self):
+        """ Return the keyword arguments used to create the dataset when loading. Override in subclass to add options. """
+        return {'columnar': self.columnar}
+
     def _load(self, dataset):
         """ Effectively loads the dataset. Override in subclass. """
         raise NotImplementedError('Loader {} does not support loading datasets.'.format(self.type()))
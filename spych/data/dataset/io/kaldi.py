@@ -37,8 +37,8 @@ class KaldiDatasetLoader(base.DatasetLoader):
     def _load(self, dataset):
         # load wavs
         wav_file_path = os.path.join(dataset.path, WAV_FILE_NAME)
-        for file_idx, file_path in textfile.read_key_value_lines(wav_file_path, separator=' ').items():
-            dataset.add_file(file_path, file_idx=file_idx)
+        wavs = textfile.read_key_value_lines(wav_file_path, separator=' ')
+        dataset.add_files(wavs.values(), file_ids=wavs.keys())
 
         # load utterances
         utt2spk_path = os.path.join(dataset.path, UTT2SPK_FILE_NAME)
@@ -50,39 +50,29 @@ class KaldiDatasetLoader(base.DatasetLoader):
         segments_path = os.path.join(dataset.path, SEGMENTS_FILE_NAME)
 
         if os.path.isfile(segments_path):
-            for utt_id, utt_info in textfile.read_separated_lines_with_first_key(segments_path, separator=' ', max_columns=4).items():
-                start = None
-                end = None
-
-                if len(utt_info) > 1:
-                    start = utt_info[1]
-
-                if len(utt_info) > 2:
-                    end = utt_info[2]
-
-                speaker_idx = None
-
-                if utt_id in utt2spk.keys():
-                    speaker_idx = utt2spk[utt_id]
-                    if speaker_idx not in dataset.speakers.keys():
-                        dataset.add_speaker(speaker_idx=speaker_idx)
-
-                dataset.add_utterance(utt_info[0], utterance_idx=utt_id, speaker_idx=speaker_idx, start=start, end=end)
+            segments = textfile.read_separated_lines_with_first_key(segments_path, separator=' ', max_columns=4)
+            utterance_ids = list(segments.keys())
+            file_ids = [segments[utt_id][0] for utt_id in utterance_ids]
+            starts = [segments[utt_id][1] if len(segments[utt_id]) > 1 else None for utt_id in utterance_ids]
+            ends = [segments[utt_id][2] if len(segments[utt_id]) > 2 else None for utt_id in utterance_ids]
         else:
-            for file_idx in dataset.files.keys():
-                speaker_idx = None
+            utterance_ids = list(dataset.files.keys())
+            file_ids = utterance_ids
+            starts = None
+            ends = None
+
+        speaker_ids = [utt2spk.get(utt_id, None) for utt_id in utterance_ids]
 
-                if file_idx in utt2spk.keys():
-                    speaker_idx = utt2spk[file_idx]
-                    if speaker_idx not in dataset.speakers.keys():
-                        dataset.add_speaker(speaker_idx=speaker_idx)
+        for speaker_idx in set(speaker_ids):
+            if speaker_idx is not None and speaker_idx not in dataset.speakers.keys():
+                dataset.add_speaker(speaker_idx=speaker_idx)
 
-                dataset.add_utterance(file_idx, utterance_idx=file_idx, speaker_idx=speaker_idx)
+        dataset.add_utterances(file_ids, utterance_ids=utterance_ids, speaker_ids=speaker_ids, starts=starts, ends=ends)
 
         # load transcriptions
         text_path = os.path.join(dataset.path, TRANSCRIPTION_FILE_NAME)
-        for utt_id, transcription in textfile.read_key_value_lines(text_path, separator=' ').items():
-            dataset.add_segmentation(utt_id, segments=transcription)
+        transcriptions = textfile.read_key_value_lines(text_path, separator=' ')
+        dataset.add_segmentations(transcriptions.keys(), transcriptions.values())
 
         # load genders
         gender_path = os.path.join(dataset.path, SPK2GENDER_FILE_NAME)
@@ -130,7 +120,7 @@ class KaldiDatasetLoader(base.DatasetLoader):
         # Write features
         if self.main_features is not None:
             fc = dataset.features[self.main_features]
-            fc.open()
+            fc.open(mode='r')
             matrices = {}
 
             for utt_id in dataset.utterances.keys():
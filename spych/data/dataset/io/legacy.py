@@ -73,34 +73,29 @@ class LegacySpychDatasetLoader(base.DatasetLoader):
     def _load_wavs(self, loading_dataset):
         wavs_file_path = os.path.join(loading_dataset.path, WAV_FILE_NAME)
 
-        for wav_id, wav_path in textfile.read_key_value_lines(wavs_file_path).items():
-            loading_dataset.add_file(os.path.abspath(os.path.join(loading_dataset.path, wav_path)), file_idx=wav_id)
+        wavs = textfile.read_key_value_lines(wavs_file_path)
+        loading_dataset.add_files([os.path.join(loading_dataset.path, x) for x in wavs.values()], file_ids=wavs.keys())
 
     def _load_utterances(self, loading_dataset):
         utterances_path = os.path.join(loading_dataset.path, SEGMENTS_FILE_NAME)
-        for utt_id, utt_info in textfile.read_separated_lines_with_first_key(utterances_path, max_columns=4).items():
-            start = data.Utterance.START_FULL_FILE
-            end = data.Utterance.END_FULL_FILE
+        utterances = textfile.read_separated_lines_with_first_key(utterances_path, max_columns=4)
 
-            if len(utt_info) > 1:
-                start = utt_info[1]
-
-            if len(utt_info) > 2:
-                end = utt_info[2]
-
-            loading_dataset.add_utterance(utt_info[0], utterance_idx=utt_id, start=start, end=end)
+        loading_dataset.add_utterances([utt_info[0] for utt_info in utterances.values()],
+                                       utterance_ids=utterances.keys(),
+                                       starts=[utt_info[1] if len(utt_info) > 1 else None for utt_info in utterances.values()],
+                                       ends=[utt_info[2] if len(utt_info) > 2 else None for utt_info in utterances.values()])
 
     def _load_transcriptions(self, loading_dataset):
         transcriptions_path = os.path.join(loading_dataset.path, TRANSCRIPTION_FILE_NAME)
         transcriptions_raw_path = os.path.join(loading_dataset.path, TRANSCRIPTION_RAW_FILE_NAME)
 
         if os.path.isfile(transcriptions_path):
-            for utt_id, transcription in textfile.read_key_value_lines(transcriptions_path).items():
-                loading_dataset.add_segmentation(utt_id, segments=transcription, key=data.Segmentation.TEXT_SEGMENTATION)
+            transcriptions = textfile.read_key_value_lines(transcriptions_path)
+            loading_dataset.add_segmentations(transcriptions.keys(), transcriptions.values(), key=data.Segmentation.TEXT_SEGMENTATION)
 
         if os.path.isfile(transcriptions_raw_path):
-            for utt_id, transcription_raw in textfile.read_key_value_lines(transcriptions_raw_path).items():
-                loading_dataset.add_segmentation(utt_id, segments=transcription_raw, key=data.Segmentation.RAW_TEXT_SEGMENTATION)
+            transcriptions_raw = textfile.read_key_value_lines(transcriptions_raw_path)
+            loading_dataset.add_segmentations(transcriptions_raw.keys(), transcriptions_raw.values(), key=data.Segmentation.RAW_TEXT_SEGMENTATION)
 
     def _load_speakers(self, loading_dataset):
         utt2spk_path = os.path.join(loading_dataset.path, UTT2SPK_FILE_NAME)
@@ -113,4 +108,4 @@ class LegacySpychDatasetLoader(base.DatasetLoader):
 
         if os.path.isfile(utt2spk_path):
             for utt_id, spk_id in textfile.read_key_value_lines(utt2spk_path).items():
-                loading_dataset.utterances[utt_id].speaker_idx = spk_id
+                loading_dataset.set_speaker_of_utterance(utt_id, spk_id)
@@ -0,0 +1,190 @@
+"""
+Binary snapshot of the bulk parts of a dataset in the spych format (files, utterances, utt2spk and segmentations).
+
+A snapshot is a folder with numpy arrays (loadable memory-mapped) and a string table. All strings (ids, paths, token values)
+are stored once in the string table and referenced by their index from the arrays. The string table consists of the
+UTF-8 encoded strings concatenated in one file and an array with the offsets of the strings (so strings may contain any character).
+The manifest stores size and modification time of the text files the snapshot was created from,
+so a snapshot is only used as long as the text files didn't change.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+SNAPSHOT_FOLDER_NAME = '.snapshot'
+MANIFEST_FILE_NAME = 'manifest.json'
+STRING_TABLE_FILE_NAME = 'strings.bin'
+STRING_OFFSETS_FILE_NAME = 'string_offsets.npy'
+
+VERSION = 2
+NO_SPEAKER = -1
+
+
+class SnapshotData(object):
+    """
+    Content of a snapshot. Ids and values are returned as lists of strings, numeric columns as (memory-mapped) numpy arrays.
+    """
+
+    def __init__(self, strings, arrays, segmentation_keys):
+        self.strings = strings
+        self.arrays = arrays
+        self.segmentation_keys = segmentation_keys
+
+    def _resolve(self, name):
+        strings = self.strings
+        return [strings[code] for code in self.arrays[name].tolist()]
+
+    def files(self):
+        """ Return tuple (file-ids, relative file-paths). """
+        return self._resolve('file_ids'), self._resolve('file_paths')
+
+    def utterances(self):
+        """ Return tuple (utterance-ids, file-ids, speaker-ids, starts, ends). Missing speakers are None, missing starts/ends NaN. """
+        strings = self.strings
+        speaker_idxs = [strings[code] if code != NO_SPEAKER else None for code in self.arrays['utt_speakers'].tolist()]
+
+        return self._resolve('utt_ids'), self._resolve('utt_files'), speaker_idxs, self.arrays['utt_starts'], self.arrays['utt_ends']
+
+    def segmentation_tokens(self, key):
+        """ Return tuple (utterance-ids, starts, ends, values) of all tokens of the segmentations with the given key. """
+        prefix = 'seg_{}_'.format(key)
+
+        return (self._resolve(prefix + 'utts'),
+                self.arrays[prefix + 'starts'].tolist(),
+                self.arrays[prefix + 'ends'].tolist(),
+                self._resolve(prefix + 'values'))
+
+
+def snapshot_path(dataset_path):
+    """ Return the path of the snapshot folder of the dataset at the given path. """
+    return os.path.join(dataset_path, SNAPSHOT_FOLDER_NAME)
+
+
+def source_stats(source_paths):
+    """ Return a dictionary file-name/[size, mtime] for the given existing files. """
+    stats = {}
+
+    for path in source_paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            stats[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+
+    return stats
+
+
+def is_up_to_date(dataset_path, source_paths):
+    """ Return True if there is a snapshot for the dataset which was created from the given text files in their current state. """
+    manifest_path = os.path.join(snapshot_path(dataset_path), MANIFEST_FILE_NAME)
+
+    if not os.path.isfile(manifest_path):
+        return False
+
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except ValueError:
+        return False
+
+    return manifest.get('version') == VERSION and manifest.get('sources') == source_stats(source_paths)
+
+
+def read(dataset_path, mmap=True):
+    """ Read the snapshot of the dataset at the given path. Return :class:`SnapshotData`. """
+    path = snapshot_path(dataset_path)
+
+    with open(os.path.join(path, MANIFEST_FILE_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    with open(os.path.join(path, STRING_TABLE_FILE_NAME), 'rb') as f:
+        blob = f.read()
+
+    offsets = np.load(os.path.join(path, STRING_OFFSETS_FILE_NAME)).tolist()
+    strings = [blob[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {name: np.load(os.path.join(path, '{}.npy'.format(name)), mmap_mode=mmap_mode) for name in manifest['arrays']}
+
+    return SnapshotData(strings, arrays, manifest['segmentation_keys'])
+
+
+def write(dataset_path, files, utterances, segmentations, source_paths):
+    """
+    Write a snapshot for the dataset at the given path.
+
+    :param dataset_path: Path of the dataset folder.
+    :param files: Dictionary file-id/relative-path.
+    :param utterances: Iterable of utterance objects.
+    :param segmentations: Dictionary key/(dictionary utterance-id/segmentation).
+    :param source_paths: Text files the snapshot represents (their current state is stored in the manifest).
+    """
+    string_codes = {}
+
+    def codes(values):
+        result = np.empty(len(values), dtype=np.int32)
+
+        for index, value in enumerate(values):
+            if value is None:
+                result[index] = NO_SPEAKER
+            else:
+                result[index] = string_codes.setdefault(str(value), len(string_codes))
+
+        return result
+
+    def floats(values):
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+    arrays = {}
+
+    file_ids = sorted(files.keys())
+    arrays['file_ids'] = codes(file_ids)
+    arrays['file_paths'] = codes([files[file_idx] for file_idx in file_ids])
+
+    utterances = sorted(utterances, key=lambda utt: utt.idx)
+    arrays['utt_ids'] = codes([utt.idx for utt in utterances])
+    arrays['utt_files'] = codes([utt.file_idx for utt in utterances])
+    arrays['utt_speakers'] = codes([utt.speaker_idx for utt in utterances])
+    arrays['utt_starts'] = floats([utt.start for utt in utterances])
+    arrays['utt_ends'] = floats([utt.end for utt in utterances])
+
+    for key, utt_segmentations in segmentations.items():
+        tokens = [(utterance_idx, token) for utterance_idx in sorted(utt_segmentations.keys()) for token in utt_segmentations[utterance_idx].segments]
+        prefix = 'seg_{}_'.format(key)
+
+        arrays[prefix + 'utts'] = codes([utterance_idx for utterance_idx, token in tokens])
+        arrays[prefix + 'starts'] = floats([token.start for utterance_idx, token in tokens])
+        arrays[prefix + 'ends'] = floats([token.end for utterance_idx, token in tokens])
+        arrays[prefix + 'values'] = codes([token.value for utterance_idx, token in tokens])
+
+    target_path = snapshot_path(dataset_path)
+    temp_path = '{}.tmp'.format(target_path)
+
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(temp_path, '{}.npy'.format(name)), array)
+
+    encoded_strings = [value.encode('utf-8') for value in string_codes.keys()]
+    offsets = np.zeros(len(encoded_strings) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded_strings], out=offsets[1:])
+
+    with open(os.path.join(temp_path, STRING_TABLE_FILE_NAME), 'wb') as f:
+        f.write(b''.join(encoded_strings))
+
+    np.save(os.path.join(temp_path, STRING_OFFSETS_FILE_NAME), offsets)
+
+    manifest = {
+        'version': VERSION,
+        'sources': source_stats(source_paths),
+        'arrays': sorted(arrays.keys()),
+        'segmentation_keys': sorted(segmentations.keys())
+    }
+
+    with open(os.path.join(temp_path, MANIFEST_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    shutil.rmtree(target_path, ignore_errors=True)
+    os.rename(temp_path, target_path)
@@ -5,7 +5,9 @@ import shutil
 
 from spych import data
 from spych.data import dataset
+from spych.data.dataset import lazy
 from spych.data.dataset.io import base
+from spych.data.dataset.io import snapshot
 from spych.utils import jsonfile
 from spych.utils import textfile
 
@@ -18,10 +20,34 @@ FEAT_CONTAINER_FILE_NAME = 'features.txt'
 
 
 class SpychDatasetLoader(base.DatasetLoader):
+    """
+    Loads and saves datasets in the spych format.
+
+    Utterances without a speaker have no entry in the utt2spk file, they are loaded with speaker None.
+
+    :param use_snapshot: If True a binary snapshot of files, utterances and segmentations is written when saving,
+                         and is preferred over parsing the text files when loading (as long as the text files are unchanged).
+    :param lazy_segmentations: If True segmentations are not parsed when loading. The segmentation files are indexed
+                               when a key is accessed the first time, and single segmentations are read on access.
+    :param materialized_subviews: If True the loaded subviews cache the filtered utterances (see :class:`spych.data.dataset.Subview`).
+    """
+
+    def __init__(self, main_features=None, columnar=False, use_snapshot=True, lazy_segmentations=False, materialized_subviews=False):
+        super(SpychDatasetLoader, self).__init__(main_features=main_features, columnar=columnar)
+        self.use_snapshot = use_snapshot
+        self.lazy_segmentations = lazy_segmentations
+        self.materialized_subviews = materialized_subviews
+
     @classmethod
     def type(cls):
         return 'spych'
 
+    def _dataset_options(self):
+        options = super(SpychDatasetLoader, self)._dataset_options()
+        options['lazy_segmentations'] = self.lazy_segmentations
+
+        return options
+
     def check_for_missing_files(self, path):
         necessary_files = [FILES_FILE_NAME, UTTERANCE_FILE_NAME]
         missing_files = []
@@ -35,57 +61,24 @@ class SpychDatasetLoader(base.DatasetLoader):
         return missing_files or None
 
     def _load(self, loading_dataset):
-        # Read files
-        file_path = os.path.join(loading_dataset.path, FILES_FILE_NAME)
-        for file_idx, file_path in textfile.read_key_value_lines(file_path, separator=' ').items():
-            loading_dataset.add_file(os.path.abspath(os.path.join(loading_dataset.path, file_path)), file_idx=file_idx, copy_file=False)
-
         # Read speakers
         speaker_path = os.path.join(loading_dataset.path, SPEAKER_INFO_FILE_NAME)
         for speaker_idx, speaker_info in jsonfile.read_json_file(speaker_path).items():
             speaker = loading_dataset.add_speaker(speaker_idx=speaker_idx)
             speaker.load_speaker_info_from_dict(speaker_info)
 
-        # Read utt2spk
-        utt2spk_path = os.path.join(loading_dataset.path, UTT2SPK_FILE_NAME)
-        if os.path.isfile(utt2spk_path):
-            utt2spk = textfile.read_key_value_lines(utt2spk_path, separator=' ')
-
-        # Read utterances
-        utterance_path = os.path.join(loading_dataset.path, UTTERANCE_FILE_NAME)
-        for utterance_idx, utt_info in textfile.read_separated_lines_with_first_key(utterance_path, separator=' ', max_columns=4).items():
-            start = None
-            end = None
-
-            if len(utt_info) > 1:
-                start = float(utt_info[1])
-
-            if len(utt_info) > 2:
-                end = float(utt_info[2])
-
-            if utterance_idx in utt2spk.keys():
-                speaker_idx = utt2spk[utterance_idx]
-                loading_dataset.add_utterance(utt_info[0], utterance_idx=utterance_idx, speaker_idx=speaker_idx, start=start, end=end)
-
-        # Read segmentations
-        for seg_file in glob.glob(os.path.join(loading_dataset.path, 'segmentation_*.txt')):
-            file_name = os.path.basename(seg_file)
-            key = file_name[len('segmentation_'):len(file_name) - len('.txt')]
-
-            utterance_segments = collections.defaultdict(list)
-
-            for record in textfile.read_separated_lines_generator(seg_file, separator=' ', max_columns=4):
-                utterance_segments[record[0]].append(data.Token(record[3], float(record[1]), float(record[2])))
-
-            for utterance_idx, segments in utterance_segments.items():
-                loading_dataset.add_segmentation(utterance_idx, segments=segments, key=key)
+        # Read files, utterances and segmentations
+        if self.use_snapshot and snapshot.is_up_to_date(loading_dataset.path, self._snapshot_source_paths(loading_dataset.path)):
+            self._load_snapshot(loading_dataset)
+        else:
+            self._load_text(loading_dataset)
 
         # Read subviews
         for subview_file in glob.glob(os.path.join(loading_dataset.path, 'subview_*.txt')):
             file_name = os.path.basename(subview_file)
             sv_name = file_name[len('subview_'):len(file_name) - len('.txt')]
 
-            sv = dataset.Subview()
+            sv = dataset.Subview(materialized=self.materialized_subviews)
 
             for key, value in textfile.read_separated_lines_with_first_key(subview_file, separator=' ').items():
                 if key == 'filtered_utt_ids':
@@ -107,8 +100,109 @@ class SpychDatasetLoader(base.DatasetLoader):
         feat_path = os.path.join(loading_dataset.path, FEAT_CONTAINER_FILE_NAME)
 
         if os.path.isfile(feat_path):
-            for container_name, container_path in textfile.read_key_value_lines(feat_path, separator=' ').items():
-                loading_dataset.create_feature_container(container_name, container_path)
+            for container_name, value in textfile.read_key_value_lines(feat_path, separator=' ').items():
+                container_path, storage_options = _parse_container_record(value)
+                loading_dataset.create_feature_container(container_name, container_path, **storage_options)
+
+    def _load_text(self, loading_dataset):
+        # Read files
+        file_path = os.path.join(loading_dataset.path, FILES_FILE_NAME)
+        files = textfile.read_key_value_lines(file_path, separator=' ')
+        loading_dataset.add_files([os.path.join(loading_dataset.path, x) for x in files.values()], file_ids=files.keys())
+
+        # Read utt2spk
+        utt2spk_path = os.path.join(loading_dataset.path, UTT2SPK_FILE_NAME)
+        utt2spk = {}
+
+        if os.path.isfile(utt2spk_path):
+            utt2spk = textfile.read_key_value_lines(utt2spk_path, separator=' ')
+
+        # Read utterances
+        utterance_path = os.path.join(loading_dataset.path, UTTERANCE_FILE_NAME)
+        utterances = textfile.read_separated_lines_with_first_key(utterance_path, separator=' ', max_columns=4)
+        utterance_ids = list(utterances.keys())
+
+        loading_dataset.add_utterances([utterances[x][0] for x in utterance_ids],
+                                       utterance_ids=utterance_ids,
+                                       speaker_ids=[utt2spk.get(x) for x in utterance_ids],
+                                       starts=[utterances[x][1] if len(utterances[x]) > 1 else None for x in utterance_ids],
+                                       ends=[utterances[x][2] if len(utterances[x]) > 2 else None for x in utterance_ids])
+
+        # Read segmentations
+        if self.lazy_segmentations:
+            self._add_lazy_segmentations(loading_dataset)
+            return
+
+        for seg_file in glob.glob(os.path.join(loading_dataset.path, 'segmentation_*.txt')):
+            file_name = os.path.basename(seg_file)
+            key = file_name[len('segmentation_'):len(file_name) - len('.txt')]
+
+            utterance_segments = collections.defaultdict(list)
+
+            for record in textfile.read_separated_lines_generator(seg_file, separator=' ', max_columns=4):
+                utterance_segments[record[0]].append(data.Token(record[3], float(record[1]), float(record[2])))
+
+            loading_dataset.add_segmentations(utterance_segments.keys(), utterance_segments.values(), key=key)
+
+    def _load_snapshot(self, loading_dataset):
+        snapshot_data = snapshot.read(loading_dataset.path)
+
+        file_ids, file_paths = snapshot_data.files()
+        loading_dataset.add_files([os.path.join(loading_dataset.path, x) for x in file_paths], file_ids=file_ids)
+
+        utterance_ids, file_ids, speaker_ids, starts, ends = snapshot_data.utterances()
+        loading_dataset.add_utterances(file_ids, utterance_ids=utterance_ids, speaker_ids=speaker_ids, starts=starts, ends=ends)
+
+        if self.lazy_segmentations:
+            self._add_lazy_segmentations(loading_dataset)
+            return
+
+        for key in snapshot_data.segmentation_keys:
+            utterance_segments = collections.defaultdict(list)
+
+            for utterance_idx, start, end, value in zip(*snapshot_data.segmentation_tokens(key)):
+                utterance_segments[utterance_idx].append(data.Token(value, start, end))
+
+            loading_dataset.add_segmentations(utterance_segments.keys(), utterance_segments.values(), key=key)
+
+    @staticmethod
+    def _add_lazy_segmentations(loading_dataset):
+        for seg_file in glob.glob(os.path.join(loading_dataset.path, 'segmentation_*.txt')):
+            file_name = os.path.basename(seg_file)
+            key = file_name[len('segmentation_'):len(file_name) - len('.txt')]
+
+            loading_dataset.segmentations.add_source(lazy.SegmentationFileIndex(seg_file, key))
+
+    @staticmethod
+    def _snapshot_source_paths(path):
+        """ Return the paths of all text files, that are represented by the snapshot. """
+        source_paths = [os.path.join(path, x) for x in [FILES_FILE_NAME, UTTERANCE_FILE_NAME, UTT2SPK_FILE_NAME]]
+        source_paths.extend(sorted(glob.glob(os.path.join(path, '{}_*.txt'.format(SEG_FILE_PREFIX)))))
+
+        return source_paths
+
+    def write_snapshot(self, snapshot_dataset, path=None, files=None):
+        """
+        Write a binary snapshot of files, utterances and segmentations of the dataset next to its text files.
+        The snapshot is used when loading, as long as the text files are not modified.
+
+        :param snapshot_dataset: Dataset to write the snapshot for. Its text files have to be saved already.
+        :param path: Folder of the saved dataset. If None, the path of the dataset is used.
+        :param files: Dictionary file-id/path relative to the dataset folder. If None, computed from the dataset.
+        """
+        if path is None:
+            path = snapshot_dataset.path
+
+        if files is None:
+            files = {file.idx: os.path.relpath(file.path, path) for file in snapshot_dataset.files.values()}
+
+        segmentations_by_key = collections.defaultdict(dict)
+
+        for utterance_idx, utt_segmentations in snapshot_dataset.segmentations.items():
+            for key, segmentation in utt_segmentations.items():
+                segmentations_by_key[key][utterance_idx] = segmentation
+
+        snapshot.write(path, files, snapshot_dataset.utterances.values(), segmentations_by_key, self._snapshot_source_paths(path))
 
     def _save(self, saving_dataset, path, files, copy_files=False):
         # Write files
@@ -128,7 +222,7 @@ class SpychDatasetLoader(base.DatasetLoader):
 
         # Write utt2spk
         utt2spk_path = os.path.join(path, UTT2SPK_FILE_NAME)
-        utt2spk_records = {utterance.idx: utterance.speaker_idx for utterance in saving_dataset.utterances.values()}
+        utt2spk_records = {utterance.idx: utterance.speaker_idx for utterance in saving_dataset.utterances.values() if utterance.speaker_idx is not None}
         textfile.write_separated_lines(utt2spk_path, utt2spk_records, separator=' ', sort_by_column=0)
 
         # Write segmentations
@@ -190,4 +284,24 @@ class SpychDatasetLoader(base.DatasetLoader):
             else:
                 feat_records[name] = os.path.relpath(feature_container.path, path)
 
+            if hasattr(feature_container, 'storage_options'):
+                options = feature_container.storage_options()
+                feat_records[name] = [feat_records[name]] + ['{}={}'.format(key, options[key]) for key in sorted(options.keys())]
+
         textfile.write_separated_lines(feat_path, feat_records, separator=' ')
+
+        # Write snapshot
+        if self.use_snapshot:
+            self.write_snapshot(saving_dataset, path=path, files=files)
+
+
+def _parse_container_record(value):
+    """ Return tuple (path, storage-options) from the value of a line in features.txt (path followed by key=value options). """
+    parts = value.split(' ')
+    options = {}
+
+    while len(parts) > 1 and '=' in parts[-1]:
+        key, option_value = parts.pop().split('=', 1)
+        options[key] = option_value
+
+    return ' '.join(parts), data.FeatureContainer.parse_storage_options(options)
@@ -63,8 +63,7 @@ class TudaDatasetLoader(base.DatasetLoader):
                             genders[speakerid] = data.Gender.FEMALE
 
         # add wavs
-        for wav_id, wav_path in wavs.items():
-            loading_dataset.add_file(wav_path, file_idx=wav_id, copy_file=False)
+        loading_dataset.add_files(wavs.values(), file_ids=wavs.keys())
 
         # add speakers
         for speaker_id in set(speakers.values()):
@@ -76,16 +75,11 @@ class TudaDatasetLoader(base.DatasetLoader):
             loading_dataset.add_speaker(speaker_idx=speaker_id, gender=gender)
 
         # add utterances
-        for utt_id, wav_id in segments.items():
-            speaker_id = speakers[utt_id]
-            loading_dataset.add_utterance(wav_id, utterance_idx=utt_id, speaker_idx=speaker_id)
+        loading_dataset.add_utterances(segments.values(), utterance_ids=segments.keys(), speaker_ids=[speakers[x] for x in segments.keys()])
 
         # add transcriptions
-        for utt_id, transcription in transcriptions.items():
-            r = loading_dataset.add_segmentation(utt_id, segments=transcription, key=data.Segmentation.TEXT_SEGMENTATION)
-
-        for utt_id, transcription in transcriptions_raw.items():
-            loading_dataset.add_segmentation(utt_id, segments=transcription, key=data.Segmentation.RAW_TEXT_SEGMENTATION)
+        loading_dataset.add_segmentations(transcriptions.keys(), transcriptions.values(), key=data.Segmentation.TEXT_SEGMENTATION)
+        loading_dataset.add_segmentations(transcriptions_raw.keys(), transcriptions_raw.values(), key=data.Segmentation.RAW_TEXT_SEGMENTATION)
 
         part_subview = dataset.Subview(filtered_utterances=set(segments.keys()))
         loading_dataset.add_subview(part, part_subview)
@@ -54,14 +54,16 @@ class BatchGenerator(object):
 
             for ds in self.datasets:
                 fc = ds.features[feature_name]
-                fc.open()
+                fc.open(mode='r')
                 feature_containers.append(fc)
 
-            for utt_id in batch_utt_ids:
+            per_container_features = [fc.get_many(batch_utt_ids) for fc in feature_containers]
+
+            for index, utt_id in enumerate(batch_utt_ids):
                 if feature_pipeline is not None:
-                    per_set_features = [feature_pipeline.process(x.get(utt_id)) for x in feature_containers]
+                    per_set_features = [feature_pipeline.process(x[index], utterance_idx=utt_id) for x in per_container_features]
                 else:
-                    per_set_features = [x.get(utt_id) for x in feature_containers]
+                    per_set_features = [x[index] for x in per_container_features]
 
                 per_set_features.insert(0, utt_id)
                 batch_features.append(per_set_features)
@@ -91,13 +93,17 @@ class BatchGenerator(object):
                 else:
                     in_feature = feature_name
 
-                with ds.features[in_feature] as fc:
-                    if feature_pipeline is not None:
-                        per_utt_features = [feature_pipeline.process(fc.get(x)) for x in batch_utt_ids]
-                    else:
-                        per_utt_features = [fc.get(x) for x in batch_utt_ids]
+                fc = ds.features[in_feature]
+                fc.open(mode='r')
+
+                if feature_pipeline is not None:
+                    per_utt_features = [feature_pipeline.process(x, utterance_idx=utt_id) for utt_id, x in zip(batch_utt_ids, fc.get_many(batch_utt_ids))]
+                    ds_features = np.concatenate(per_utt_features)
+                else:
+                    ds_features, __ = fc.get_many(batch_utt_ids, packed=True)
+
+                fc.close()
 
-                ds_features = np.concatenate(per_utt_features)
                 batch.append(ds_features)
 
             yield batch
@@ -126,7 +132,7 @@ class BatchGenerator(object):
 
             for ds in self.datasets:
                 fc = ds.features[feature_name]
-                fc.open()
+                fc.open(mode='r')
                 feature_containers.append(fc)
 
             for utt_id in batch_utt_ids:
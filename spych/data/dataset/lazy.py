@@ -0,0 +1,217 @@
+import collections
+import collections.abc
+
+from spych import data
+
+
+class SegmentationFileIndex(object):
+    """
+    Byte-offset index over a segmentation file in the spych format (``<utterance-id> <start> <end> <token-value>`` per line).
+    The index is built on first use with a single pass over the file (without parsing tokens),
+    afterwards the tokens of a single utterance are read by seeking to its lines.
+
+    :param path: Path of the segmentation file.
+    :param key: Key of the segmentations in the file.
+    """
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self._ranges = None
+
+    @property
+    def ranges(self):
+        """ Return a dictionary utterance-id/list of (start-offset, end-offset) byte ranges. """
+        if self._ranges is None:
+            self._ranges = self._build()
+
+        return self._ranges
+
+    def _build(self):
+        ranges = collections.defaultdict(list)
+        offset = 0
+
+        with open(self.path, 'rb') as f:
+            for line in f:
+                utterance_idx = line.split(maxsplit=1)[0].decode('utf-8', errors='ignore') if line.strip() else None
+
+                if utterance_idx is not None:
+                    utt_ranges = ranges[utterance_idx]
+
+                    if len(utt_ranges) > 0 and utt_ranges[-1][1] == offset:
+                        utt_ranges[-1][1] = offset + len(line)
+                    else:
+                        utt_ranges.append([offset, offset + len(line)])
+
+                offset += len(line)
+
+        return dict(ranges)
+
+    def __contains__(self, utterance_idx):
+        return utterance_idx in self.ranges
+
+    def utterance_ids(self):
+        """ Return all utterance-ids with a segmentation in the file. """
+        return self.ranges.keys()
+
+    def read(self, utterance_idx):
+        """ Read and return the segmentation of the given utterance. """
+        segmentation = data.Segmentation(utterance_idx=utterance_idx, key=self.key)
+
+        with open(self.path, 'rb') as f:
+            for start, end in self.ranges[utterance_idx]:
+                f.seek(start)
+
+                for line in f.read(end - start).decode('utf-8', errors='ignore').splitlines():
+                    stripped_line = line.strip()
+
+                    if stripped_line != '':
+                        record = [field.strip() for field in stripped_line.split(sep=' ', maxsplit=3)]
+                        segmentation.segments.append(data.Token(record[3], float(record[1]), float(record[2])))
+
+        return segmentation
+
+
+class LazySegmentations(collections.abc.MutableMapping):
+    """
+    Segmentation storage of a dataset (utterance-id -> {key -> segmentation}), which reads segmentations from
+    registered sources (e.g. :class:`SegmentationFileIndex`) only when they are accessed.
+    A source is indexed when one of its segmentations is accessed the first time,
+    single segmentations are parsed on access and cached afterwards.
+
+    Like a ``defaultdict(dict)``, accessing an unknown utterance returns an (empty) mapping, which can be used to add segmentations.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        self._loaded = collections.defaultdict(dict)
+        self._hidden = set()
+
+    def add_source(self, source):
+        """ Register a source for the segmentations with the key ``source.key``. """
+        self._sources[source.key] = source
+
+    def segmentation_keys(self):
+        """ Return all segmentation keys, without loading any segmentations. """
+        keys = set(self._sources.keys())
+
+        for utt_segmentations in self._loaded.values():
+            keys.update(utt_segmentations.keys())
+
+        return keys
+
+    def _keys_of(self, utterance_idx):
+        """ Return the keys of all segmentations of the given utterance (checks every source). """
+        keys = list(self._loaded.get(utterance_idx, {}).keys())
+
+        for key in self._sources.keys():
+            if key not in keys and self._in_source(utterance_idx, key):
+                keys.append(key)
+
+        return keys
+
+    def _in_source(self, utterance_idx, key):
+        """ Return True if the source with the given key has a (not removed) segmentation of the utterance, without reading it. """
+        source = self._sources.get(key)
+        return source is not None and (utterance_idx, key) not in self._hidden and utterance_idx in source
+
+    def _has(self, utterance_idx, key):
+        """ Return True if there is a segmentation with the given key for the utterance. """
+        return key in self._loaded.get(utterance_idx, {}) or self._in_source(utterance_idx, key)
+
+    def _has_any(self, utterance_idx):
+        """ Return True if there is any segmentation for the utterance (stops at the first source that has one). """
+        if len(self._loaded.get(utterance_idx, {})) > 0:
+            return True
+
+        return any(self._in_source(utterance_idx, key) for key in self._sources.keys())
+
+    def _get(self, utterance_idx, key):
+        utt_segmentations = self._loaded.get(utterance_idx, {})
+
+        if key in utt_segmentations:
+            return utt_segmentations[key]
+
+        if not self._in_source(utterance_idx, key):
+            raise KeyError(key)
+
+        segmentation = self._sources[key].read(utterance_idx)
+        self._loaded[utterance_idx][key] = segmentation
+
+        return segmentation
+
+    def _remove(self, utterance_idx, key):
+        if not self._has(utterance_idx, key):
+            raise KeyError(key)
+
+        self._loaded.get(utterance_idx, {}).pop(key, None)
+
+        if key in self._sources:
+            self._hidden.add((utterance_idx, key))
+
+    def __getitem__(self, utterance_idx):
+        return _UtteranceSegmentations(self, utterance_idx)
+
+    def __setitem__(self, utterance_idx, segmentations):
+        segmentations = dict(segmentations)
+
+        if utterance_idx in self:
+            del self[utterance_idx]
+
+        self._loaded[utterance_idx].update(segmentations)
+
+    def __delitem__(self, utterance_idx):
+        keys = self._keys_of(utterance_idx)
+
+        if len(keys) == 0:
+            raise KeyError(utterance_idx)
+
+        for key in keys:
+            self._remove(utterance_idx, key)
+
+    def __contains__(self, utterance_idx):
+        return self._has_any(utterance_idx)
+
+    def __iter__(self):
+        # The set of all utterance ids is only needed when iterating (all sources are indexed)
+        utterance_ids = dict.fromkeys(utt_idx for utt_idx, segmentations in self._loaded.items() if len(segmentations) > 0)
+
+        for source in self._sources.values():
+            utterance_ids.update(dict.fromkeys(source.utterance_ids()))
+
+        return (utterance_idx for utterance_idx in utterance_ids.keys() if self._has_any(utterance_idx))
+
+    def __len__(self):
+        return sum(1 for __ in self)
+
+    def get(self, utterance_idx, default=None):
+        if utterance_idx in self:
+            return self[utterance_idx]
+
+        return default
+
+
+class _UtteranceSegmentations(collections.abc.MutableMapping):
+    """ Mapping key/segmentation for a single utterance of a :class:`LazySegmentations`. """
+
+    def __init__(self, store, utterance_idx):
+        self._store = store
+        self._utterance_idx = utterance_idx
+
+    def __getitem__(self, key):
+        return self._store._get(self._utterance_idx, key)
+
+    def __setitem__(self, key, segmentation):
+        self._store._loaded[self._utterance_idx][key] = segmentation
+
+    def __delitem__(self, key):
+        self._store._remove(self._utterance_idx, key)
+
+    def __iter__(self):
+        return iter(self._store._keys_of(self._utterance_idx))
+
+    def __len__(self):
+        return len(self._store._keys_of(self._utterance_idx))
+
+    def __contains__(self, key):
+        return self._store._has(self._utterance_idx, key)
@@ -10,7 +10,7 @@ class Splitter(object):
     def __init__(self, dataset):
         self.dataset = dataset
 
-    def split(self, subset_config={}, split_by_speakers=False, speaker_divided=False):
+    def split(self, subset_config={}, split_by_speakers=False, speaker_divided=False, materialized=False):
         """
         Splits the dataset according to the given proportions. Proportions should sum to 1.0.
 
@@ -23,6 +23,8 @@ class Splitter(object):
         :param subset_config: Configuration for splitting
         :param split_by_speakers: If True splits proportionally by speakers otherwise by utterances.
         :param speaker_divided: Only when split_by_speakers=False, makes sure one speaker only occurs in one subset.
+        :param materialized: If True the subviews cache the filtered utterances (see :class:`spych.data.dataset.Subview`).
+                             The cached mappings are read-only and changes to utterance objects require :meth:`invalidate`.
         :return: dict name/subview
         """
 
@@ -37,7 +39,7 @@ class Splitter(object):
                 utterance_splits = self._get_utterances_randomly_splitted(subset_config)
 
         for name, utterance_ids in utterance_splits.items():
-            subsets[name] = dataset.Subview(filtered_utterances=set(utterance_ids), dataset=self.dataset)
+            subsets[name] = dataset.Subview(filtered_utterances=set(utterance_ids), dataset=self.dataset, materialized=materialized)
 
         return subsets
 
@@ -1,5 +1,5 @@
 import re
-
+import types
 
 from spych.data.dataset import dataset
 
@@ -7,10 +7,21 @@ from spych.data.dataset import dataset
 class Subview(dataset.DatasetBase):
     """
     A subview is a filtered view on a dataset. For example it only uses a subset of utterance-id's.
+
+    By default the filter is evaluated on every access. A materialized subview evaluates the filter once and caches the filtered
+    utterances, files, speakers and segmentations, which are returned as read-only mappings. The cache is invalidated when the
+    filter criteria are replaced or when the dataset is modified through its methods (see :attr:`spych.data.dataset.Dataset.modification_count`).
+    After modifying the filter sets in place or changing utterance objects directly, :meth:`invalidate` has to be called.
+
+    :param filtered_utterances: Utterance ids to include (if empty all).
+    :param filtered_speakers: Speaker ids to include (if empty all).
+    :param dataset: The dataset the subview is on.
+    :param materialized: If True the filtered data is cached.
     """
 
-    def __init__(self, filtered_utterances=set(), filtered_speakers=set(), dataset=None):
+    def __init__(self, filtered_utterances=set(), filtered_speakers=set(), dataset=None, materialized=False):
         self.dataset = dataset
+        self.materialized = materialized
 
         self.filtered_utterance_idxs = set(filtered_utterances)
         self.filtered_speaker_idxs = set(filtered_speakers)
@@ -21,59 +32,174 @@ class Subview(dataset.DatasetBase):
         self.utterance_idx_not_patterns = set()
         self.speaker_idx_not_patterns = set()
 
+    def __setattr__(self, name, value):
+        super(Subview, self).__setattr__(name, value)
+
+        if name in ('dataset', 'materialized', 'filtered_utterance_idxs', 'filtered_speaker_idxs', 'utterance_idx_patterns',
+                    'speaker_idx_patterns', 'utterance_idx_not_patterns', 'speaker_idx_not_patterns'):
+            self.invalidate()
+
+    def __getstate__(self):
+        # The cache is rebuilt on access
+        state = dict(self.__dict__)
+        state['_compiled_patterns'] = None
+        state['_cache'] = None
+        state['_cache_modification_count'] = None
+        return state
+
+    def invalidate(self):
+        """ Drop the compiled patterns and the cached filter results. """
+        self.__dict__['_compiled_patterns'] = None
+        self.__dict__['_cache'] = None
+        self.__dict__['_cache_modification_count'] = None
+
     @property
     def name(self):
         return 'subview of {}'.format(self.dataset.name)
 
     @property
     def files(self):
-        return {utterance.file_idx: self.dataset.files[utterance.file_idx] for utterance in self.utterances.values()}
+        if self.materialized:
+            return self._cached('files', self._filter_files)
+
+        return self._filter_files()
 
     @property
     def utterances(self):
-        filtered_utterances = {}
+        if self.materialized:
+            return self._cached('utterances', self._filter_utterances)
 
-        for utterance_idx, utterance in self.dataset.utterances.items():
-            if self.does_utterance_match(utterance):
-                filtered_utterances[utterance_idx] = utterance
-
-        return filtered_utterances
+        return self._filter_utterances()
 
     @property
     def speakers(self):
-        return {utterance.speaker_idx: self.dataset.speakers[utterance.speaker_idx] for utterance in self.utterances.values()}
+        if self.materialized:
+            return self._cached('speakers', self._filter_speakers)
+
+        return self._filter_speakers()
 
     @property
     def segmentations(self):
-        return {utterance.idx: dict(self.dataset.segmentations[utterance.idx]) for utterance in self.utterances.values()}
+        if self.materialized:
+            return self._cached('segmentations', self._filter_segmentations)
+
+        return self._filter_segmentations()
 
     @property
     def features(self):
         return self.dataset.features
 
+    @property
+    def sample_cache(self):
+        return self.dataset.sample_cache
+
+    def _cached(self, name, compute):
+        modification_count = getattr(self.dataset, 'modification_count', None)
+
+        if self._cache is None or modification_count is None or modification_count != self._cache_modification_count:
+            self.__dict__['_cache'] = {}
+            self.__dict__['_cache_modification_count'] = modification_count
+
+        if name not in self._cache:
+            self._cache[name] = types.MappingProxyType(compute())
+
+        return self._cache[name]
+
+    def _filter_files(self):
+        return {utterance.file_idx: self.dataset.files[utterance.file_idx] for utterance in self.utterances.values()}
+
+    def _filter_utterances(self):
+        filtered_utterances = {}
+        parent_utterances = self.dataset.utterances
+        patterns = self._patterns()
+
+        for utterance_idx in self._candidate_utterance_ids():
+            utterance = parent_utterances[utterance_idx]
+
+            if self._matches(utterance, patterns):
+                filtered_utterances[utterance_idx] = utterance
+
+        return filtered_utterances
+
+    def _filter_speakers(self):
+        return {utterance.speaker_idx: self.dataset.speakers[utterance.speaker_idx] for utterance in self.utterances.values()}
+
+    def _filter_segmentations(self):
+        segmentations = {utterance.idx: dict(self.dataset.segmentations[utterance.idx]) for utterance in self.utterances.values()}
+
+        if self.materialized:
+            return {utterance_idx: types.MappingProxyType(utt_segmentations) for utterance_idx, utt_segmentations in segmentations.items()}
+
+        return segmentations
+
+    def _candidate_utterance_ids(self):
+        """
+        Return the ids of the parent utterances that can match (in the order of the parent).
+        A materialized subview filtered by utterance ids or speakers only considers the filtered utterances
+        (or the ones of the speakers from the speaker index), instead of scanning all utterances of the dataset.
+        Otherwise all utterances of the parent are scanned.
+        """
+        if not self.materialized or not isinstance(self.dataset, dataset.Dataset):
+            return self.dataset.utterances.keys()
+
+        if len(self.filtered_utterance_idxs) > 0:
+            parent_utterances = self.dataset.utterances
+            candidates = [utt_idx for utt_idx in self.filtered_utterance_idxs if utt_idx in parent_utterances]
+        elif len(self.filtered_speaker_idxs) > 0:
+            candidates = [utt_idx for speaker_idx in self.filtered_speaker_idxs
+                          for utt_idx in self.dataset._utterance_ids_of_speaker(speaker_idx)]
+        else:
+            return self.dataset.utterances.keys()
+
+        return self.dataset._in_utterance_order(candidates)
+
+    def _patterns(self):
+        """
+        Return the compiled patterns as tuple (utt-patterns, spk-patterns, utt-not-patterns, spk-not-patterns).
+        They are only kept for materialized subviews, otherwise the pattern sets may be changed in place at any time.
+        """
+        compiled_patterns = self._compiled_patterns
+
+        if compiled_patterns is None:
+            compiled_patterns = tuple([re.compile(pattern) for pattern in patterns] for patterns in (
+                self.utterance_idx_patterns,
+                self.speaker_idx_patterns,
+                self.utterance_idx_not_patterns,
+                self.speaker_idx_not_patterns
+            ))
+
+            if self.materialized:
+                self.__dict__['_compiled_patterns'] = compiled_patterns
+
+        return compiled_patterns
+
     def does_utterance_match(self, utterance):
         """ Return True if the given utterance matches all filter criteria. Otherwise return False. """
+        return self._matches(utterance, self._patterns())
 
+    def _matches(self, utterance, patterns):
         if len(self.filtered_utterance_idxs) > 0 and utterance.idx not in self.filtered_utterance_idxs:
             return False
 
         if len(self.filtered_speaker_idxs) > 0 and utterance.speaker_idx not in self.filtered_speaker_idxs:
             return False
 
-        for utt_id_pattern in self.utterance_idx_patterns:
-            if not re.fullmatch(utt_id_pattern, utterance.idx):
+        utt_id_patterns, spk_id_patterns, utt_id_not_patterns, spk_id_not_patterns = patterns
+
+        for utt_id_pattern in utt_id_patterns:
+            if not utt_id_pattern.fullmatch(utterance.idx):
                 return False
 
-        for spk_id_pattern in self.speaker_idx_patterns:
-            if not re.fullmatch(spk_id_pattern, utterance.speaker_idx):
+        for spk_id_pattern in spk_id_patterns:
+            if not spk_id_pattern.fullmatch(utterance.speaker_idx):
                 return False
 
-        for utt_id_pattern in self.utterance_idx_not_patterns:
-            if re.fullmatch(utt_id_pattern, utterance.idx):
+        for utt_id_pattern in utt_id_not_patterns:
+            if utt_id_pattern.fullmatch(utterance.idx):
                 return False
 
-        for spk_id_pattern in self.speaker_idx_not_patterns:
-            if re.fullmatch(spk_id_pattern, utterance.speaker_idx):
+        for spk_id_pattern in spk_id_not_patterns:
+            if spk_id_pattern.fullmatch(utterance.speaker_idx):
                 return False
 
         return True
@@ -1,3 +1,35 @@
+import os
+
 from .container import FeatureContainer
+from .flat import FlatFeatureContainer
+from .pool import HandlePool
+from .statistics import FeatureStatistics
+from .cmvn import CMVNStatistics
+
+BACKEND_HDF5 = 'hdf5'
+BACKEND_FLAT = 'flat'
+
+
+def create_container(path, backend=None, **storage_options):
+    """
+    Return a feature container for the given path.
+
+    :param path: Path of the container.
+    :param backend: 'hdf5' for a :class:`FeatureContainer`, 'flat' for a :class:`FlatFeatureContainer`.
+                    If None, it is detected from the path (a flat container is a folder), for new containers HDF5 is used.
+    :param storage_options: Storage options of a HDF5 container (compression, compression_level, shuffle, chunk_frames, dtype).
+    """
+    if backend is None:
+        backend = BACKEND_FLAT if os.path.isdir(path) else BACKEND_HDF5
+
+    if backend == BACKEND_HDF5:
+        return FeatureContainer(path, **storage_options)
+    elif backend == BACKEND_FLAT:
+        if len(storage_options) > 0:
+            raise ValueError('Flat feature containers have no storage options (they store uncompressed float32).')
+
+        # Create the folder, so the backend is detected when the dataset is loaded again
+        os.makedirs(path, exist_ok=True)
+        return FlatFeatureContainer(path)
 
-from .pipeline.base import Pipeline
+    raise ValueError('Unknown feature container backend {}.'.format(backend))
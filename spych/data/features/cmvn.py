@@ -0,0 +1,186 @@
+import hashlib
+import os
+
+import numpy as np
+
+from . import statistics
+
+MODE_GLOBAL = 'global'
+MODE_SPEAKER = 'speaker'
+MODE_UTTERANCE = 'utterance'
+
+MODES = (MODE_GLOBAL, MODE_SPEAKER, MODE_UTTERANCE)
+
+
+class CMVNStatistics(object):
+    """
+    Means and variances for cepstral mean and variance normalization (see :class:`spych.data.features.pipeline.CMVNStage`).
+
+    The statistics are stored as one row per key (one row in global mode, one per speaker or per utterance),
+    every utterance is mapped to the row of its key.
+
+    :param mode: 'global', 'speaker' or 'utterance'.
+    :param keys: List of the keys (e.g. the speaker ids).
+    :param means: Matrix (num-keys x feature-size) with the mean of every key.
+    :param variances: Matrix (num-keys x feature-size) with the variance of every key.
+    :param counts: Number of frames of every key.
+    :param utterance_keys: Dictionary utterance-id/key of the utterances the statistics were computed from.
+                           In global mode statistics are returned for any utterance.
+    """
+
+    def __init__(self, mode, keys, means, variances, counts, utterance_keys=None):
+        if mode not in MODES:
+            raise ValueError('Unknown CMVN mode {} (supported: {}).'.format(mode, ', '.join(MODES)))
+
+        self.mode = mode
+
+        self._keys = list(keys)
+        self._means = np.asarray(means, dtype=np.float64)
+        self._variances = np.asarray(variances, dtype=np.float64)
+        self._counts = np.asarray(counts, dtype=np.int64)
+
+        key_rows = {key: row for row, key in enumerate(self._keys)}
+        self._utterance_rows = {utterance_idx: key_rows[key] for utterance_idx, key in (utterance_keys or {}).items() if key in key_rows}
+
+        # Identifies the values in the fingerprint of a pipeline with the normalization
+        digest = hashlib.sha1(self._means.tobytes())
+        digest.update(self._variances.tobytes())
+        self.digest = digest.hexdigest()
+
+    @property
+    def keys(self):
+        return list(self._keys)
+
+    @property
+    def means(self):
+        return self._means
+
+    @property
+    def variances(self):
+        return self._variances
+
+    @property
+    def counts(self):
+        return self._counts
+
+    @property
+    def feature_size(self):
+        return self._means.shape[1]
+
+    def utterance_keys(self):
+        """ Return a dictionary utterance-id/key of the utterances the statistics were computed from. """
+        return {utterance_idx: self._keys[row] for utterance_idx, row in self._utterance_rows.items()}
+
+    def rows(self, utterance_ids):
+        """
+        Return the indices of the rows with the statistics of the given utterances.
+
+        :raises ValueError: If there are no statistics for one of the utterances.
+        """
+        if self.mode == MODE_GLOBAL:
+            return np.zeros(len(utterance_ids), dtype=np.int64)
+
+        if utterance_ids is None:
+            raise ValueError('The utterance ids are needed for {} CMVN.'.format(self.mode))
+
+        try:
+            return np.array([self._utterance_rows[utterance_idx] for utterance_idx in utterance_ids], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError('No CMVN statistics for utterance {}.'.format(e.args[0]))
+
+    def save(self, path):
+        """ Save the statistics to the given path (numpy .npz file). """
+        utterance_ids = sorted(self._utterance_rows.keys())
+
+        with open(path, 'wb') as f:
+            np.savez(f,
+                     mode=np.array(self.mode),
+                     keys=np.array(self._keys, dtype=np.str_),
+                     means=self._means,
+                     variances=self._variances,
+                     counts=self._counts,
+                     utterance_ids=np.array(utterance_ids, dtype=np.str_),
+                     utterance_rows=np.array([self._utterance_rows[utterance_idx] for utterance_idx in utterance_ids], dtype=np.int64))
+
+    @classmethod
+    def load(cls, path):
+        """ Load statistics saved with :meth:`save`. """
+        with np.load(path) as data:
+            keys = data['keys'].tolist()
+            utterance_keys = {utterance_idx: keys[row] for utterance_idx, row in zip(data['utterance_ids'].tolist(), data['utterance_rows'])}
+
+            return cls(str(data['mode']), keys, data['means'], data['variances'], data['counts'], utterance_keys=utterance_keys)
+
+
+def compute_cmvn_statistics(feature_container, mode=MODE_GLOBAL, utterance_keys=None, num_workers=1):
+    """
+    Compute the CMVN statistics of the features in the container in one pass (see :func:`statistics.compute_group_statistics`).
+
+    :param feature_container: The feature container.
+    :param mode: 'global', 'speaker' or 'utterance'.
+    :param utterance_keys: Dictionary utterance-id/key, which defines the utterances to use and the key they belong to
+                           (e.g. the speaker id). By default all utterances of the container are used.
+                           In global and utterance mode only the utterance ids are used.
+    :param num_workers: Number of processes to read the features with.
+    :return: A :class:`CMVNStatistics`.
+    """
+    if mode not in MODES:
+        raise ValueError('Unknown CMVN mode {} (supported: {}).'.format(mode, ', '.join(MODES)))
+
+    if utterance_keys is None:
+        if mode == MODE_SPEAKER:
+            raise ValueError('The speakers of the utterances are needed for speaker CMVN.')
+
+        feature_container.open(mode='r')
+
+        try:
+            utterance_keys = {utterance_idx: utterance_idx for utterance_idx in feature_container.keys()}
+        finally:
+            feature_container.close()
+
+    if mode == MODE_GLOBAL:
+        utterance_groups = {utterance_idx: None for utterance_idx in utterance_keys.keys()}
+    elif mode == MODE_UTTERANCE:
+        utterance_groups = {utterance_idx: utterance_idx for utterance_idx in utterance_keys.keys()}
+    else:
+        utterance_groups = utterance_keys
+
+    groups = statistics.compute_group_statistics(feature_container, utterance_groups, num_workers=num_workers)
+
+    if len(groups) == 0:
+        raise ValueError('There are no features to compute CMVN statistics from.')
+
+    keys = sorted(groups.keys(), key=str)
+
+    return CMVNStatistics(mode, [key if key is not None else MODE_GLOBAL for key in keys],
+                          means=[groups[key].mean for key in keys],
+                          variances=[groups[key].var for key in keys],
+                          counts=[groups[key].count for key in keys],
+                          utterance_keys={utterance_idx: group if group is not None else MODE_GLOBAL
+                                          for utterance_idx, group in utterance_groups.items()})
+
+
+def statistics_path(feature_container_path, mode):
+    """ Return the path of the file next to the container at the given path, where its CMVN statistics of the given mode are stored. """
+    return '{}.cmvn-{}.npz'.format(os.path.normpath(feature_container_path), mode)
+
+
+def load_cached_statistics(feature_container_path, mode):
+    """
+    Return the stored CMVN statistics of the given mode of the container at the given path,
+    if they were computed after the last change of the container. Otherwise None.
+    """
+    path = statistics_path(feature_container_path, mode)
+
+    if not os.path.isfile(path) or os.path.getmtime(path) < _modification_time(feature_container_path):
+        return None
+
+    return CMVNStatistics.load(path)
+
+
+def _modification_time(path):
+    """ Return the last modification time of the file, or of the newest file in the folder (flat containers). """
+    if not os.path.isdir(path):
+        return os.path.getmtime(path) if os.path.exists(path) else 0
+
+    return max([os.path.getmtime(os.path.join(path, name)) for name in os.listdir(path)] + [os.path.getmtime(path)])
@@ -1,25 +1,127 @@
 import h5py
-
 import numpy as np
 
+from . import pool
+from . import statistics
+
+COMPRESSIONS = ('none', 'lzf', 'gzip')
+STORAGE_DTYPES = ('float16', 'float32', 'float64')
+
 
 class FeatureContainer(object):
     """
     This class defines a container for storing features (of a given type) of all utterances.
+
+    The HDF5 file is managed by a :class:`spych.data.features.pool.HandlePool`, so all containers with the same path share one
+    open file, and reading files are kept open after closing the container. :meth:`open` and :meth:`close` are reference counted.
+
+    The storage options define how new features are written. They are persisted with the dataset
+    (see :meth:`storage_options`), features written with other options can still be read.
+
+    :param path: Path of the HDF5 file.
+    :param handle_pool: The pool to use (by default the pool of the process).
+    :param compression: 'lzf' (default), 'gzip' or 'none'.
+    :param compression_level: Level (0-9) for gzip compression.
+    :param shuffle: If True, the bytes of the values are shuffled before compressing (improves the compression of floats).
+    :param chunk_frames: Number of frames per HDF5 chunk. By default h5py chooses the chunks
+                         (for compressed features, uncompressed features are stored contiguous).
+    :param dtype: Type to store the features as (e.g. 'float16' to halve the size), by default the type of the added features.
+                  Features stored as float16 are returned as float32.
     """
 
-    def __init__(self, path):
+    def __init__(self, path, handle_pool=None, compression='lzf', compression_level=None, shuffle=False, chunk_frames=None, dtype=None):
+        if compression not in COMPRESSIONS:
+            raise ValueError('Unknown compression {} (supported: {}).'.format(compression, ', '.join(COMPRESSIONS)))
+
+        if compression_level is not None and compression != 'gzip':
+            raise ValueError('A compression level is only supported for gzip compression.')
+
+        if dtype is not None and dtype not in STORAGE_DTYPES:
+            raise ValueError('Unsupported storage type {} (supported: {}).'.format(dtype, ', '.join(STORAGE_DTYPES)))
+
         self.path = path
-        self.file = None
+        self.handle_pool = handle_pool
+
+        self.compression = compression
+        self.compression_level = compression_level
+        self.shuffle = shuffle
+        self.chunk_frames = chunk_frames
+        self.dtype = dtype
+
+        self._open_count = 0
+        self._mode = None
+
+    def __getstate__(self):
+        # Open files can't be transferred to other processes, the copy is closed
+        state = dict(self.__dict__)
+        state['handle_pool'] = None
+        state['_open_count'] = 0
+        state['_mode'] = None
+        return state
+
+    def storage_options(self):
+        """ Return a dictionary with the storage options, which differ from the defaults. """
+        defaults = {'compression': 'lzf', 'compression_level': None, 'shuffle': False, 'chunk_frames': None, 'dtype': None}
+        return {name: getattr(self, name) for name, default in defaults.items() if getattr(self, name) != default}
+
+    @staticmethod
+    def parse_storage_options(values):
+        """ Return the storage options from a dictionary with string values (as written to text files). """
+        types = {'compression': str, 'compression_level': int, 'shuffle': lambda value: value.lower() in ('true', '1'),
+                 'chunk_frames': int, 'dtype': str}
+        options = {}
+
+        for name, value in values.items():
+            if name not in types:
+                raise ValueError('Unknown storage option {}.'.format(name))
+
+            options[name] = types[name](value)
+
+        return options
+
+    @property
+    def _pool(self):
+        return self.handle_pool if self.handle_pool is not None else pool.default_pool
 
-    def open(self):
-        if self.file is None:
-            self.file = h5py.File(self.path, 'a')
+    @property
+    def file(self):
+        """ Return the h5py file, None if the container is not open. """
+        if self._open_count == 0:
+            return None
+
+        return self._pool.file(self.path)
+
+    def open(self, mode=pool.APPEND):
+        """
+        Open the container. Every call has to be matched by a call to :meth:`close`.
+
+        :param mode: 'a' to read and write (the file is created if it doesn't exist), 'r' to only read,
+                     'swmr' to only read without locking the file (for reading from multiple processes, while no process
+                     writes to the file, see :class:`spych.data.features.pool.HandlePool`).
+        """
+        if mode not in (pool.READ, pool.SWMR, pool.APPEND):
+            raise ValueError('Unknown mode {}.'.format(mode))
+
+        if self._open_count == 0:
+            self._pool.acquire(self.path, mode)
+            self._mode = mode
+        elif mode == pool.APPEND and self._mode != pool.APPEND:
+            # Switch the reference to a writable file
+            self._pool.acquire(self.path, mode)
+            self._pool.release(self.path)
+            self._mode = mode
+
+        self._open_count += 1
 
     def close(self):
-        if self.file is not None:
-            self.file.close()
-            self.file = None
+        if self._open_count == 0:
+            return
+
+        self._open_count -= 1
+
+        if self._open_count == 0:
+            self._pool.release(self.path)
+            self._mode = None
 
     def __enter__(self):
         self.open()
@@ -28,44 +130,183 @@ class FeatureContainer(object):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def add(self, utterance_idx, features):
+    def flush(self):
+        """ Write all added features to disk. """
+        self.file.flush()
+
+    @property
+    def attributes(self):
+        """ Return the attributes (metadata) of the container. """
+        return self.file.attrs
+
+    def add(self, utterance_idx, features, attributes=None):
+        """
+        Add the features of the given utterance. Existing features of the utterance are replaced.
+
+        :param utterance_idx: Id of the utterance.
+        :param features: Feature matrix
+        :param attributes: Optional dictionary of metadata to store with the features.
+        """
         if utterance_idx in self.file:
             del self.file[utterance_idx]
 
-        self.file.create_dataset(utterance_idx, data=features, compression="lzf")
+        if self.dtype is not None:
+            features = np.asarray(features, dtype=self.dtype)
+
+        dataset = self.file.create_dataset(utterance_idx, data=features, **self._dataset_options(np.shape(features)))
+
+        if attributes is not None:
+            dataset.attrs.update(attributes)
+
+    def get_attributes(self, utterance_idx):
+        """ Return the metadata stored with the features of the given utterance (None if there are no features for the utterance). """
+        if utterance_idx in self.file:
+            return dict(self.file[utterance_idx].attrs)
+        else:
+            return None
+
+    def keys(self):
+        """ Return the ids of all utterances with features in the container. """
+        return list(self.file.keys())
 
     def remove(self, utterance_idx):
         if utterance_idx in self.file:
             del self.file[utterance_idx]
 
     def get(self, utterance_idx):
-        if utterance_idx in self.file:
-            return self.file[utterance_idx][()]
+        dataset_id = self._dataset_id(utterance_idx)
+
+        if dataset_id is not None:
+            return _read(dataset_id)
         else:
             return None
 
+    def get_many(self, utterance_ids, packed=False, out=None):
+        """
+        Return the features of multiple utterances. The datasets are read in the order they are stored in the file.
+
+        :param utterance_ids: List of utterance ids.
+        :param packed: If True the features are returned concatenated, as tuple (frames, offsets)
+                       (see :func:`spych.utils.array.pack`). Otherwise a list with the feature matrices (None for
+                       utterances without features) in the order of the given ids is returned.
+        :param out: Array to write the packed frames into (implies packed). It needs at least as many rows as
+                    the utterances have frames, the returned frames are a view on it.
+        :raises ValueError: If packed and there are no features for one of the utterances.
+        """
+        dataset_ids = [self._dataset_id(utterance_idx) for utterance_idx in utterance_ids]
+        read_order = sorted(range(len(dataset_ids)), key=lambda index: _storage_offset(dataset_ids[index]))
+
+        if not packed and out is None:
+            matrices = [None] * len(dataset_ids)
+
+            for index in read_order:
+                if dataset_ids[index] is not None:
+                    matrices[index] = _read(dataset_ids[index])
+
+            return matrices
+
+        for utterance_idx, dataset_id in zip(utterance_ids, dataset_ids):
+            if dataset_id is None:
+                raise ValueError('No features for utterance {} in container {}.'.format(utterance_idx, self.path))
+
+        shapes = [dataset_id.shape for dataset_id in dataset_ids]
+        offsets = np.zeros(len(dataset_ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([shape[0] for shape in shapes])
+
+        if out is None:
+            if len(dataset_ids) == 0:
+                return np.zeros((0, 0), dtype=np.float32), offsets
+
+            dtype = np.result_type(*[_read_dtype(dataset_id.dtype) for dataset_id in dataset_ids])
+            out = np.empty((offsets[-1],) + shapes[0][1:], dtype=dtype)
+        elif out.shape[0] < offsets[-1]:
+            raise ValueError('The output array has {} rows, but {} are needed.'.format(out.shape[0], offsets[-1]))
+
+        for index in read_order:
+            _read_into(dataset_ids[index], out[offsets[index]:offsets[index + 1]])
+
+        return out[:offsets[-1]], offsets
+
+    def _dataset_id(self, utterance_idx):
+        """ Return the low-level h5py id of the dataset with the features of the utterance, None if it doesn't exist. """
+        # Opening the id directly is much faster than creating a h5py Dataset object
+        try:
+            return h5py.h5d.open(self.file.id, utterance_idx.encode('utf-8'))
+        except KeyError:
+            return None
+
     def feature_size(self):
         return list(self.file.items())[0][1].shape[1]
 
-    def get_statistics(self):
-        """ Return basic stats for the features. Return min,max,mean,meanstdev. """
-        per_utt_mins = []
-        per_utt_maxs = []
-        per_utt_means = []
-        per_utt_vars = []
-        per_utt_stdevs = []
-
-        for utt_id, matrix in self.file.items():
-            per_utt_mins.append(np.min(matrix))
-            per_utt_maxs.append(np.max(matrix))
-            per_utt_means.append(np.mean(matrix))
-            per_utt_vars.append(np.var(matrix))
-            per_utt_stdevs.append(np.std(matrix))
-
-        min = np.min(per_utt_mins)
-        max = np.max(per_utt_maxs)
-        mean = np.mean(per_utt_means)
-        var = np.mean(per_utt_vars)
-        stdev = np.mean(per_utt_stdevs)
-
-        return min, max, mean, var, stdev
+    def get_statistics(self, num_workers=1):
+        """ Return basic stats over all values of the features. Return tuple (min, max, mean, var, stdev), None if the container is empty. """
+        return self.compute_statistics(num_workers=num_workers).global_statistics()
+
+    def compute_statistics(self, utterance_ids=None, num_workers=1):
+        """
+        Return the per-dimension statistics of the features as :class:`spych.data.features.statistics.FeatureStatistics`
+        (see :func:`spych.data.features.statistics.compute_statistics`).
+
+        :param utterance_ids: Ids of the utterances to use (by default all).
+        :param num_workers: Number of processes to read the features with.
+        """
+        return statistics.compute_statistics(self, utterance_ids=utterance_ids, num_workers=num_workers)
+
+    def _dataset_options(self, shape):
+        """ Return the arguments for ``create_dataset`` to store features with the given shape. """
+        options = {}
+
+        if self.compression != 'none':
+            options['compression'] = self.compression
+            options['compression_opts'] = self.compression_level
+
+        if self.shuffle:
+            options['shuffle'] = True
+
+        if self.chunk_frames is not None and len(shape) > 0 and shape[0] > 0:
+            options['chunks'] = (min(self.chunk_frames, shape[0]),) + tuple(shape[1:])
+
+        return options
+
+
+def _read_dtype(dtype):
+    """ Return the type features stored with the given type are returned as. """
+    if dtype == np.float16:
+        return np.dtype(np.float32)
+
+    return dtype
+
+
+def _read(dataset_id):
+    out = np.empty(dataset_id.shape, dtype=_read_dtype(dataset_id.dtype))
+    _read_into(dataset_id, out)
+    return out
+
+
+def _read_into(dataset_id, out):
+    """ Read the whole dataset into the given array (HDF5 converts the values to the type of the array). """
+    if out.size == 0:
+        return
+
+    if out.flags.c_contiguous:
+        dataset_id.read(h5py.h5s.ALL, h5py.h5s.ALL, out)
+    else:
+        h5py.Dataset(dataset_id).read_direct(out)
+
+
+def _storage_offset(dataset_id):
+    """ Return the position of the data of the dataset in the file (-1 if there is none, e.g. the dataset is missing or empty). """
+    if dataset_id is None:
+        return -1
+
+    offset = dataset_id.get_offset()
+
+    if offset is None:
+        # Chunked datasets (the position of the first chunk)
+        try:
+            if dataset_id.get_num_chunks() > 0:
+                offset = dataset_id.get_chunk_info(0).byte_offset
+        except (ValueError, RuntimeError):
+            pass
+
+    return offset if offset is not None else -1
@@ -0,0 +1,411 @@
+import collections
+import json
+import os
+
+import numpy as np
+
+from . import statistics
+
+FRAMES_FILE_NAME = 'frames.f32'
+INDEX_FILE_NAME = 'index.txt'
+META_FILE_NAME = 'meta.json'
+
+DTYPE = np.dtype('<f4')
+
+# Maximum number of parsed indexes kept after closing
+CACHE_SIZE = 64
+
+# Path -> (file signature, state) of the parsed index and the memory-mapped frames of recently closed containers
+_cache = collections.OrderedDict()
+
+
+class FlatFeatureContainer(object):
+    """
+    Feature container, which stores the frames of all utterances in one contiguous float32 file.
+    It is an alternative to the HDF5 based :class:`spych.data.features.FeatureContainer` for datasets with very many (short) utterances,
+    with the same interface.
+
+    The container is a folder with:
+
+    * ``frames.f32``: The frames of all utterances (raw little-endian float32, row after row).
+    * ``index.txt``: One line ``utt-id offset num-frames attributes-json`` per added utterance (and ``utt-id -1 0`` per removed one).
+      The file is only appended to, the last line of an utterance is valid.
+    * ``meta.json``: The feature size and the attributes of the container.
+
+    The frames are memory-mapped read-only, so :meth:`get` returns a (read-only) view without copying.
+    Replaced or removed features leave unused frames in the file, :meth:`compact` removes them.
+
+    The parsed index and the mapped frames are kept (for up to ``CACHE_SIZE`` containers) when the container is closed,
+    reopening it only reloads them if one of the files changed.
+
+    :param path: Path of the folder.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        self._open_count = 0
+        self._mode = None
+        self._clear()
+
+    def __getstate__(self):
+        # Open files can't be transferred to other processes, the copy is closed
+        state = dict(self.__dict__)
+        state['_open_count'] = 0
+        state['_mode'] = None
+        state.update(self._empty_state())
+        return state
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _empty_state(self):
+        return {
+            '_index': collections.OrderedDict(),
+            '_entry_attributes': {},
+            '_attributes': {},
+            '_feature_size': None,
+            '_num_rows': 0,
+            '_frames': None,
+            '_frames_file': None,
+            '_index_file': None
+        }
+
+    def _clear(self):
+        self.__dict__.update(self._empty_state())
+
+    def open(self, mode='a'):
+        """
+        Open the container. Every call has to be matched by a call to :meth:`close`.
+
+        :param mode: 'a' to read and write (the folder is created if it doesn't exist), 'r' to only read.
+                     'swmr' is the same as 'r' (the frames are read memory-mapped without locks anyway).
+        """
+        if self._open_count == 0:
+            if not self._load_cached():
+                self._load()
+
+            self._mode = 'r'
+
+        if mode == 'a' and self._mode == 'r':
+            self._open_for_writing()
+            self._mode = 'a'
+
+        self._open_count += 1
+
+    def close(self):
+        if self._open_count == 0:
+            return
+
+        self._open_count -= 1
+
+        if self._open_count == 0:
+            self.flush()
+
+            if self._frames_file is not None:
+                self._frames_file.close()
+                self._index_file.close()
+
+            self._store_cached()
+            self._clear()
+            self._mode = None
+
+    def flush(self):
+        """ Write all added features and the attributes to disk. """
+        if self._frames_file is None:
+            return
+
+        # Frames before the index, so the index never references missing frames
+        self._frames_file.flush()
+        self._index_file.flush()
+
+        meta = {
+            'feature_size': self._feature_size,
+            'attributes': self._attributes
+        }
+
+        meta_path = os.path.join(self.path, META_FILE_NAME)
+        temp_path = '{}.tmp'.format(meta_path)
+
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, default=_json_value)
+
+        os.replace(temp_path, meta_path)
+
+    @property
+    def attributes(self):
+        """ Return the attributes (metadata) of the container. """
+        return self._attributes
+
+    def add(self, utterance_idx, features, attributes=None):
+        """
+        Add the features of the given utterance. Existing features of the utterance are replaced.
+
+        :param utterance_idx: Id of the utterance.
+        :param features: Feature matrix (converted to float32)
+        :param attributes: Optional dictionary of metadata to store with the features.
+        """
+        if self._mode != 'a':
+            raise ValueError('The container {} is not open for writing.'.format(self.path))
+
+        features = np.ascontiguousarray(features, dtype=DTYPE)
+
+        if features.ndim != 2:
+            raise ValueError('The features have to be a matrix (num-frames x feature-size).')
+
+        if self._feature_size is None:
+            self._feature_size = features.shape[1]
+        elif features.shape[1] != self._feature_size:
+            raise ValueError('The container {} has features of size {}, not {}.'.format(self.path, self._feature_size, features.shape[1]))
+
+        offset = self._num_rows
+        self._frames_file.write(features.tobytes())
+        self._num_rows += features.shape[0]
+
+        attributes = dict(attributes) if attributes is not None else {}
+        self._index[utterance_idx] = (offset, features.shape[0])
+        self._entry_attributes[utterance_idx] = attributes
+        self._index_file.write('{} {} {} {}\n'.format(utterance_idx, offset, features.shape[0], json.dumps(attributes, default=_json_value)))
+
+    def get_attributes(self, utterance_idx):
+        """ Return the metadata stored with the features of the given utterance (None if there are no features for the utterance). """
+        if utterance_idx in self._index:
+            return dict(self._entry_attributes[utterance_idx])
+        else:
+            return None
+
+    def keys(self):
+        """ Return the ids of all utterances with features in the container. """
+        return list(self._index.keys())
+
+    def remove(self, utterance_idx):
+        if utterance_idx in self._index:
+            if self._mode != 'a':
+                raise ValueError('The container {} is not open for writing.'.format(self.path))
+
+            del self._index[utterance_idx]
+            del self._entry_attributes[utterance_idx]
+            self._index_file.write('{} -1 0\n'.format(utterance_idx))
+
+    def get(self, utterance_idx):
+        """ Return a read-only view on the features of the given utterance, None if there are none. """
+        entry = self._index.get(utterance_idx)
+
+        if entry is None:
+            return None
+
+        offset, num_frames = entry
+        return self._frame_matrix()[offset:offset + num_frames]
+
+    def get_many(self, utterance_ids, packed=False, out=None):
+        """
+        Return the features of multiple utterances (see :meth:`spych.data.features.FeatureContainer.get_many`).
+        Unpacked the matrices are views on the frames file.
+        """
+        matrices = [self.get(utterance_idx) for utterance_idx in utterance_ids]
+
+        if not packed and out is None:
+            return matrices
+
+        for utterance_idx, matrix in zip(utterance_ids, matrices):
+            if matrix is None:
+                raise ValueError('No features for utterance {} in container {}.'.format(utterance_idx, self.path))
+
+        offsets = np.zeros(len(matrices) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([matrix.shape[0] for matrix in matrices])
+
+        if out is None:
+            out = np.empty((offsets[-1], self._feature_size or 0), dtype=DTYPE)
+        elif out.shape[0] < offsets[-1]:
+            raise ValueError('The output array has {} rows, but {} are needed.'.format(out.shape[0], offsets[-1]))
+
+        # Copy in the order of the frames file
+        for index in sorted(range(len(matrices)), key=lambda index: self._index[utterance_ids[index]][0]):
+            out[offsets[index]:offsets[index + 1]] = matrices[index]
+
+        return out[:offsets[-1]], offsets
+
+    def feature_size(self):
+        return self._feature_size
+
+    def get_statistics(self, num_workers=1):
+        """ Return basic stats over all values of the features. Return tuple (min, max, mean, var, stdev), None if the container is empty. """
+        return self.compute_statistics(num_workers=num_workers).global_statistics()
+
+    def compute_statistics(self, utterance_ids=None, num_workers=1):
+        """
+        Return the per-dimension statistics of the features as :class:`spych.data.features.statistics.FeatureStatistics`
+        (see :func:`spych.data.features.statistics.compute_statistics`).
+
+        :param utterance_ids: Ids of the utterances to use (by default all).
+        :param num_workers: Number of processes to read the features with.
+        """
+        return statistics.compute_statistics(self, utterance_ids=utterance_ids, num_workers=num_workers)
+
+    def compact(self):
+        """ Rewrite the frames file and the index, so they only contain the current features. """
+        if self._mode != 'a':
+            raise ValueError('The container {} is not open for writing.'.format(self.path))
+
+        frames = self._frame_matrix()
+        temp_frames_path = os.path.join(self.path, '{}.tmp'.format(FRAMES_FILE_NAME))
+        temp_index_path = os.path.join(self.path, '{}.tmp'.format(INDEX_FILE_NAME))
+
+        index = collections.OrderedDict()
+        num_rows = 0
+
+        with open(temp_frames_path, 'wb') as frames_file, open(temp_index_path, 'w', encoding='utf-8') as index_file:
+            for utterance_idx, (offset, num_frames) in self._index.items():
+                frames_file.write(np.ascontiguousarray(frames[offset:offset + num_frames]).tobytes())
+                index_file.write('{} {} {} {}\n'.format(utterance_idx, num_rows, num_frames,
+                                                        json.dumps(self._entry_attributes[utterance_idx], default=_json_value)))
+                index[utterance_idx] = (num_rows, num_frames)
+                num_rows += num_frames
+
+        self._frames = None
+        self._frames_file.close()
+        self._index_file.close()
+
+        os.replace(temp_frames_path, os.path.join(self.path, FRAMES_FILE_NAME))
+        os.replace(temp_index_path, os.path.join(self.path, INDEX_FILE_NAME))
+
+        self._index = index
+        self._num_rows = num_rows
+        self._open_for_writing()
+
+    def _frame_matrix(self):
+        """ Return the memory-mapped frames (remapped if features were added since the last call). """
+        if self._frames is None or self._frames.shape[0] < self._num_rows:
+            if self._frames_file is not None:
+                self._frames_file.flush()
+
+            if self._num_rows == 0:
+                self._frames = np.zeros((0, self._feature_size or 0), dtype=DTYPE)
+            else:
+                self._frames = np.memmap(os.path.join(self.path, FRAMES_FILE_NAME), dtype=DTYPE, mode='r',
+                                         shape=(self._num_rows, self._feature_size))
+
+        return self._frames
+
+    def _cached_state(self):
+        """ Return the part of the state, which is kept in the cache. """
+        return {name: self.__dict__[name] for name in ('_index', '_entry_attributes', '_attributes', '_feature_size', '_num_rows', '_frames')}
+
+    def _load_cached(self):
+        """ Restore the state from the cache if the files didn't change since it was stored. Return True if so. """
+        entry = _cache.get(self.path)
+
+        if entry is None or entry[0] != _signature(self.path):
+            return False
+
+        _cache.move_to_end(self.path)
+        self._clear()
+        self.__dict__.update(entry[1])
+
+        # The attributes can be changed by the user without writing
+        self._attributes = dict(self._attributes)
+        return True
+
+    def _store_cached(self):
+        signature = _signature(self.path)
+
+        if signature is None:
+            _cache.pop(self.path, None)
+            return
+
+        _cache[self.path] = (signature, self._cached_state())
+        _cache.move_to_end(self.path)
+
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    def _load(self):
+        self._clear()
+
+        meta_path = os.path.join(self.path, META_FILE_NAME)
+
+        if os.path.isfile(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            self._feature_size = meta['feature_size']
+            self._attributes = meta['attributes']
+
+        frames_path = os.path.join(self.path, FRAMES_FILE_NAME)
+        index_path = os.path.join(self.path, INDEX_FILE_NAME)
+
+        if self._feature_size is not None and os.path.isfile(frames_path):
+            self._num_rows = os.path.getsize(frames_path) // (self._feature_size * DTYPE.itemsize)
+
+        if os.path.isfile(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    # An incomplete last line is left by an interrupted write
+                    if not line.endswith('\n'):
+                        break
+
+                    parts = line[:-1].split(' ', 3)
+                    utterance_idx, offset, num_frames = parts[0], int(parts[1]), int(parts[2])
+
+                    if offset < 0:
+                        self._index.pop(utterance_idx, None)
+                        self._entry_attributes.pop(utterance_idx, None)
+                    elif offset + num_frames <= self._num_rows:
+                        self._index[utterance_idx] = (offset, num_frames)
+                        self._entry_attributes[utterance_idx] = json.loads(parts[3]) if len(parts) > 3 else {}
+
+    def _open_for_writing(self):
+        os.makedirs(self.path, exist_ok=True)
+
+        # The index may be shared with the cache (and other readers), it is changed in place from now on
+        self._index = collections.OrderedDict(self._index)
+        self._entry_attributes = dict(self._entry_attributes)
+
+        frames_path = os.path.join(self.path, FRAMES_FILE_NAME)
+        index_path = os.path.join(self.path, INDEX_FILE_NAME)
+
+        # Cut off incomplete rows/lines of an interrupted write, so new data is appended at the right position
+        self._frames_file = open(frames_path, 'ab')
+        self._frames_file.truncate(self._num_rows * (self._feature_size or 0) * DTYPE.itemsize)
+
+        self._index_file = open(index_path, 'a', encoding='utf-8')
+        self._index_file.truncate(_complete_lines_size(index_path))
+
+
+def _signature(path):
+    """ Return the (inode, size, modification time) of the files of the container at the given path, None if it doesn't exist. """
+    signature = []
+
+    for name in (FRAMES_FILE_NAME, INDEX_FILE_NAME, META_FILE_NAME):
+        try:
+            stat = os.stat(os.path.join(path, name))
+        except OSError:
+            stat = None
+
+        signature.append((stat.st_ino, stat.st_size, stat.st_mtime_ns) if stat is not None else None)
+
+    if all(entry is None for entry in signature):
+        return None
+
+    return tuple(signature)
+
+
+def _complete_lines_size(path):
+    """ Return the number of bytes of the file up to the end of the last complete line. """
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    return content.rfind(b'\n') + 1
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, np.ndarray):
+        return value.tolist()
+
+    raise TypeError('{} is not JSON serializable.'.format(type(value).__name__))
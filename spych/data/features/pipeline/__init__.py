@@ -17,6 +17,10 @@ from .splicing import UnspliceStage
 
 from .convertion import MelToMFCCStage
 
+from .normalization import CMVNStage
+
+from .profiling import PipelineProfile
+
 
 def spectrum_extraction_pipeline(win_length=400, win_step=160):
     return Pipeline(extract_stage=SpectrumExtractionStage(win_length=win_length, win_step=win_step))
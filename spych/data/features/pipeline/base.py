@@ -1,4 +1,23 @@
+import functools
+import hashlib
+import json
+import time
+
+import numpy as np
+
+from spych.utils import array
+
+from . import profiling
+
+
 class ProcessingStage(object):
+    # True if process_into can write the output into the input matrix (element-wise stages)
+    in_place = False
+
+    # True if the methods take the id(s) of the utterance(s) as keyword argument utterance_idx (process, process_stream)
+    # and utterance_ids (process_batch), which the pipeline passes through
+    uses_utterance_ids = False
+
     def __init__(self, processing_function=None):
         self.processing_function = processing_function
 
@@ -9,6 +28,47 @@ class ProcessingStage(object):
         else:
             raise NotImplementedError("Process function of stage not implemented.")
 
+    def output_layout(self, feature_matrix):
+        """
+        Return tuple (shape, dtype) of the output for the given input, if the stage implements :meth:`process_into`.
+        None otherwise (the default), then fused pipelines call :meth:`process`.
+        """
+        return None
+
+    def process_into(self, feature_matrix, out):
+        """
+        Process the given input features and write the output into ``out`` (with the layout from :meth:`output_layout`).
+        If :attr:`in_place` is True, ``out`` may be the input matrix itself.
+
+        :return: out
+        """
+        raise NotImplementedError("Processing into a given output of the stage not implemented.")
+
+    def process_batch(self, frames, offsets):
+        """
+        Process the features of multiple utterances at once.
+        By default every utterance is processed with :meth:`process`, stages override this with vectorized implementations.
+
+        :param frames: Frames of all utterances packed into one matrix (see :func:`spych.utils.array.pack`).
+        :param offsets: Offsets of the utterances in the frames, the frames of utterance i are frames[offsets[i]:offsets[i + 1]].
+        :return: Tuple (output frames, output offsets)
+        """
+        return array.pack([self.process(feature_matrix) for feature_matrix in array.unpack(frames, offsets)])
+
+    def process_stream(self, blocks):
+        """
+        Process the features of one utterance given in successive blocks of frames.
+        By default all blocks are collected and processed at once when the stream ends, stages that don't need the whole
+        utterance override this to process every block as soon as it arrives.
+
+        :param blocks: Iterable of feature matrices (num-frames x num-features).
+        :return: Generator yielding the output blocks.
+        """
+        blocks = list(blocks)
+
+        if len(blocks) > 0:
+            yield self.process(np.concatenate(blocks))
+
 
 class ExtractionStage(object):
     def __init__(self, extraction_function=None):
@@ -21,26 +81,122 @@ class ExtractionStage(object):
         else:
             raise NotImplementedError("Extraction function of stage not implemented.")
 
+    def extract_stream(self, samples_chunks, sampling_rate):
+        """
+        Extract features from a signal given in successive chunks of samples.
+        By default all chunks are collected and the features are extracted when the stream ends,
+        stages override this to yield the features of every chunk as soon as possible.
+
+        :param samples_chunks: Iterable of 1-D sample arrays.
+        :param sampling_rate: Sampling rate of the signal.
+        :return: Generator yielding feature matrices (num-frames x num-features).
+        """
+        chunks = list(samples_chunks)
+
+        if len(chunks) > 0:
+            yield self.extract(np.concatenate(chunks), sampling_rate)
+
 
 class Pipeline(object):
-    def __init__(self, stages=[], extract_stage=None):
+    """
+    A feature pipeline with an optional extraction stage and a list of processing stages.
+
+    With :meth:`enable_profiling` every stage call of :meth:`process_signal`, :meth:`process` and :meth:`process_batch`
+    is recorded in :attr:`profile`. Disabled profiling (the default) adds no overhead besides a check per stage.
+
+    In fused mode :meth:`process` and :meth:`process_signal` avoid intermediate arrays: stages which support it write into
+    output buffers, which are kept and reused for the next calls, and element-wise stages run in place on the output of the
+    previous stage. The returned matrix is never one of the reused buffers.
+
+    The ids of the utterances, which are passed to the process methods, are forwarded to stages using them (e.g. for per-speaker normalization).
+
+    :param stages: List of processing stages.
+    :param extract_stage: Stage to extract features from signals.
+    :param fused: If True, the fused execution mode is used.
+    """
+
+    def __init__(self, stages=[], extract_stage=None, fused=False):
         self.extract_stage = extract_stage
         self.stages = stages
+        self.fused = fused
+        self.profile = None
 
-    def process_signal(self, samples, sampling_rate, return_intermediate=False):
-        """ Process the given signal. """
+        self._buffers = {}
+
+    def __getstate__(self):
+        # The buffers are only a cache
+        state = dict(self.__dict__)
+        state['_buffers'] = {}
+        return state
+
+    def enable_profiling(self):
+        """ Start recording the statistics of the stages in a new :class:`profiling.PipelineProfile`, which is returned. """
+        self.profile = profiling.PipelineProfile()
+        return self.profile
+
+    def disable_profiling(self):
+        """ Stop recording and return the profile. """
+        profile = self.profile
+        self.profile = None
+        return profile
+
+    def stage_name(self, stage_index):
+        """ Return the name of a stage in the profile. The extraction stage has index -1, the processing stages 0 to n-1. """
+        if stage_index < 0:
+            return 'extract {}'.format(type(self.extract_stage).__name__)
+
+        return '{} {}'.format(stage_index, type(self.stages[stage_index]).__name__)
+
+    def _profiled(self, stage_index, function, stage_input, *args, allocated=None):
+        """
+        Call the stage function and record the call in the profile.
+        If ``allocated`` is None, the output counts as allocated by the stage if it doesn't share memory with the input or an array argument.
+        """
+        start = time.perf_counter()
+        output = function(stage_input, *args)
+        seconds = time.perf_counter() - start
+
+        # Batch processing returns (frames, offsets)
+        result = output[0] if isinstance(output, tuple) else output
+
+        if allocated is None:
+            allocated = not any(isinstance(array, np.ndarray) and np.may_share_memory(result, array) for array in (stage_input,) + args)
+
+        self.profile.record(self.stage_name(stage_index), seconds, stage_input, result, allocated=allocated)
+
+        return output
+
+    def fingerprint(self):
+        """
+        Return a hash of the configuration of the pipeline (classes and public attributes of the stages).
+        Attributes starting with an underscore are ignored, so stages can keep caches/state there.
+        """
+        config = [_stage_config(stage) for stage in [self.extract_stage] + list(self.stages)]
+        encoded = json.dumps(config, sort_keys=True, default=_config_value)
+
+        return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+    def process_signal(self, samples, sampling_rate, return_intermediate=False, utterance_idx=None):
+        """ Process the given signal (of the utterance with the given id). """
 
         if self.extract_stage is None:
             raise ValueError("No extraction stage given.")
 
         intermediate = []
 
-        output = self.extract_stage.extract(samples, sampling_rate)
+        if self.profile is None:
+            output = self.extract_stage.extract(samples, sampling_rate)
+        else:
+            output = self._profiled(-1, self.extract_stage.extract, samples, sampling_rate)
 
         if return_intermediate:
             intermediate.append(output)
 
-        output = self.process(output, return_intermediate=return_intermediate)
+        if self.fused and not return_intermediate:
+            # The extracted features are not referenced anywhere else, so element-wise stages can process them in place
+            return self._process_fused(output, input_owned=True, utterance_idx=utterance_idx)
+
+        output = self.process(output, return_intermediate=return_intermediate, utterance_idx=utterance_idx)
 
         if return_intermediate:
             intermediate.extend(output)
@@ -48,20 +204,74 @@ class Pipeline(object):
         else:
             return output
 
-    def process(self, feature_matrix, return_intermediate=False):
+    def process_signal_stream(self, samples_chunks, sampling_rate, utterance_idx=None):
+        """
+        Process a signal given in successive chunks of samples (e.g. read block-wise from a long file or recorded live).
+        The features are yielded as soon as the stages can compute them, the concatenated blocks equal the output of :meth:`process_signal`.
+        Memory stays constant if all stages support streaming, other stages collect their input until the end of the stream
+        (see :meth:`ExtractionStage.extract_stream` and :meth:`ProcessingStage.process_stream`).
+
+        :param samples_chunks: Iterable of 1-D sample arrays.
+        :param sampling_rate: Sampling rate of the signal.
+        :param utterance_idx: Id of the utterance.
+        :return: Generator yielding non-empty feature matrices (num-frames x num-features).
+        """
+        if self.extract_stage is None:
+            raise ValueError("No extraction stage given.")
+
+        blocks = self.extract_stage.extract_stream(samples_chunks, sampling_rate)
+
+        for stage in self.stages:
+            blocks = _bind_utterances(stage, stage.process_stream, utterance_idx=utterance_idx)(blocks)
+
+        for block in blocks:
+            if block.shape[0] > 0:
+                yield block
+
+    def process_batch(self, feature_matrices, utterance_ids=None):
+        """
+        Process the given feature matrices of multiple utterances. The matrices are packed into one frame buffer,
+        every stage processes the whole buffer at once (see :meth:`ProcessingStage.process_batch`).
+
+        :param feature_matrices: List of N x [n] input matrices.
+        :param utterance_ids: Ids of the utterances of the matrices.
+        :return: List of output matrices.
+        """
+        frames, offsets = array.pack(feature_matrices)
+
+        for index, stage in enumerate(self.stages):
+            process_batch = _bind_utterances(stage, stage.process_batch, utterance_ids=utterance_ids)
+
+            if self.profile is None:
+                frames, offsets = process_batch(frames, offsets)
+            else:
+                frames, offsets = self._profiled(index, process_batch, frames, offsets)
+
+        return array.unpack(frames, offsets)
+
+    def process(self, feature_matrix, return_intermediate=False, utterance_idx=None):
         """
         Process the given features matrix N x [n] with N equals the number of frames.
 
         :param feature_matrix: Input data
         :param return_intermediate: If intermediate results should be returned.
+        :param utterance_idx: Id of the utterance of the features.
         :return: N x [] output matrix, or if intermediate is True, a list of N x [] matrices (for every stage).
         """
 
+        if self.fused and not return_intermediate:
+            return self._process_fused(feature_matrix, utterance_idx=utterance_idx)
+
         intermediate = []
         output = feature_matrix
 
-        for stage in self.stages:
-            output = stage.process(output)
+        for index, stage in enumerate(self.stages):
+            process = _bind_utterances(stage, stage.process, utterance_idx=utterance_idx)
+
+            if self.profile is None:
+                output = process(output)
+            else:
+                output = self._profiled(index, process, output)
 
             if return_intermediate:
                 intermediate.append(output)
@@ -70,3 +280,100 @@ class Pipeline(object):
             return intermediate
         else:
             return output
+
+    def _process_fused(self, feature_matrix, input_owned=False, utterance_idx=None):
+        """
+        Process the given features in fused mode.
+
+        :param feature_matrix: Input data
+        :param input_owned: True if the input may be overwritten.
+        :param utterance_idx: Id of the utterance of the features.
+        """
+        # From the last stage, which can't work in place, on the outputs are returned, so they can't be reused buffers
+        final_index = max([index for index, stage in enumerate(self.stages) if not stage.in_place], default=-1)
+
+        output = feature_matrix
+        owned = input_owned
+
+        for index, stage in enumerate(self.stages):
+            layout = stage.output_layout(output)
+
+            if layout is None:
+                process = _bind_utterances(stage, stage.process, utterance_idx=utterance_idx)
+
+                if self.profile is None:
+                    result = process(output)
+                else:
+                    result = self._profiled(index, process, output)
+
+                # The result may be a view on the input or on a buffer
+                owned = not any(np.may_share_memory(result, array) for array in [output] + list(self._buffers.values()))
+                output = result
+                continue
+
+            new_target = False
+
+            if stage.in_place and owned:
+                target = output
+            elif index < final_index:
+                target = self._buffer(index, *layout)
+            else:
+                target = np.empty(layout[0], dtype=layout[1])
+                new_target = True
+
+            if self.profile is None:
+                output = stage.process_into(output, target)
+            else:
+                output = self._profiled(index, stage.process_into, output, target, allocated=new_target)
+
+            owned = True
+
+        # A stage without fused support may have returned a view on a buffer
+        if any(np.may_share_memory(output, buffer) for buffer in self._buffers.values()):
+            return output.copy()
+
+        return output
+
+    def _buffer(self, stage_index, shape, dtype):
+        """ Return an array with the given shape and dtype, which is a view on the reusable output buffer of the stage. """
+        buffer = self._buffers.get(stage_index)
+
+        if buffer is None or buffer.dtype != dtype or buffer.shape[1:] != tuple(shape[1:]) or buffer.shape[0] < shape[0]:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[stage_index] = buffer
+
+        return buffer[:shape[0]]
+
+
+def _bind_utterances(stage, function, **utterance_arguments):
+    """ Return the stage function with the given utterance id(s) bound, if the stage uses them. """
+    if stage.uses_utterance_ids:
+        return functools.partial(function, **utterance_arguments)
+
+    return function
+
+
+def _stage_config(stage):
+    if stage is None:
+        return None
+
+    return {
+        'class': '{}.{}'.format(type(stage).__module__, type(stage).__qualname__),
+        'params': {name: value for name, value in vars(stage).items() if not name.startswith('_')}
+    }
+
+
+def _config_value(value):
+    """ Return a JSON serializable representation of an attribute value, which is independent of the object identity. """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    elif isinstance(value, np.generic):
+        return value.item()
+    elif callable(value):
+        return '{}.{}'.format(getattr(value, '__module__', ''), getattr(value, '__qualname__', type(value).__qualname__))
+    elif hasattr(value, '__dict__'):
+        return _stage_config(value)
+    elif isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+
+    return repr(value)
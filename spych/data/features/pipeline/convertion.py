@@ -1,13 +1,23 @@
+import numpy as np
 import librosa
 
 from . import base
+from . import extraction
 
 
 class MelToMFCCStage(base.ProcessingStage):
+    """
+    Computes MFCCs from mel filterbank energies (num-frames x num-mel).
+
+    :param num_mfcc: Number of coefficients per frame. Earlier versions ignored this parameter and always returned 13 coefficients.
+                     Features generated by earlier versions with another value have the same pipeline fingerprint
+                     but only 13 columns, they have to be generated again.
+    """
+
     def __init__(self, num_mfcc=13):
         self.num_mfcc = num_mfcc
 
     def process(self, feature_matrix):
         mel = librosa.power_to_db(feature_matrix.T)
-        mfcc = librosa.feature.mfcc(S=mel, n_mfcc=13)
+        mfcc = np.dot(extraction.dct_matrix(self.num_mfcc, mel.shape[0]), mel)
         return mfcc.T.astype('float32')
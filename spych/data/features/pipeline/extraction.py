@@ -1,22 +1,74 @@
+import functools
+
 import numpy as np
+import scipy.fftpack
+import scipy.signal
 import librosa
 
 from . import base
 
 
+@functools.lru_cache(maxsize=32)
+def mel_filterbank(sampling_rate, n_fft, num_mel):
+    """
+    Return the mel filterbank matrix (num_mel x (n_fft / 2 + 1)) for the given configuration.
+    The matrices are cached, the returned array is read-only.
+    """
+    mel_filter = librosa.filters.mel(sr=sampling_rate, n_fft=n_fft, n_mels=num_mel)
+    mel_filter.flags.writeable = False
+
+    return mel_filter
+
+
+@functools.lru_cache(maxsize=32)
+def dct_matrix(num_mfcc, num_mel):
+    """
+    Return the DCT basis (num_mfcc x num_mel) to compute MFCCs from log mel energies (DCT type 2, orthonormal, like librosa.feature.mfcc).
+    The matrices are cached, the returned array is read-only.
+    """
+    basis = scipy.fftpack.dct(np.eye(num_mel), type=2, norm='ortho', axis=0)[:num_mfcc]
+    basis.flags.writeable = False
+
+    return basis
+
+
 class SpectrumExtractionStage(base.ExtractionStage):
     def __init__(self, win_length, win_step):
         self.win_length = win_length
         self.win_step = win_step
 
-    def compute_raw(self, samples):
+    def spectrum(self, samples):
+        """ Return the power spectrum (num-bins x num-frames) of the given samples. """
         return np.abs(librosa.stft(samples, n_fft=self.win_length, hop_length=self.win_step)) ** 2
 
-    def extract(self, samples, sampling_rate):
-        spec = self.compute_raw(samples)
-        spec = spec.T.astype(np.float32)
+    def raw_from_spectrum(self, spec, sampling_rate):
+        """ Compute the raw features (num-features x num-frames) from the power spectrum. The frames are processed independently. """
         return spec
 
+    def compute_raw(self, samples):
+        return self.spectrum(samples)
+
+    def extract(self, samples, sampling_rate):
+        raw = self.raw_from_spectrum(self.spectrum(samples), sampling_rate)
+        return raw.T.astype(np.float32, order='C')
+
+    def extract_stream(self, chunks, sampling_rate):
+        """
+        Extract features from successive chunks of a signal (e.g. read block-wise from a long file or from a live source).
+        After every chunk the features of all frames that are complete are yielded. STFT frames overlapping chunk borders are
+        carried over, so the concatenated output equals :meth:`extract` of the whole signal.
+
+        :param chunks: Iterable of 1-D sample arrays.
+        :param sampling_rate: Sampling rate of the signal.
+        :return: Generator yielding feature matrices (num-frames x num-features), possibly with zero frames.
+        """
+        stft = StreamingSpectrum(self.win_length, self.win_step)
+
+        for chunk in chunks:
+            yield self.raw_from_spectrum(stft.push(chunk), sampling_rate).T.astype(np.float32, order='C')
+
+        yield self.raw_from_spectrum(stft.finish(), sampling_rate).T.astype(np.float32, order='C')
+
 
 class MelFilterbankExtractionStage(SpectrumExtractionStage):
     def __init__(self, num_mel=23, win_length=400, win_step=160):
@@ -24,34 +76,92 @@ class MelFilterbankExtractionStage(SpectrumExtractionStage):
 
         self.num_mel = num_mel
 
-    def compute_raw(self, samples, sampling_rate):
-        spec = super(MelFilterbankExtractionStage, self).compute_raw(samples)
-        mel_filter = librosa.filters.mel(sampling_rate, self.win_length, n_mels=self.num_mel)
-        mel = np.dot(mel_filter, spec)
-
-        return mel
+    def mel_filter(self, sampling_rate):
+        """ Return the (cached) mel filterbank matrix of this stage for the given sampling rate. """
+        return mel_filterbank(sampling_rate, self.win_length, self.num_mel)
 
-    def extract(self, samples, sampling_rate):
-        mel = self.compute_raw(samples, sampling_rate)
-        mel = mel.T.astype(np.float32)
+    def raw_from_spectrum(self, spec, sampling_rate):
+        return np.dot(self.mel_filter(sampling_rate), spec)
 
-        return mel
+    def compute_raw(self, samples, sampling_rate):
+        return self.raw_from_spectrum(self.spectrum(samples), sampling_rate)
 
 
 class MFCCExtractionStage(MelFilterbankExtractionStage):
-    def __init__(self, num_mfcc=13, num_mel=23, win_length=400, win_step=160):
+    """
+    MFCC extraction. The log mel energies are clipped to top_db below the maximum of the whole utterance (like librosa.power_to_db).
+    Since the maximum is unknown before the end of a signal, streaming extraction requires ``top_db=None``.
+    """
+
+    def __init__(self, num_mfcc=13, num_mel=23, win_length=400, win_step=160, top_db=80.0):
         super(MFCCExtractionStage, self).__init__(num_mel=num_mel, win_length=win_length, win_step=win_step)
 
         self.num_mfcc = num_mfcc
+        self.top_db = top_db
 
-    def compute_raw(self, samples, sampling_rate):
-        mel = super(MFCCExtractionStage, self).compute_raw(samples, sampling_rate)
-        mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=self.num_mfcc)
+    def raw_from_spectrum(self, spec, sampling_rate):
+        mel = super(MFCCExtractionStage, self).raw_from_spectrum(spec, sampling_rate)
+        return np.dot(dct_matrix(self.num_mfcc, self.num_mel), librosa.power_to_db(mel, top_db=self.top_db))
 
-        return mfcc
+    def extract_stream(self, chunks, sampling_rate):
+        if self.top_db is not None:
+            raise ValueError('Streaming MFCC extraction requires top_db=None (the clipping depends on the maximum of the whole signal).')
 
-    def extract(self, samples, sampling_rate):
-        mfcc = self.compute_raw(samples, sampling_rate)
-        mfcc = mfcc.T.astype(np.float32)
+        return super(MFCCExtractionStage, self).extract_stream(chunks, sampling_rate)
+
+
+class StreamingSpectrum(object):
+    """
+    Computes the power spectrum of a signal given in successive chunks, with the same framing as ``librosa.stft``
+    (centered frames, zero padding, periodic hann window). Only the samples of the current incomplete frame are kept.
+
+    :param n_fft: Length of a frame (and the FFT).
+    :param hop_length: Number of samples between two frames.
+    """
+
+    def __init__(self, n_fft, hop_length):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.window = scipy.signal.get_window('hann', n_fft, fftbins=True)
+
+        self._buffer = None
+
+    def push(self, chunk):
+        """ Add the next chunk of samples. Return the power spectrum (num-bins x num-frames) of the frames completed by it. """
+        chunk = np.asarray(chunk)
+
+        if self._buffer is None:
+            self._buffer = np.zeros(self.n_fft // 2, dtype=chunk.dtype)
+
+        self._buffer = np.concatenate([self._buffer, chunk])
+
+        return self._frames()
+
+    def finish(self):
+        """ Signal the end of the signal. Return the power spectrum of the remaining frames. """
+        if self._buffer is None:
+            return np.zeros((self.n_fft // 2 + 1, 0), dtype=np.float32)
+
+        self._buffer = np.concatenate([self._buffer, np.zeros(self.n_fft // 2, dtype=self._buffer.dtype)])
+        spec = self._frames()
+        self._buffer = None
+
+        return spec
+
+    def _frames(self):
+        num_frames = 0
+
+        if self._buffer.size >= self.n_fft:
+            num_frames = 1 + (self._buffer.size - self.n_fft) // self.hop_length
+
+        complex_dtype = np.result_type(self._buffer.dtype, np.complex64)
+
+        if num_frames == 0:
+            return np.zeros((self.n_fft // 2 + 1, 0), dtype=np.abs(np.zeros(0, dtype=complex_dtype)).dtype)
+
+        frames = np.lib.stride_tricks.sliding_window_view(self._buffer, self.n_fft)[::self.hop_length][:num_frames]
+        spec = np.fft.rfft(self.window * frames, axis=1).astype(complex_dtype)
+
+        self._buffer = self._buffer[num_frames * self.hop_length:]
 
-        return mfcc
+        return (np.abs(spec) ** 2).T
@@ -0,0 +1,67 @@
+import numpy as np
+
+from . import base
+from .scaling import _float_dtype
+
+
+class CMVNStage(base.ProcessingStage):
+    """
+    Cepstral mean and variance normalization with precomputed statistics (see :mod:`spych.data.features.cmvn`).
+    The mean of the statistics is subtracted from the features, which are divided by the standard deviation.
+
+    With per-speaker or per-utterance statistics the stage needs the ids of the utterances, which are passed by the pipeline
+    (e.g. ``pipeline.process_batch(matrices, utterance_ids=ids)``).
+
+    :param statistics: The :class:`spych.data.features.cmvn.CMVNStatistics`.
+    :param normalize_variance: If False, only the mean is subtracted.
+    :param variance_floor: Minimum variance (avoids dividing by zero for constant dimensions).
+    """
+
+    uses_utterance_ids = True
+
+    def __init__(self, statistics, normalize_variance=True, variance_floor=1e-10):
+        self.statistics = statistics
+        self.normalize_variance = normalize_variance
+        self.variance_floor = variance_floor
+
+        self._scales = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_scales'] = None
+        return state
+
+    def process(self, feature_matrix, utterance_idx=None):
+        row = self.statistics.rows([utterance_idx])[0]
+        return self._normalize(feature_matrix, row)
+
+    def process_batch(self, frames, offsets, utterance_ids=None):
+        if utterance_ids is None:
+            utterance_ids = [None] * (len(offsets) - 1)
+        elif len(utterance_ids) != len(offsets) - 1:
+            raise ValueError('There are {} utterance ids for {} utterances.'.format(len(utterance_ids), len(offsets) - 1))
+
+        # Row of the statistics of every frame
+        frame_rows = np.repeat(self.statistics.rows(utterance_ids), np.diff(offsets))
+
+        return self._normalize(frames, frame_rows), offsets
+
+    def process_stream(self, blocks, utterance_idx=None):
+        row = self.statistics.rows([utterance_idx])[0]
+        return (self._normalize(block, row) for block in blocks)
+
+    def _normalize(self, feature_matrix, rows):
+        """ Normalize the frames with the statistics of the given row(s) (one per frame or one for all). """
+        dtype = _float_dtype(feature_matrix.dtype)
+        output = np.subtract(feature_matrix, self.statistics.means[rows].astype(dtype, copy=False), dtype=dtype)
+
+        if self.normalize_variance:
+            output *= self._inverse_stds()[rows].astype(dtype, copy=False)
+
+        return output
+
+    def _inverse_stds(self):
+        if self._scales is None:
+            self._scales = 1.0 / np.sqrt(np.maximum(self.statistics.variances, self.variance_floor))
+
+        return self._scales
@@ -0,0 +1,93 @@
+import collections
+
+import numpy as np
+
+
+class PipelineProfile(object):
+    """
+    Collects per-stage statistics of a pipeline: number of calls, wall time, shapes of the last input/output
+    and number of bytes of the inputs and of the outputs allocated by the stage (outputs written into the input,
+    into reused buffers or returned as views on the input are not counted).
+    A profile is attached to a pipeline with :meth:`spych.data.features.pipeline.Pipeline.enable_profiling`.
+    """
+
+    def __init__(self):
+        self.stages = collections.OrderedDict()
+
+    def record(self, stage_name, seconds, stage_input, stage_output, allocated=True):
+        """
+        Add a call of the stage with the given name, which took the given time [seconds].
+
+        :param allocated: False if the output was not allocated by the call (its bytes are not added to the output bytes).
+        """
+        stats = self.stages.get(stage_name)
+
+        if stats is None:
+            stats = _empty_stats()
+            self.stages[stage_name] = stats
+
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        stats['input_bytes'] += np.asarray(stage_input).nbytes
+        if allocated:
+            stats['output_bytes'] += np.asarray(stage_output).nbytes
+
+        stats['input_shape'] = list(np.shape(stage_input))
+        stats['output_shape'] = list(np.shape(stage_output))
+
+    def merge(self, other):
+        """ Add the statistics of another profile (e.g. of a worker process) to this profile. """
+        for stage_name, other_stats in other.stages.items():
+            stats = self.stages.get(stage_name)
+
+            if stats is None:
+                stats = _empty_stats()
+                self.stages[stage_name] = stats
+
+            for key in ('calls', 'seconds', 'input_bytes', 'output_bytes'):
+                stats[key] += other_stats[key]
+
+            stats['input_shape'] = other_stats['input_shape']
+            stats['output_shape'] = other_stats['output_shape']
+
+    @property
+    def total_seconds(self):
+        return sum(stats['seconds'] for stats in self.stages.values())
+
+    def to_dict(self):
+        """ Return the statistics as dictionary stage-name/statistics (JSON serializable). """
+        return collections.OrderedDict((stage_name, dict(stats)) for stage_name, stats in self.stages.items())
+
+    @classmethod
+    def from_dict(cls, stages):
+        """ Create a profile from a dictionary created with :meth:`to_dict`. """
+        profile = cls()
+
+        for stage_name, stats in stages.items():
+            profile.stages[stage_name] = dict(stats)
+
+        return profile
+
+    def summary(self):
+        """ Return a list of lines, which describe the statistics of every stage. """
+        total_seconds = self.total_seconds
+        lines = []
+
+        for stage_name, stats in self.stages.items():
+            share = stats['seconds'] / total_seconds * 100 if total_seconds > 0 else 0.0
+            lines.append('{}: {} calls, {:.3f} s ({:.1f} %), {:.3f} ms/call, in {:.2f} MB {}, out {:.2f} MB {}'.format(
+                stage_name, stats['calls'], stats['seconds'], share, stats['seconds'] / max(stats['calls'], 1) * 1000,
+                stats['input_bytes'] / 1e6, tuple(stats['input_shape']), stats['output_bytes'] / 1e6, tuple(stats['output_shape'])))
+
+        return lines
+
+
+def _empty_stats():
+    return {
+        'calls': 0,
+        'seconds': 0.0,
+        'input_bytes': 0,
+        'output_bytes': 0,
+        'input_shape': [],
+        'output_shape': []
+    }
@@ -4,18 +4,49 @@ from . import base
 
 
 class LogStage(base.ProcessingStage):
+    in_place = True
+
     def process(self, feature_matrix):
-        return np.log(np.maximum(1e-10, feature_matrix))
+        return self.process_into(feature_matrix, np.empty(*self.output_layout(feature_matrix)))
+
+    def output_layout(self, feature_matrix):
+        return feature_matrix.shape, _float_dtype(feature_matrix.dtype)
+
+    def process_into(self, feature_matrix, out):
+        np.maximum(1e-10, feature_matrix, out=out)
+        return np.log(out, out=out)
+
+    def process_batch(self, frames, offsets):
+        return self.process(frames), offsets
+
+    def process_stream(self, blocks):
+        return (self.process(block) for block in blocks)
 
 
 class ExponentialStage(base.ProcessingStage):
+    in_place = True
+
     def process(self, feature_matrix):
-        output = np.exp(feature_matrix)
-        output[output == np.inf] = np.finfo(output.dtype).max
-        return output
+        return self.process_into(feature_matrix, np.empty(*self.output_layout(feature_matrix)))
+
+    def output_layout(self, feature_matrix):
+        return feature_matrix.shape, _float_dtype(feature_matrix.dtype)
+
+    def process_into(self, feature_matrix, out):
+        np.exp(feature_matrix, out=out)
+        # Replace inf by the largest finite value
+        return np.minimum(out, np.finfo(out.dtype).max, out=out)
+
+    def process_batch(self, frames, offsets):
+        return self.process(frames), offsets
+
+    def process_stream(self, blocks):
+        return (self.process(block) for block in blocks)
 
 
 class RescalingStage(base.ProcessingStage):
+    in_place = True
+
     def __init__(self, target_min=0.0, target_max=1.0, reference_min=None, reference_max=None):
         self.reference_min = reference_min
         self.reference_max = reference_max
@@ -24,16 +55,70 @@ class RescalingStage(base.ProcessingStage):
         self.target_max = target_max
 
     def process(self, feature_matrix):
+        return self.process_into(feature_matrix, np.empty(*self.output_layout(feature_matrix)))
+
+    def output_layout(self, feature_matrix):
+        references = []
+
+        if self.reference_min is not None and self.reference_max is not None:
+            references = [self.reference_min, self.reference_max]
+
+        return feature_matrix.shape, _float_dtype(np.result_type(feature_matrix.dtype, *references))
+
+    def process_into(self, feature_matrix, out):
         min = self.reference_min
         max = self.reference_max
 
         if min is None or max is None:
             min, max = self._calculate_min_max(feature_matrix)
 
-        output = (feature_matrix - min) / (max - min)
+        np.subtract(feature_matrix, min, out=out)
+        np.divide(out, max - min, out=out)
+        np.multiply(out, self.target_max - self.target_min, out=out)
+        np.add(out, self.target_min, out=out)
+
+        return out
+
+    def process_batch(self, frames, offsets):
+        min = self.reference_min
+        max = self.reference_max
+
+        if min is None or max is None:
+            # Min/max of every utterance, repeated for each of its frames
+            lengths = np.diff(offsets)
+            frame_mins = np.min(frames, axis=1) if frames.size > 0 else np.zeros(0)
+            frame_maxs = np.max(frames, axis=1) if frames.size > 0 else np.zeros(0)
+            non_empty = lengths > 0
+
+            utt_mins = np.zeros(lengths.size, dtype=frame_mins.dtype)
+            utt_maxs = np.zeros(lengths.size, dtype=frame_maxs.dtype)
+            utt_mins[non_empty] = np.minimum.reduceat(frame_mins, offsets[:-1][non_empty])
+            utt_maxs[non_empty] = np.maximum.reduceat(frame_maxs, offsets[:-1][non_empty])
+
+            min = np.repeat(utt_mins, lengths)[:, np.newaxis]
+            max = np.repeat(utt_maxs, lengths)[:, np.newaxis]
+
+        output = (frames - min) / (max - min)
         output = (output * (self.target_max - self.target_min)) + self.target_min
 
-        return output
+        return output, offsets
+
+    def process_stream(self, blocks):
+        # Without reference values the min/max of the whole utterance is needed
+        if self.reference_min is None or self.reference_max is None:
+            return super(RescalingStage, self).process_stream(blocks)
+
+        return (self.process(block) for block in blocks)
 
     def _calculate_min_max(self, feature_matrix):
         return np.min(feature_matrix), np.max(feature_matrix)
+
+
+def _float_dtype(dtype):
+    """ Return the type of the output of the stages for inputs of the given type (floats are kept). """
+    dtype = np.dtype(dtype)
+
+    if dtype.kind == 'f':
+        return dtype
+
+    return np.dtype(np.float64)
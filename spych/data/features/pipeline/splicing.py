@@ -12,9 +12,69 @@ class SpliceStage(base.ProcessingStage):
         self.splice_step = splice_step
 
     def process(self, feature_matrix):
-        processed = array.splice_features(feature_matrix, self.splice_size, self.splice_step, repeat_border_frames=True)
+        return self.process_into(feature_matrix, np.empty(*self.output_layout(feature_matrix)))
 
-        return processed.copy()
+    def output_layout(self, feature_matrix):
+        num_splices = (np.size(feature_matrix, 0) + self.splice_step - 1) // self.splice_step
+        return (num_splices, (self.splice_size * 2 + 1) * np.size(feature_matrix, 1)), feature_matrix.dtype
+
+    def process_into(self, feature_matrix, out):
+        if out.shape[0] > 0:
+            np.copyto(out, array.splice_features(feature_matrix, self.splice_size, self.splice_step, repeat_border_frames=True))
+
+        return out
+
+    def process_batch(self, frames, offsets):
+        lengths = np.diff(offsets)
+        num_splices = (lengths + self.splice_step - 1) // self.splice_step
+
+        out_offsets = np.zeros(offsets.size, dtype=np.int64)
+        out_offsets[1:] = np.cumsum(num_splices)
+
+        # For every output frame the index of the utterance and the position of the center frame within the utterance
+        utt_indices = np.repeat(np.arange(lengths.size), num_splices)
+        centers = (np.arange(out_offsets[-1]) - out_offsets[utt_indices]) * self.splice_step
+
+        # Context frame indices, clipped to the utterance borders (repeat border frames)
+        context = centers[:, np.newaxis] + np.arange(-self.splice_size, self.splice_size + 1)[np.newaxis, :]
+        context = np.clip(context, 0, np.maximum(lengths[utt_indices] - 1, 0)[:, np.newaxis]) + offsets[utt_indices][:, np.newaxis]
+
+        output = frames[context].reshape(context.shape[0], context.shape[1] * np.size(frames, 1))
+
+        return output, out_offsets
+
+    def process_stream(self, blocks):
+        buffer = None
+        buffer_offset = 0  # index of the first buffered frame within the utterance
+        num_frames = 0
+        next_center = 0
+
+        for block in blocks:
+            buffer = block if buffer is None else np.concatenate([buffer, block])
+            num_frames += block.shape[0]
+
+            # Centers with the complete right context available
+            centers = np.arange(next_center, max(next_center, num_frames - self.splice_size), self.splice_step)
+            yield self._splice_centers(buffer, buffer_offset, centers, num_frames - 1)
+
+            if centers.size > 0:
+                next_center = centers[-1] + self.splice_step
+
+            # Drop the frames that are not in the context of any future center
+            num_drop = min(max(0, next_center - self.splice_size - buffer_offset), buffer.shape[0])
+            buffer = buffer[num_drop:]
+            buffer_offset += num_drop
+
+        if buffer is not None:
+            centers = np.arange(next_center, num_frames, self.splice_step)
+            yield self._splice_centers(buffer, buffer_offset, centers, num_frames - 1)
+
+    def _splice_centers(self, buffer, buffer_offset, centers, last_frame):
+        """ Return the spliced frames for the given centers, the context is clipped to the frames [0, last_frame] of the utterance. """
+        context = centers[:, np.newaxis] + np.arange(-self.splice_size, self.splice_size + 1)[np.newaxis, :]
+        context = np.clip(context, 0, max(last_frame, 0)) - buffer_offset
+
+        return buffer[context].reshape(context.shape[0], context.shape[1] * np.size(buffer, 1))
 
 
 class UnspliceMergeType(enum.Enum):
@@ -28,6 +88,17 @@ class UnspliceStage(base.ProcessingStage):
         self.splice_step = splice_step
         self.merge_type = merge_type
 
+    def output_layout(self, feature_matrix):
+        if self.merge_type != UnspliceMergeType.TAKE_CENTER_FRAME:
+            return None
+
+        return (np.size(feature_matrix, 0), np.size(feature_matrix, 1) // (self.splice_size * 2 + 1)), feature_matrix.dtype
+
+    def process_into(self, feature_matrix, out):
+        frame_len = out.shape[1]
+        np.copyto(out, feature_matrix[:, self.splice_size * frame_len:(self.splice_size + 1) * frame_len])
+        return out
+
     def process(self, feature_matrix):
         if self.merge_type == UnspliceMergeType.COMPUTE_MEAN:
             return array.unsplice_features(feature_matrix, self.splice_size, self.splice_step)
@@ -36,3 +107,9 @@ class UnspliceStage(base.ProcessingStage):
             start = self.splice_size * frame_len
             end = (self.splice_size + 1) * frame_len
             return feature_matrix[:, start:end]
+
+    def process_stream(self, blocks):
+        if self.merge_type != UnspliceMergeType.TAKE_CENTER_FRAME:
+            return super(UnspliceStage, self).process_stream(blocks)
+
+        return (self.process(block) for block in blocks)
@@ -0,0 +1,169 @@
+import collections
+import os
+
+import h5py
+
+READ = 'r'
+APPEND = 'a'
+SWMR = 'swmr'
+
+
+class _Handle(object):
+    def __init__(self, mode):
+        self.mode = mode
+        self.file = None
+        self.stat = None
+        self.references = 0
+
+
+class HandlePool(object):
+    """
+    Pool of open HDF5 files shared by all feature containers with the same path.
+
+    Every open container holds a reference on the handle of its file. A file is only opened once and is reopened in append
+    mode, if a container needs to write to a file opened read-only. When the last reference is released, files opened in
+    append mode are closed (so the data is flushed to disk and the file isn't locked for other processes), read-only files
+    are kept open (up to ``max_idle`` files, the least recently used are closed) so reopening them is free.
+    Idle files still hold the (shared) HDF5 file lock, :meth:`close_idle` closes them, e.g. before another process writes to them.
+    A file that was replaced or changed while idle is reopened.
+
+    In 'swmr' mode files are opened read-only in HDF5 single-writer/multiple-reader mode and without file locking, so any number of
+    processes (e.g. data loader workers) can read a file without blocking each other or a writer. Reading is only safe while no
+    process writes to the file: writers open files in plain append mode (not as SWMR writer, which couldn't add the datasets
+    of new utterances), so a reader may see inconsistent data while a writer is active. Reopen the file after it was written.
+
+    The pool is fork-safe: in a forked child process the inherited files aren't used (nor closed), they are reopened lazily.
+
+    :param max_idle: Maximum number of unreferenced files to keep open.
+    """
+
+    def __init__(self, max_idle=64):
+        self.max_idle = max_idle
+
+        self._pid = os.getpid()
+        self._handles = {}
+        self._idle = collections.OrderedDict()
+        self._inherited = []
+
+    def acquire(self, path, mode=READ):
+        """
+        Add a reference on the file at the given path, which is opened in at least the given mode ('r', 'swmr' or 'a').
+        A file already opened read-only in one of the read modes is shared by both read modes.
+        """
+        self._check_process()
+
+        handle = self._handles.get(path)
+
+        if handle is None:
+            handle = _Handle(mode)
+            self._handles[path] = handle
+        elif self._idle.pop(path, None) is not None and handle.stat != _file_stat(path):
+            # The file was changed (or replaced) by someone else while unused
+            self._close_file(handle)
+
+        if mode == APPEND and handle.mode != APPEND:
+            self._close_file(handle)
+            handle.mode = APPEND
+
+        handle.references += 1
+
+    def release(self, path):
+        """ Remove a reference on the file at the given path. """
+        self._check_process()
+
+        handle = self._handles.get(path)
+
+        if handle is None or handle.references == 0:
+            return
+
+        handle.references -= 1
+
+        if handle.references > 0:
+            return
+
+        if handle.mode == APPEND or self.max_idle <= 0:
+            self._close_file(handle)
+            del self._handles[path]
+        else:
+            self._idle[path] = handle
+
+            while len(self._idle) > self.max_idle:
+                idle_path, idle_handle = self._idle.popitem(last=False)
+                self._close_file(idle_handle)
+                del self._handles[idle_path]
+
+    def file(self, path):
+        """ Return the open h5py file for the given path, None if there is no reference on the file. """
+        self._check_process()
+
+        handle = self._handles.get(path)
+
+        if handle is None or handle.references == 0:
+            return None
+
+        if handle.file is None:
+            if handle.mode != APPEND and not os.path.isfile(path):
+                # Containers are created on the first access
+                handle.mode = APPEND
+
+            if handle.mode == SWMR:
+                handle.file = h5py.File(path, READ, swmr=True, locking=False)
+            else:
+                handle.file = h5py.File(path, handle.mode)
+
+            handle.stat = _file_stat(path)
+
+        return handle.file
+
+    def references(self, path):
+        """ Return the number of references on the file at the given path. """
+        handle = self._handles.get(path)
+        return handle.references if handle is not None else 0
+
+    def is_open(self, path):
+        """ Return True if the file at the given path is open (referenced or idle). """
+        handle = self._handles.get(path)
+        return handle is not None and handle.file is not None
+
+    def close_idle(self):
+        """ Close all files without references. """
+        for path, handle in self._idle.items():
+            self._close_file(handle)
+            del self._handles[path]
+
+        self._idle.clear()
+
+    def _close_file(self, handle):
+        if handle.file is not None:
+            handle.file.close()
+            handle.file = None
+            handle.stat = None
+
+    def _check_process(self):
+        """ Detach from the files inherited from the parent process after a fork. """
+        pid = os.getpid()
+
+        if pid != self._pid:
+            # Keep the inherited h5py objects alive, so they aren't closed (and flushed) by the child
+            self._inherited.extend(handle.file for handle in self._handles.values() if handle.file is not None)
+
+            for handle in self._handles.values():
+                handle.file = None
+
+            for path in self._idle:
+                del self._handles[path]
+
+            self._idle.clear()
+            self._pid = pid
+
+
+def _file_stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+default_pool = HandlePool()
@@ -0,0 +1,178 @@
+import functools
+import multiprocessing
+
+import numpy as np
+
+
+class FeatureStatistics(object):
+    """
+    Per-dimension statistics (number of frames, min, max, mean and variance) of feature matrices, computed in one pass.
+    Matrices are added with :meth:`add`, statistics computed on different parts of the data (e.g. in worker processes)
+    are combined with :meth:`merge` (pairwise update of the mean and the sum of squared deviations, Chan et al.).
+    The values are accumulated in float64.
+
+    :param feature_size: Dimension of the features (if None, it is taken from the first added matrix).
+    """
+
+    def __init__(self, feature_size=None):
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.mean = None
+        self.m2 = None
+
+        if feature_size is not None:
+            self._reset(feature_size)
+
+    def _reset(self, feature_size):
+        self.count = 0
+        self.min = np.full(feature_size, np.inf)
+        self.max = np.full(feature_size, -np.inf)
+        self.mean = np.zeros(feature_size)
+        self.m2 = np.zeros(feature_size)
+
+    @property
+    def feature_size(self):
+        return self.mean.shape[0] if self.mean is not None else None
+
+    def add(self, feature_matrix):
+        """ Add the frames of the given matrix (num-frames x feature-size). """
+        feature_matrix = np.asarray(feature_matrix)
+
+        if feature_matrix.shape[0] == 0:
+            return
+
+        mean = np.mean(feature_matrix, axis=0, dtype=np.float64)
+        deviations = feature_matrix - mean
+        m2 = np.einsum('ij,ij->j', deviations, deviations)
+
+        self._merge(feature_matrix.shape[0], np.min(feature_matrix, axis=0), np.max(feature_matrix, axis=0), mean, m2)
+
+    def merge(self, other):
+        """ Add the statistics of another accumulator (e.g. of another part of the data) to this one. """
+        if other.count > 0:
+            self._merge(other.count, other.min, other.max, other.mean, other.m2)
+
+    def _merge(self, count, min, max, mean, m2):
+        if self.mean is None:
+            self._reset(mean.shape[0])
+        elif mean.shape[0] != self.mean.shape[0]:
+            raise ValueError('Statistics of features of size {} can not be combined with features of size {}.'.format(self.mean.shape[0],
+                                                                                                                      mean.shape[0]))
+
+        total = self.count + count
+        delta = mean - self.mean
+
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.min = np.minimum(self.min, min)
+        self.max = np.maximum(self.max, max)
+        self.count = total
+
+    @property
+    def var(self):
+        """ Return the per-dimension (population) variance. """
+        if self.count == 0:
+            return None
+
+        return self.m2 / self.count
+
+    @property
+    def std(self):
+        """ Return the per-dimension standard deviation. """
+        if self.count == 0:
+            return None
+
+        return np.sqrt(self.var)
+
+    def global_statistics(self):
+        """ Return the statistics over all values (of all dimensions) as tuple (min, max, mean, var, stdev). """
+        if self.count == 0:
+            return None
+
+        mean = np.mean(self.mean)
+        var = np.mean(self.var + (self.mean - mean) ** 2)
+
+        return np.min(self.min), np.max(self.max), mean, var, np.sqrt(var)
+
+
+def compute_statistics(feature_container, utterance_ids=None, num_workers=1, batch_size=64):
+    """
+    Compute the per-dimension statistics of the features in the container. Every matrix is read once.
+    With multiple workers, the container must not be open for writing (HDF5 files are locked by the writer).
+
+    :param feature_container: The feature container.
+    :param utterance_ids: Ids of the utterances to use (by default all utterances in the container).
+    :param num_workers: Number of processes. The utterances are split into batches, which are processed in parallel.
+    :param batch_size: Number of utterances to read at once.
+    :return: A :class:`FeatureStatistics`.
+    """
+    if utterance_ids is None:
+        feature_container.open(mode='r')
+
+        try:
+            utterance_ids = feature_container.keys()
+        finally:
+            feature_container.close()
+
+    groups = compute_group_statistics(feature_container, {utterance_idx: None for utterance_idx in utterance_ids},
+                                      num_workers=num_workers, batch_size=batch_size)
+
+    return groups.get(None, FeatureStatistics())
+
+
+def compute_group_statistics(feature_container, utterance_groups, num_workers=1, batch_size=64):
+    """
+    Compute the per-dimension statistics of groups of utterances (e.g. of every speaker) in one pass over the features
+    (see :func:`compute_statistics`).
+
+    :param feature_container: The feature container.
+    :param utterance_groups: Dictionary utterance-id/group-key of the utterances to use.
+    :param num_workers: Number of processes.
+    :param batch_size: Number of utterances to read at once.
+    :return: Dictionary group-key/:class:`FeatureStatistics` (groups without frames are missing).
+    """
+    utterance_ids = list(utterance_groups.keys())
+    batches = [[(utterance_idx, utterance_groups[utterance_idx]) for utterance_idx in utterance_ids[index:index + batch_size]]
+               for index in range(0, len(utterance_ids), batch_size)]
+
+    if num_workers > 1 and len(batches) > 1:
+        pool = multiprocessing.Pool(num_workers)
+        groups = {}
+
+        try:
+            # Pass every worker an equal part, so every process only reads (and opens) the container once per part
+            parts = [batches[index::num_workers] for index in range(num_workers)]
+
+            for part_groups in pool.imap_unordered(functools.partial(_accumulate, feature_container), parts):
+                for group, part_statistics in part_groups.items():
+                    groups.setdefault(group, FeatureStatistics()).merge(part_statistics)
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        groups = _accumulate(feature_container, batches)
+
+    return groups
+
+
+def _accumulate(feature_container, batches):
+    """ Return the statistics of the groups of the given batches of (utterance-id, group-key). """
+    groups = {}
+    feature_container.open(mode='r')
+
+    try:
+        for batch in batches:
+            frames, offsets = feature_container.get_many([utterance_idx for utterance_idx, group in batch], packed=True)
+
+            if len(set(group for utterance_idx, group in batch)) == 1:
+                groups.setdefault(batch[0][1], FeatureStatistics()).add(frames)
+                continue
+
+            for index, (utterance_idx, group) in enumerate(batch):
+                if offsets[index + 1] > offsets[index]:
+                    groups.setdefault(group, FeatureStatistics()).add(frames[offsets[index]:offsets[index + 1]])
+    finally:
+        feature_container.close()
+
+    return {group: statistics for group, statistics in groups.items() if statistics.count > 0}
@@ -60,7 +60,7 @@ def read_posteriors(rx_specifier, num_posts):
 
 def write_posteriors(ark_path, ds, feat_name):
     fc = ds.features[feat_name]
-    fc.open()
+    fc.open(mode='r')
 
     f = open(ark_path, 'wb')
 
@@ -93,7 +93,7 @@ def write_posteriors(ark_path, ds, feat_name):
 
 def write_likelihoods(ark_path, ds, feat_name, priors=None, floor_threshold=1e-4, floor_value=1e-20):
     fc = ds.features[feat_name]
-    fc.open()
+    fc.open(mode='r')
 
     f = open(ark_path, 'wb')
 
@@ -105,7 +105,7 @@ def write_likelihoods(ark_path, ds, feat_name, priors=None, floor_threshold=1e-4
         assert not np.isinf(feats).any(), "INF in feature matrix, {}".format(utt_id)
 
         if priors is not None:
-            feats += floor_value
+            feats = feats + floor_value
             feats = np.where(feats < floor_threshold, floor_value, feats)
             feats = np.log(feats)
             feats -= priors
@@ -25,6 +25,9 @@ def splice_features(features, splice_size=0, splice_step=1, repeat_border_frames
     else:
         padded_matrix = np.pad(features, ((splice_size, splice_size), (0, 0)), 'constant', constant_values=0)
 
+    # The strides below require a C-contiguous matrix
+    padded_matrix = np.ascontiguousarray(padded_matrix)
+
     new_shape = (num_splices, spliced_feature_size)
     new_strides = (padded_matrix.strides[0] * splice_step, padded_matrix.strides[1])
 
@@ -59,3 +62,28 @@ def unsplice_features(features, splice_size=0, splice_step=1):
     averaged_features = [np.average(x, 0) for x in grouped_features]
 
     return np.concatenate(averaged_features).reshape(-1, feature_size)
+
+
+def pack(matrices):
+    """
+    Pack a list of 2D arrays with the same number of columns into one frame buffer.
+
+    :param matrices: List of 2D np-arrays (nr_of_frames x feature_dimension).
+    :return: Tuple (2D np-array with all frames, 1D np-array offsets). The frames of the i-th matrix are frames[offsets[i]:offsets[i + 1]].
+    """
+    offsets = np.zeros(len(matrices) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([np.size(matrix, 0) for matrix in matrices])
+
+    if len(matrices) == 0:
+        return np.zeros((0, 0)), offsets
+
+    return np.concatenate(matrices, axis=0), offsets
+
+
+def unpack(frames, offsets):
+    """
+    Split a frame buffer packed with :func:`pack` into the single matrices.
+
+    :return: List of 2D np-arrays (views on the frame buffer).
+    """
+    return [frames[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
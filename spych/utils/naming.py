@@ -15,6 +15,9 @@ def index_name_if_in_list(name, name_list, suffix='', prefix=''):
     new_name = '{}'.format(name)
     index = 1
 
+    if isinstance(name_list, (list, tuple)):
+        name_list = set(name_list)
+
     while new_name in name_list:
         new_name = '{}_{}{}{}'.format(name, prefix, index, suffix)
         index+= 1
@@ -35,4 +38,56 @@ def generate_name(length=15, not_in=None):
     while (not_in is not None) and (value in not_in):
         value = ''.join(random.choice(string.ascii_lowercase) for i in range(length))
 
-    return value
\ No newline at end of file
+    return value
+
+
+class IdAllocator(object):
+    """
+    Generates unique ids of lowercase letters with a fixed length.
+
+    The ids are not drawn randomly but enumerated as ``(offset + n * stride) mod 26^length`` (with a stride coprime to 26^length),
+    so the allocator never produces the same id twice and only has to check candidates against existing ids, which is O(1)
+    for dicts, sets and key views. With the same seed the same sequence of ids is generated.
+
+    :param seed: Seed for offset and stride. If None a random one is used.
+    :param length: Length of the generated ids.
+    """
+
+    def __init__(self, seed=None, length=15):
+        self.length = length
+        self._space = len(string.ascii_lowercase) ** length
+
+        rng = random.Random(seed)
+        self._offset = rng.randrange(self._space)
+        self._stride = rng.randrange(1, self._space)
+
+        # 26 = 2 * 13, so the stride must not be divisible by 2 and 13
+        while self._stride % 2 == 0 or self._stride % 13 == 0:
+            self._stride = rng.randrange(1, self._space)
+
+        self._counter = 0
+
+    def _encode(self, number):
+        letters = []
+
+        for i in range(self.length):
+            number, remainder = divmod(number, len(string.ascii_lowercase))
+            letters.append(string.ascii_lowercase[remainder])
+
+        return ''.join(letters)
+
+    def generate(self, not_in=None):
+        """
+        Return the next id, which is not in the given container.
+
+        :param not_in: Container (ideally with O(1) membership checks) of ids to avoid.
+        :return: New id
+        """
+        value = self._encode((self._offset + self._counter * self._stride) % self._space)
+        self._counter += 1
+
+        while (not_in is not None) and (value in not_in):
+            value = self._encode((self._offset + self._counter * self._stride) % self._space)
+            self._counter += 1
+
+        return value
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from spych.audio import cache
+
+
+class SampleCacheTest(unittest.TestCase):
+    def test_get_and_put(self):
+        sample_cache = cache.SampleCache(max_bytes=1000)
+        key = sample_cache.key('a.wav', 0, -1, np.float32)
+
+        self.assertIsNone(sample_cache.get(key))
+
+        sample_cache.put(key, np.zeros(10, dtype=np.float32), 16000)
+        samples, sampling_rate = sample_cache.get(key)
+
+        self.assertEqual(10, samples.size)
+        self.assertEqual(16000, sampling_rate)
+        self.assertFalse(samples.flags.writeable)
+        self.assertEqual(1, sample_cache.hits)
+        self.assertEqual(1, sample_cache.misses)
+        self.assertEqual(40, sample_cache.num_bytes)
+
+    def test_evicts_least_recently_used(self):
+        sample_cache = cache.SampleCache(max_bytes=100)
+
+        sample_cache.put('a', np.zeros(10, dtype=np.float32), 16000)
+        sample_cache.put('b', np.zeros(10, dtype=np.float32), 16000)
+        sample_cache.get('a')
+        sample_cache.put('c', np.zeros(10, dtype=np.float32), 16000)
+
+        self.assertIn('a', sample_cache)
+        self.assertNotIn('b', sample_cache)
+        self.assertIn('c', sample_cache)
+        self.assertEqual(1, sample_cache.evictions)
+        self.assertEqual(80, sample_cache.num_bytes)
+
+    def test_too_large_signal_is_not_cached(self):
+        sample_cache = cache.SampleCache(max_bytes=10)
+        sample_cache.put('a', np.zeros(10, dtype=np.float32), 16000)
+
+        self.assertEqual(0, len(sample_cache))
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import scipy.io.wavfile
+import librosa
+
+from spych.audio import mapped
+
+from tests.data import resources
+
+
+class MappedWavTest(unittest.TestCase):
+    def setUp(self):
+        self.wav_path = resources.get_wav_file_path('wav_1.wav')
+
+    def test_header(self):
+        wav = mapped.MappedWav(self.wav_path)
+
+        self.assertEqual(16000, wav.sampling_rate)
+        self.assertEqual(1, wav.num_channels)
+        self.assertEqual(np.int16, wav.dtype)
+        self.assertAlmostEqual(2.5951875, wav.duration)
+
+    def test_read_equals_librosa(self):
+        wav = mapped.MappedWav(self.wav_path)
+
+        expected, __ = librosa.core.load(self.wav_path, sr=None, offset=0.3, duration=1.2)
+        samples = wav.read(start=0.3, end=1.5)
+
+        self.assertEqual(np.float32, samples.dtype)
+        self.assertTrue(np.array_equal(expected, samples))
+
+        expected, __ = librosa.core.load(self.wav_path, sr=None, offset=1.1)
+        self.assertTrue(np.array_equal(expected, wav.read(start=1.1)))
+
+    def test_read_without_conversion_is_view(self):
+        wav = mapped.MappedWav(self.wav_path)
+        samples = wav.read(start=0.5, end=1.0, as_float=False)
+
+        self.assertEqual(np.int16, samples.dtype)
+        self.assertEqual(8000, samples.size)
+        self.assertIsNotNone(samples.base)
+
+    def test_read_stereo_is_averaged(self):
+        temp_path = tempfile.mkdtemp()
+        path = os.path.join(temp_path, 'stereo.wav')
+        scipy.io.wavfile.write(path, 8000, np.array([[1000, 3000], [-2000, 0]], dtype=np.int16))
+
+        wav = mapped.MappedWav(path)
+
+        self.assertEqual(2, wav.num_channels)
+        self.assertTrue(np.allclose([2000 / 32768, -1000 / 32768], wav.read()))
+
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+    def test_non_wav_file_raises(self):
+        with self.assertRaises(ValueError):
+            mapped.MappedWav(os.path.join(os.path.dirname(self.wav_path), os.pardir, '__init__.py'))
+
+
+class MappedWavCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.paths = [os.path.join(self.temp_path, 'wav_{}.wav'.format(index)) for index in range(3)]
+
+        for path in self.paths:
+            scipy.io.wavfile.write(path, 8000, np.arange(100, dtype=np.int16))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path, ignore_errors=True)
+
+    def test_get_returns_cached_file(self):
+        cache = mapped.MappedWavCache(max_files=2)
+        wav = cache.get(self.paths[0])
+
+        self.assertIs(wav, cache.get(self.paths[0]))
+        self.assertDictEqual({'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1}, cache.stats())
+
+    def test_evicted_file_is_closed(self):
+        cache = mapped.MappedWavCache(max_files=2)
+        wav = cache.get(self.paths[0])
+        view = wav.read(as_float=False)
+
+        cache.get(self.paths[1])
+        cache.get(self.paths[2])
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.stats()['evictions'])
+        self.assertEqual(0, wav.num_frames)
+        self.assertListEqual(list(range(100)), view.tolist())
+        self.assertIsNot(wav, cache.get(self.paths[0]))
+
+    def test_changed_file_is_mapped_again(self):
+        cache = mapped.MappedWavCache()
+        self.assertEqual(100, cache.get(self.paths[0]).num_frames)
+
+        scipy.io.wavfile.write(self.paths[0], 8000, np.arange(50, dtype=np.int16))
+
+        self.assertEqual(50, cache.get(self.paths[0]).num_frames)
+
+    def test_non_wav_file_is_none(self):
+        path = os.path.join(self.temp_path, 'text.wav')
+
+        with open(path, 'w') as f:
+            f.write('no wav')
+
+        cache = mapped.MappedWavCache()
+
+        self.assertIsNone(cache.get(path))
+        self.assertIsNone(cache.get(path))
+        self.assertEqual(1, cache.stats()['hits'])
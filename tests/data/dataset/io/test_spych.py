@@ -3,6 +3,7 @@ import shutil
 import tempfile
 import unittest
 
+from spych.data.dataset.io import snapshot
 from spych.data.dataset.io import spych
 from spych.data import speaker
 
@@ -56,6 +57,8 @@ class SpychDatasetLoaderTest(unittest.TestCase):
 
         view = loaded_dataset.subviews['train']
 
+        self.assertFalse(view.materialized)
+
         self.assertSetEqual(set(['file-2', 'file-3']), set(view.files.keys()))
         self.assertSetEqual(set(['utt-2', 'utt-4']), set(view.utterances.keys()))
         self.assertSetEqual(set(['speaker-1', 'speaker-2']), set(view.speakers.keys()))
@@ -88,4 +91,154 @@ class SpychDatasetLoaderTest(unittest.TestCase):
         self.assertIn('segmentation_text.txt', os.listdir(path))
         self.assertIn('subview_sv.txt', os.listdir(path))
 
-        shutil.rmtree(path, ignore_errors=True)
\ No newline at end of file
+        shutil.rmtree(path, ignore_errors=True)
+
+    def test_save_and_load_feature_storage_options(self):
+        ds = resources.create_dataset()
+        ds.create_feature_container('mfcc', compression='gzip', compression_level=4, shuffle=True, dtype='float16')
+        ds.create_feature_container('fbank')
+
+        self.loader.save(ds, ds.path)
+
+        with open(os.path.join(ds.path, 'features.txt'), 'r') as f:
+            self.assertIn('mfcc features_mfcc compression=gzip compression_level=4 dtype=float16 shuffle=True\n', f.read())
+
+        loaded = self.loader.load(ds.path)
+
+        self.assertDictEqual({'compression': 'gzip', 'compression_level': 4, 'shuffle': True, 'dtype': 'float16'},
+                             loaded.features['mfcc'].storage_options())
+        self.assertDictEqual({}, loaded.features['fbank'].storage_options())
+        self.assertEqual(os.path.join(ds.path, 'features_fbank'), loaded.features['fbank'].path)
+
+        shutil.rmtree(ds.path, ignore_errors=True)
+
+    def test_save_writes_snapshot(self):
+        ds = resources.create_dataset()
+        path = tempfile.mkdtemp()
+
+        self.loader.save(ds, path)
+
+        self.assertIn('.snapshot', os.listdir(path))
+        self.assertTrue(snapshot.is_up_to_date(path, spych.SpychDatasetLoader._snapshot_source_paths(path)))
+
+        shutil.rmtree(path, ignore_errors=True)
+
+    def test_load_from_snapshot(self):
+        ds = resources.create_dataset()
+        path = tempfile.mkdtemp()
+
+        self.loader.save(ds, path)
+
+        from_snapshot = self.loader.load(path)
+        from_text = spych.SpychDatasetLoader(use_snapshot=False).load(path)
+
+        self.assertSetEqual(set(from_text.files.keys()), set(from_snapshot.files.keys()))
+        self.assertEqual(from_text.files['wav_3'].path, from_snapshot.files['wav_3'].path)
+        self.assertSetEqual(set(from_text.utterances.keys()), set(from_snapshot.utterances.keys()))
+        self.assertEqual(15, from_snapshot.utterances['utt-4'].start)
+        self.assertEqual(25, from_snapshot.utterances['utt-4'].end)
+        self.assertEqual('spk-2', from_snapshot.utterances['utt-4'].speaker_idx)
+        self.assertEqual('who are they', from_snapshot.segmentations['utt-4']['text'].to_text())
+        self.assertEqual(1, from_snapshot.num_subviews)
+
+        shutil.rmtree(path, ignore_errors=True)
+
+    def test_snapshot_and_text_load_the_same_dataset(self):
+        ds = resources.create_dataset()
+        ds.add_utterance('wav_2', utterance_idx='utt-no-speaker')
+        ds.add_segmentation('utt-no-speaker', segments='without speaker')
+        path = tempfile.mkdtemp()
+
+        self.loader.save(ds, path)
+
+        def content(loaded):
+            utterances = sorted((utt.idx, utt.file_idx, utt.speaker_idx, utt.start, utt.end) for utt in loaded.utterances.values())
+            segmentations = sorted((utt_idx, key, segmentation.to_text()) for utt_idx, utt_segmentations in loaded.segmentations.items()
+                                   for key, segmentation in utt_segmentations.items())
+            files = sorted((file.idx, file.path) for file in loaded.files.values())
+
+            return utterances, segmentations, files
+
+        from_snapshot = content(self.loader.load(path))
+        from_text = content(spych.SpychDatasetLoader(use_snapshot=False).load(path))
+
+        self.assertEqual(from_text, from_snapshot)
+        self.assertIn(('utt-no-speaker', 'wav_2', None, 0, -1), from_snapshot[0])
+        self.assertEqual(content(ds)[:2], from_snapshot[:2])
+
+        shutil.rmtree(path, ignore_errors=True)
+
+    def test_snapshot_strings_with_newlines(self):
+        path = tempfile.mkdtemp()
+        files = {'file\n1': 'audio/a\nb.wav', 'file-2': 'audio/ü.wav'}
+
+        snapshot.write(path, files, [], {}, [])
+
+        self.assertEqual((['file\n1', 'file-2'], ['audio/a\nb.wav', 'audio/ü.wav']), snapshot.read(path).files())
+
+        shutil.rmtree(path, ignore_errors=True)
+
+    def test_snapshot_is_ignored_after_text_files_changed(self):
+        ds = resources.create_dataset()
+        path = tempfile.mkdtemp()
+
+        self.loader.save(ds, path)
+
+        with open(os.path.join(path, 'utterances.txt'), 'a', encoding='utf-8') as f:
+            f.write('\nutt-6 wav_2 0 1')
+
+        with open(os.path.join(path, 'utt2spk.txt'), 'a', encoding='utf-8') as f:
+            f.write('\nutt-6 spk-2')
+
+        self.assertFalse(snapshot.is_up_to_date(path, spych.SpychDatasetLoader._snapshot_source_paths(path)))
+
+        loaded_dataset = self.loader.load(path)
+
+        self.assertIn('utt-6', loaded_dataset.utterances.keys())
+
+        shutil.rmtree(path, ignore_errors=True)
+
+    def test_load_lazy_segmentations(self):
+        loaded_dataset = spych.SpychDatasetLoader(lazy_segmentations=True).load(self.test_path)
+        sources = loaded_dataset.segmentations._sources
+
+        self.assertSetEqual(set(['text', 'raw_text']), loaded_dataset.all_segmentation_keys)
+        self.assertIsNone(sources['text']._ranges)
+
+        seg = loaded_dataset.segmentations['utt-4']['text']
+
+        self.assertIsNotNone(sources['text']._ranges)
+        self.assertIsNone(sources['raw_text']._ranges)
+
+        self.assertEqual('utt-4', seg.utterance_idx)
+        self.assertEqual('who are they', seg.to_text())
+        self.assertEqual(3.5, seg.segments[2].start)
+        self.assertEqual(4.2, seg.segments[2].end)
+        self.assertIs(seg, loaded_dataset.segmentations['utt-4']['text'])
+
+        self.assertEqual('who, is she?', loaded_dataset.segmentations['utt-5']['raw_text'].to_text())
+
+    def test_lazy_segmentations_remove_utterance(self):
+        loaded_dataset = spych.SpychDatasetLoader(lazy_segmentations=True).load(self.test_path)
+
+        loaded_dataset.remove_utterances(['utt-2'])
+
+        self.assertNotIn('utt-2', loaded_dataset.segmentations)
+        self.assertEqual(4, len(loaded_dataset.segmentations))
+        self.assertSetEqual(set(['text', 'raw_text']), set(loaded_dataset.segmentations['utt-3'].keys()))
+
+    def test_save_lazy_segmentations(self):
+        path = tempfile.mkdtemp()
+        self.loader.save(resources.create_dataset(), path)
+
+        loaded_dataset = spych.SpychDatasetLoader(lazy_segmentations=True).load(path)
+        loaded_dataset.add_segmentation('utt-2', segments='new words', key='text')
+        loaded_dataset.save()
+
+        saved_dataset = spych.SpychDatasetLoader(use_snapshot=False).load(path)
+
+        self.assertEqual(5, len(saved_dataset.segmentations))
+        self.assertEqual('new words', saved_dataset.segmentations['utt-2']['text'].to_text())
+        self.assertEqual('who are they', saved_dataset.segmentations['utt-4']['text'].to_text())
+
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,156 @@
+import copy
+import shutil
+import tempfile
+import unittest
+
+from spych import data
+from spych.data import dataset
+from spych.data.dataset import columnar
+from spych.data.dataset.io import spych
+
+from tests.data import resources
+
+
+class UtteranceTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = columnar.UtteranceTable(capacity=2)
+        self.table['utt-1'] = data.Utterance('utt-1', 'file-1', speaker_idx='spk-1', start=0, end=2.5)
+        self.table['utt-2'] = data.Utterance('utt-2', 'file-1', speaker_idx='spk-1', start=2.5, end=4)
+        self.table['utt-3'] = data.Utterance('utt-3', 'file-2', speaker_idx='spk-2')
+        self.table['utt-4'] = data.Utterance('utt-4', 'file-3', speaker_idx='spk-2', start=1, end=7)
+
+    def test_mapping_interface(self):
+        self.assertEqual(4, len(self.table))
+        self.assertListEqual(['utt-1', 'utt-2', 'utt-3', 'utt-4'], list(self.table.keys()))
+        self.assertIn('utt-3', self.table)
+
+        utt = self.table['utt-2']
+
+        self.assertIsInstance(utt, data.Utterance)
+        self.assertEqual('utt-2', utt.idx)
+        self.assertEqual('file-1', utt.file_idx)
+        self.assertEqual('spk-1', utt.speaker_idx)
+        self.assertEqual(2.5, utt.start)
+        self.assertEqual(4, utt.end)
+
+    def test_view_writes_through(self):
+        self.table['utt-3'].speaker_idx = 'spk-3'
+        self.table['utt-3'].end = 3
+
+        self.assertEqual('spk-3', self.table['utt-3'].speaker_idx)
+        self.assertEqual(3, self.table['utt-3'].end)
+        self.assertEqual(self.table['utt-3'], self.table['utt-3'])
+        self.assertListEqual(['utt-3'], self.table.utterance_ids_of_speaker('spk-3'))
+
+    def test_view_id_is_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.table['utt-1'].idx = 'utt-9'
+
+    def test_delete_and_compact(self):
+        del self.table['utt-2']
+
+        self.assertNotIn('utt-2', self.table)
+        self.assertEqual(3, len(self.table))
+
+        self.table.compact()
+
+        self.assertListEqual(['utt-1', 'utt-3', 'utt-4'], list(self.table.keys()))
+        self.assertEqual('file-3', self.table['utt-4'].file_idx)
+        self.assertListEqual(['utt-3', 'utt-4'], self.table.utterance_ids_of_speaker('spk-2'))
+
+    def test_deepcopy_of_view_is_detached(self):
+        utt = copy.deepcopy(self.table['utt-1'])
+
+        self.assertIs(data.Utterance, type(utt))
+        self.assertEqual('utt-1', utt.idx)
+        self.assertEqual(2.5, utt.end)
+
+    def test_total_duration_per_speaker(self):
+        durations = self.table.total_duration_per_speaker()
+
+        self.assertDictEqual({'spk-1': 4.0, 'spk-2': 6.0}, durations)
+
+    def test_filter_by_duration(self):
+        self.assertListEqual(['utt-1', 'utt-4'], self.table.filter_by_duration(min_duration=2))
+        self.assertListEqual(['utt-2'], self.table.filter_by_duration(max_duration=2))
+
+    def test_subset(self):
+        subset = self.table.subset(['utt-4', 'utt-1'])
+
+        self.assertListEqual(['utt-4', 'utt-1'], list(subset.keys()))
+        self.assertEqual('spk-2', subset['utt-4'].speaker_idx)
+
+
+class ColumnarDatasetTest(unittest.TestCase):
+    def setUp(self):
+        self.dataset = dataset.Dataset(tempfile.mkdtemp(), columnar=True)
+        self.dataset.add_file(resources.get_wav_file_path('wav_1.wav'), file_idx='wav_1')
+        self.dataset.add_speaker(speaker_idx='spk-1')
+        self.dataset.add_utterance('wav_1', utterance_idx='utt-1', speaker_idx='spk-1', start=0, end=1.5)
+        self.dataset.add_utterance('wav_1', utterance_idx='utt-2', speaker_idx='spk-1', start=1.5, end=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.dataset.path, ignore_errors=True)
+
+    def test_add_utterance_returns_view(self):
+        utt = self.dataset.add_utterance('wav_1', utterance_idx='utt-3')
+
+        self.assertIsInstance(utt, columnar.UtteranceView)
+        self.assertEqual(utt, self.dataset.utterances['utt-3'])
+
+    def test_utterances_of_speaker(self):
+        self.assertSetEqual(set(['utt-1', 'utt-2']), set([utt.idx for utt in self.dataset.utterances_of_speaker('spk-1')]))
+
+    def test_duration_queries(self):
+        dict_dataset = dataset.Dataset(self.dataset.path)
+        dict_dataset.add_file(resources.get_wav_file_path('wav_1.wav'), file_idx='wav_1')
+        dict_dataset.add_speaker(speaker_idx='spk-1')
+
+        for utt in self.dataset.utterances.values():
+            dict_dataset.import_utterance(utt)
+
+        for ds in (self.dataset, dict_dataset):
+            ds.add_utterance('wav_1', utterance_idx='utt-3')
+            utterance_ids, durations = ds.utterance_durations()
+
+            self.assertListEqual(['utt-1', 'utt-2', 'utt-3'], utterance_ids)
+            self.assertListEqual([1.5, 0.5], durations[:2].tolist())
+            self.assertListEqual(['utt-1'], ds.filter_utterances_by_duration(min_duration=1))
+            self.assertDictEqual({'spk-1': 2.0}, ds.total_duration_per_speaker())
+
+    def test_removed_utterances_can_be_saved_and_loaded(self):
+        imp_dataset = resources.create_dataset()
+        self.dataset.import_dataset(imp_dataset)
+        self.dataset.subdivide_speakers(5)
+        removed_utterance_idx = sorted(self.dataset.segmentations.keys())[0]
+        self.dataset.remove_utterances([removed_utterance_idx])
+        self.dataset.remove_files(['wav_3'])
+
+        remaining_utterance_ids = set(self.dataset.utterances.keys())
+
+        self.assertNotIn(removed_utterance_idx, remaining_utterance_ids)
+        self.assertTrue(all(utt.file_idx != 'wav_3' for utt in self.dataset.utterances.values()))
+        self.assertTrue(set(self.dataset.segmentations.keys()).issubset(remaining_utterance_ids))
+
+        path = tempfile.mkdtemp()
+        self.dataset.save_at(path)
+
+        for use_snapshot in (True, False):
+            loaded = spych.SpychDatasetLoader(use_snapshot=use_snapshot).load(path)
+
+            self.assertSetEqual(remaining_utterance_ids, set(loaded.utterances.keys()))
+            self.assertSetEqual(set(self.dataset.segmentations.keys()), set(loaded.segmentations.keys()))
+
+        shutil.rmtree(path, ignore_errors=True)
+        shutil.rmtree(imp_dataset.path, ignore_errors=True)
+
+    def test_subview_keeps_order_of_table(self):
+        self.dataset.add_utterance('wav_1', utterance_idx='utt-0', speaker_idx='spk-1')
+        view = dataset.Subview(filtered_utterances=set(['utt-0', 'utt-2', 'utt-1']), dataset=self.dataset, materialized=True)
+
+        self.assertListEqual(['utt-1', 'utt-2', 'utt-0'], list(view.utterances.keys()))
+
+    def test_remove_files(self):
+        self.dataset.remove_files(['wav_1'])
+
+        self.assertEqual(0, self.dataset.num_utterances)
@@ -1,8 +1,18 @@
+import json
 import os
 import shutil
+import tempfile
 import unittest
 
+import numpy as np
+
+from spych.audio import cache
+from spych import data
+from spych.data import dataset
 from spych.data.dataset import subview
+from spych.data.features import cmvn
+from spych.data.features import pipeline
+from spych.data.features.pipeline import extraction
 
 from tests.data import resources
 
@@ -29,6 +39,66 @@ class DatasetTest(unittest.TestCase):
         self.assertSetEqual(set(['wav_2', 'wav_3']), set(exp_set.files.keys()))
         self.assertSetEqual(filtered_utts, set(exp_set.utterances.keys()))
         self.assertSetEqual(set([self.dataset.utterances['utt-2'].speaker_idx, 'spk-2']), set(exp_set.speakers.keys()))
+        self.assertSetEqual(set(['utt-4']), set([utt.idx for utt in exp_set.utterances_of_speaker('spk-2')]))
+
+    def test_export_subview_shared(self):
+        filtered_utts = set(['utt-2', 'utt-4'])
+        self.dataset.add_subview('test', subview.Subview(filtered_utterances=filtered_utts))
+
+        exp_set = self.dataset.export_subview('test', shared=True)
+
+        self.assertSetEqual(set(['wav_2', 'wav_3']), set(exp_set.files.keys()))
+        self.assertSetEqual(filtered_utts, set(exp_set.utterances.keys()))
+        self.assertIs(self.dataset.utterances['utt-4'], exp_set.utterances['utt-4'])
+        self.assertSetEqual(set(['utt-4']), set([utt.idx for utt in exp_set.utterances_in_file('wav_3')]))
+
+    def test_export_subview_shared_copies_on_write(self):
+        self.dataset.add_subview('test', subview.Subview(filtered_utterances=set(['utt-2', 'utt-4'])))
+
+        exp_set = self.dataset.export_subview('test', shared=True)
+        exp_set.set_speaker_of_utterance('utt-4', 'spk-3')
+        exp_set.add_segmentation('utt-2', segments='a b', key='other')
+
+        self.assertEqual('spk-3', exp_set.utterances['utt-4'].speaker_idx)
+        self.assertEqual('spk-2', self.dataset.utterances['utt-4'].speaker_idx)
+        self.assertNotIn('other', self.dataset.segmentations['utt-2'])
+
+    def test_export_subview_shared_mutators_dont_change_parent(self):
+        def state(ds):
+            return (
+                sorted(ds.files.keys()),
+                sorted((utt.idx, utt.file_idx, utt.speaker_idx, utt.start, utt.end) for utt in ds.utterances.values()),
+                sorted(ds.speakers.keys()),
+                sorted((utt_idx, key, seg.to_text()) for utt_idx, segs in ds.segmentations.items() for key, seg in segs.items())
+            )
+
+        mutators = {
+            'add_file': lambda ds: ds.add_file(resources.get_wav_file_path('wav_1.wav'), file_idx='wav_new'),
+            'remove_files': lambda ds: ds.remove_files(['wav_3']),
+            'add_utterance': lambda ds: ds.add_utterance('wav_2', utterance_idx='utt-new'),
+            'add_utterances': lambda ds: ds.add_utterances(['wav_2'], utterance_ids=['utt-new']),
+            'remove_utterances': lambda ds: ds.remove_utterances(['utt-2']),
+            'set_speaker_of_utterance': lambda ds: ds.set_speaker_of_utterance('utt-4', 'spk-3'),
+            'add_speaker': lambda ds: ds.add_speaker(speaker_idx='spk-new'),
+            'import_speaker': lambda ds: ds.import_speaker(data.Speaker('spk-new')),
+            'add_segmentation': lambda ds: ds.add_segmentation('utt-2', segments='a b', key='new'),
+            'add_segmentations': lambda ds: ds.add_segmentations(['utt-2', 'utt-4'], ['a', 'b'], key='new'),
+            'import_segmentation': lambda ds: ds.import_segmentation(data.Segmentation.from_text('a b', utterance_idx='utt-4', key='new')),
+            'subdivide_speakers': lambda ds: ds.subdivide_speakers(3)
+        }
+
+        for name, mutate in mutators.items():
+            with self.subTest(mutator=name):
+                self.dataset.add_subview('m', subview.Subview(filtered_utterances=['utt-2', 'utt-4'], materialized=True))
+                parent_state = state(self.dataset)
+                subview_state = state(self.dataset.subviews['m'])
+
+                exp_set = self.dataset.export_subview('m', shared=True)
+                mutate(exp_set)
+
+                self.assertNotEqual(subview_state, state(exp_set))
+                self.assertEqual(parent_state, state(self.dataset))
+                self.assertEqual(subview_state, state(self.dataset.subviews['m']))
 
     #
     #   File
@@ -50,6 +120,25 @@ class DatasetTest(unittest.TestCase):
         self.assertEqual('file_id_1', file_obj.idx)
         self.assertEqual(file_obj, self.dataset.files[file_obj.idx])
 
+    def test_generated_ids_with_seed_are_reproducible(self):
+        ds_a = dataset.Dataset(id_seed=11)
+        ds_b = dataset.Dataset(id_seed=11)
+
+        file_a = ds_a.add_file(resources.get_wav_file_path('wav_1.wav'))
+        file_b = ds_b.add_file(resources.get_wav_file_path('wav_1.wav'))
+
+        self.assertEqual(file_a.idx, file_b.idx)
+        self.assertEqual(ds_a.add_speaker().idx, ds_b.add_speaker().idx)
+
+    def test_add_files(self):
+        file_objs = self.dataset.add_files([resources.get_wav_file_path('wav_1.wav'), resources.get_wav_file_path('wav_2.wav')],
+                                           file_ids=['wav_10', 'wav_2'])
+
+        self.assertEqual('wav_10', file_objs[0].idx)
+        self.assertNotEqual('wav_2', file_objs[1].idx)
+        self.assertEqual(resources.get_wav_file_path('wav_2.wav'), self.dataset.files[file_objs[1].idx].path)
+        self.assertEqual(6, self.dataset.num_files)
+
     def test_add_file_with_copy(self):
         wav_path = resources.get_wav_file_path('wav_1.wav')
         file_obj = self.dataset.add_file(wav_path, copy_file=True)
@@ -84,12 +173,82 @@ class DatasetTest(unittest.TestCase):
         self.assertEqual(2, len(self.dataset.utterances_of_speaker('spk-2')))
         self.assertEqual(1, len(self.dataset.utterances_of_speaker('spk-3')))
 
+    def test_utterances_in_file_after_remove(self):
+        self.dataset.remove_utterances(['utt-3'])
+
+        self.assertSetEqual(set(['utt-4']), set([utt.idx for utt in self.dataset.utterances_in_file('wav_3')]))
+
+    def test_utterances_of_speaker_after_add(self):
+        utt_obj = self.dataset.add_utterance('wav_4', speaker_idx='spk-3')
+
+        self.assertIn(utt_obj, self.dataset.utterances_of_speaker('spk-3'))
+        self.assertEqual(2, len(self.dataset.utterances_of_speaker('spk-3')))
+
+    def test_set_speaker_of_utterance(self):
+        self.dataset.set_speaker_of_utterance('utt-3', 'spk-3')
+
+        self.assertEqual('spk-3', self.dataset.utterances['utt-3'].speaker_idx)
+        self.assertEqual(1, len(self.dataset.utterances_of_speaker('spk-2')))
+        self.assertEqual(2, len(self.dataset.utterances_of_speaker('spk-3')))
+
+    def test_speaker_to_utterance_dict(self):
+        spk2utt = self.dataset.speaker_to_utterance_dict()
+
+        self.assertEqual(3, len(spk2utt))
+        self.assertSetEqual(set(['utt-3', 'utt-4']), set([utt.idx for utt in spk2utt[self.dataset.speakers['spk-2']]]))
+
     def test_add_utterance(self):
         utt_obj = self.dataset.add_utterance('wav_2')
 
         self.assertEqual('wav_2', utt_obj.file_idx)
         self.assertEqual(utt_obj, self.dataset.utterances[utt_obj.idx])
 
+    def test_add_utterances(self):
+        utts = self.dataset.add_utterances(['wav_2', 'wav_3'], utterance_ids=['utt-10', 'utt-2'], speaker_ids=['spk-2', None],
+                                           starts=[0.5, None], ends=['1.5', None])
+
+        self.assertEqual(2, len(utts))
+        self.assertEqual('utt-10', utts[0].idx)
+        self.assertNotEqual('utt-2', utts[1].idx)
+        self.assertEqual(0.5, utts[0].start)
+        self.assertEqual(1.5, utts[0].end)
+        self.assertEqual(0, utts[1].start)
+        self.assertEqual(-1, utts[1].end)
+        self.assertIn(utts[0], self.dataset.utterances_of_speaker('spk-2'))
+        self.assertIn(utts[1], self.dataset.utterances_in_file('wav_3'))
+
+    def test_add_utterances_with_missing_file(self):
+        with self.assertRaises(ValueError):
+            self.dataset.add_utterances(['wav_2', 'wav_99'], utterance_ids=['utt-10', 'utt-11'])
+
+        self.assertNotIn('utt-10', self.dataset.utterances)
+
+    def test_read_utterances_data(self):
+        self.dataset.add_utterance('wav_2', utterance_idx='utt-10', start=0.3, end=1.2)
+        self.dataset.add_utterance('wav_2', utterance_idx='utt-11', start=1.0, end=2.1)
+        self.dataset.add_utterance('wav_2', utterance_idx='utt-12', start=0.5)
+
+        utt_ids = ['utt-10', 'utt-2', 'utt-11', 'utt-12']
+        result = {utt_idx: (samples, sr) for utt_idx, samples, sr in self.dataset.read_utterances_data(utt_ids)}
+
+        self.assertSetEqual(set(utt_ids), set(result.keys()))
+
+        for utt_idx in utt_ids:
+            samples, sr = self.dataset.read_utterance_data(utt_idx)
+            self.assertEqual(sr, result[utt_idx][1])
+            self.assertTrue(np.array_equal(samples, result[utt_idx][0]))
+
+    def test_read_utterance_data_with_sample_cache(self):
+        self.dataset.sample_cache = cache.SampleCache()
+
+        samples, __ = self.dataset.read_utterance_data('utt-2')
+        cached_samples, __ = self.dataset.read_utterance_data('utt-2')
+        __ = [x for x in self.dataset.read_utterances_data(['utt-2', 'utt-3'])]
+
+        self.assertIs(samples, cached_samples)
+        self.assertEqual(2, self.dataset.sample_cache.hits)
+        self.assertEqual(2, self.dataset.sample_cache.misses)
+
     def test_remove_utterances(self):
         self.dataset.remove_utterances(['utt-2', 'utt-4'])
 
@@ -130,10 +289,54 @@ class DatasetTest(unittest.TestCase):
 
         self.assertEqual(seg_obj, self.dataset.segmentations[utt_obj.idx][seg_obj.key])
 
+    def test_add_segmentations(self):
+        seg_objs = self.dataset.add_segmentations(['utt-3', 'utt-2'], ['who am i', 'you'], key='other')
+
+        self.assertEqual(2, len(seg_objs))
+        self.assertEqual(3, len(self.dataset.segmentations['utt-3']['other'].segments))
+        self.assertEqual('you', self.dataset.segmentations['utt-2']['other'].segments[0].value)
+
+    def test_add_segmentations_with_missing_utterance(self):
+        with self.assertRaises(ValueError):
+            self.dataset.add_segmentations(['utt-3', 'utt-99'], ['who am i', 'you'], key='other')
+
+        self.assertNotIn('other', self.dataset.segmentations['utt-3'])
+
     #
     #   Div
     #
 
+    def test_subdivide_speakers(self):
+        self.dataset.subdivide_speakers(4)
+
+        self.assertEqual(4, self.dataset.num_speakers)
+        self.assertEqual(5, self.dataset.num_utterances)
+        self.assertEqual(5, len(self.dataset.segmentations))
+
+        for speaker_idx in self.dataset.speakers.keys():
+            self.assertGreater(len(self.dataset.utterances_of_speaker(speaker_idx)), 0)
+
+        for utt_idx, utt in self.dataset.utterances.items():
+            self.assertIn(utt, self.dataset.utterances_of_speaker(utt.speaker_idx))
+            self.assertIn(utt, self.dataset.utterances_in_file(utt.file_idx))
+
+    def test_index_queries_after_direct_modification(self):
+        utt4 = self.dataset.utterances['utt-4']
+        utt4.idx = 'utt-4-imp'
+        self.dataset.utterances[utt4.idx] = utt4
+        del self.dataset.utterances['utt-4']
+
+        # The direct changes aren't indexed, removed utterances are skipped
+        self.assertSetEqual(set(['utt-3']), set(utt.idx for utt in self.dataset.utterances_of_speaker('spk-2')))
+        self.assertSetEqual(set(['utt-3']), set(utt.idx for utt in self.dataset.utterances_in_file('wav_3')))
+        self.assertListEqual(['utt-3'], [utt.idx for utt in self.dataset.speaker_to_utterance_dict()[self.dataset.speakers['spk-2']]])
+
+        # Changes through the methods of the dataset are indexed
+        self.dataset.remove_utterances(['utt-4-imp'])
+        self.dataset.add_utterance('wav_3', utterance_idx='utt-4-imp', speaker_idx='spk-2', start=15, end=25)
+
+        self.assertSetEqual(set(['utt-3', 'utt-4-imp']), set(utt.idx for utt in self.dataset.utterances_of_speaker('spk-2')))
+
     def test_import_dataset(self):
         imp_dataset = resources.create_dataset()
         utt4 = imp_dataset.utterances['utt-4']
@@ -161,3 +364,119 @@ class DatasetTest(unittest.TestCase):
         self.assertEqual(25, self.dataset.utterances['utt-4-imp'].end)
 
         shutil.rmtree(imp_dataset.path, ignore_errors=True)
+
+
+class GenerateFeaturesTest(unittest.TestCase):
+    def setUp(self):
+        self.dataset = dataset.Dataset(tempfile.mkdtemp())
+        self.dataset.add_file(resources.get_wav_file_path('wav_1.wav'), file_idx='wav_1')
+        self.dataset.add_file(resources.get_wav_file_path('wav_2.wav'), file_idx='wav_2')
+        self.dataset.add_utterance('wav_1', utterance_idx='utt-1', start=0, end=1.2)
+        self.dataset.add_utterance('wav_1', utterance_idx='utt-2', start=1.2)
+        self.dataset.add_utterance('wav_2', utterance_idx='utt-3')
+
+        self.pipeline = pipeline.Pipeline(extract_stage=extraction.SpectrumExtractionStage(win_length=400, win_step=160))
+
+    def tearDown(self):
+        shutil.rmtree(self.dataset.path, ignore_errors=True)
+
+    def test_generate_features_with_workers(self):
+        progress = []
+
+        self.dataset.generate_features(self.pipeline, 'single')
+        self.dataset.generate_features(self.pipeline, 'parallel', num_workers=2, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertListEqual([(2, 3), (3, 3)], progress)
+
+        for utt_id in ['utt-1', 'utt-2', 'utt-3']:
+            self.assertTrue(np.array_equal(self.dataset.get_features(utt_id, 'single'), self.dataset.get_features(utt_id, 'parallel')))
+
+    def test_generate_features_profile(self):
+        self.pipeline.stages = [pipeline.LogStage()]
+
+        profile = self.dataset.generate_features(self.pipeline, 'spec', num_workers=2, profile=True)
+
+        self.assertEqual(3, profile.stages['extract SpectrumExtractionStage']['calls'])
+        self.assertEqual(3, profile.stages['0 LogStage']['calls'])
+        self.assertEqual(201, profile.stages['0 LogStage']['output_shape'][1])
+
+        with self.dataset.features['spec'] as fc:
+            self.assertDictEqual(profile.to_dict(), json.loads(fc.attributes['pipeline_profile']))
+
+    def test_generate_features_resume(self):
+        fc = self.dataset.create_feature_container('spec')
+        self.dataset.add_features('utt-2', np.zeros((2, 201)), 'spec')
+
+        progress = []
+        self.dataset.generate_features(self.pipeline, 'spec', resume=True, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertListEqual([(1, 2), (2, 2)], progress)
+
+        with fc:
+            self.assertSetEqual(set(['utt-1', 'utt-2', 'utt-3']), set(fc.keys()))
+            self.assertEqual(2, fc.get('utt-2').shape[0])
+
+    def test_generate_features_incremental(self):
+        self.dataset.generate_features(self.pipeline, 'spec')
+
+        progress = []
+        self.dataset.generate_features(self.pipeline, 'spec', incremental=True, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertListEqual([], progress)
+
+        self.dataset.remove_utterances(['utt-1'])
+        self.dataset.add_utterance('wav_1', utterance_idx='utt-1', start=0, end=1.0)
+        self.dataset.add_utterance('wav_2', utterance_idx='utt-4', start=0, end=1.0)
+        self.dataset.generate_features(self.pipeline, 'spec', incremental=True, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertListEqual([(1, 2), (2, 2)], progress)
+
+        self.dataset.remove_utterances(['utt-4'])
+        self.pipeline.extract_stage.win_step = 200
+        progress = []
+        self.dataset.generate_features(self.pipeline, 'spec', incremental=True, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual((3, 3), progress[-1])
+
+        with self.dataset.features['spec'] as fc:
+            self.assertSetEqual(set(['utt-1', 'utt-2', 'utt-3']), set(fc.keys()))
+
+    def test_generate_features_flat_backend(self):
+        self.dataset.generate_features(self.pipeline, 'spec')
+        self.dataset.generate_features(self.pipeline, 'flat_spec', backend='flat')
+
+        progress = []
+        self.dataset.generate_features(self.pipeline, 'flat_spec', incremental=True, progress=lambda done, total: progress.append((done, total)))
+        self.assertListEqual([], progress)
+
+        self.dataset.save()
+        loaded = dataset.Dataset.load(self.dataset.path)
+
+        self.assertIsInstance(loaded.features['flat_spec'], data.FlatFeatureContainer)
+
+        for utt_id in ['utt-1', 'utt-2', 'utt-3']:
+            self.assertTrue(np.allclose(self.dataset.get_features(utt_id, 'spec'), loaded.get_features(utt_id, 'flat_spec')))
+
+    def test_generate_features_from_source_features(self):
+        self.dataset.generate_features(self.pipeline, 'spec')
+        self.dataset.generate_features(pipeline.Pipeline(stages=[pipeline.LogStage()]), 'log_spec', source_feature_name='spec')
+
+        for utt_id in ['utt-1', 'utt-2', 'utt-3']:
+            spec = self.dataset.get_features(utt_id, 'spec')
+            self.assertTrue(np.allclose(np.log(np.maximum(1e-10, spec)), self.dataset.get_features(utt_id, 'log_spec')))
+
+    def test_compute_cmvn_statistics_is_cached(self):
+        self.dataset.generate_features(self.pipeline, 'spec')
+        speaker = self.dataset.add_speaker(speaker_idx='spk-1')
+        self.dataset.set_speaker_of_utterance('utt-1', speaker.idx)
+        self.dataset.set_speaker_of_utterance('utt-3', speaker.idx)
+
+        stats = self.dataset.compute_cmvn_statistics('spec', mode='speaker')
+
+        self.assertListEqual(['spk-1'], stats.keys)
+        self.assertTrue(os.path.isfile(cmvn.statistics_path(self.dataset.features['spec'].path, 'speaker')))
+        self.assertEqual(stats.digest, self.dataset.compute_cmvn_statistics('spec', mode='speaker').digest)
+
+        # Recomputed if the speakers changed
+        self.dataset.set_speaker_of_utterance('utt-2', speaker.idx)
+        self.assertEqual(3, len(self.dataset.compute_cmvn_statistics('spec', mode='speaker').utterance_keys()))
@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from spych.data.dataset import iteration
 
 from tests.data import resources
@@ -51,3 +53,18 @@ class BatchGeneratorTest(unittest.TestCase):
         third_run = [x for x in generator.batches_with_utterance_idxs(2)]
 
         self.assertFalse(first_run == second_run and first_run == third_run)
+
+    def test_batches_with_features(self):
+        self.test_set_a.create_feature_container('feats')
+        utt_ids = list(self.test_set_a.utterances.keys())
+
+        with self.test_set_a.features['feats'] as fc:
+            for index, utt_id in enumerate(utt_ids):
+                fc.add(utt_id, np.full((index + 1, 2), index, dtype=np.float32))
+
+        generator = iteration.BatchGenerator(self.test_set_a)
+        batches = [x[0] for x in generator.batches_with_features('feats', 3)]
+
+        self.assertEqual(3, len(batches))
+        self.assertEqual(sum(range(1, len(utt_ids) + 1)), sum(batch.shape[0] for batch in batches))
+        self.assertEqual(2, batches[0].shape[1])
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from spych.data.dataset import lazy
+
+
+class LazySegmentationsTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.segmentations = lazy.LazySegmentations()
+
+        for key, lines in (('text', ['utt-1 0 1 hello', 'utt-2 0 1 hi']), ('raw', ['utt-2 0 1 hi', 'utt-3 0 1 hey'])):
+            path = os.path.join(self.tempdir, 'segmentation_{}.txt'.format(key))
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines))
+
+            self.segmentations.add_source(lazy.SegmentationFileIndex(path, key))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_contains_doesnt_read_segmentations(self):
+        with mock.patch.object(lazy.SegmentationFileIndex, 'read') as read:
+            self.assertIn('utt-1', self.segmentations)
+            self.assertIn('utt-3', self.segmentations)
+            self.assertNotIn('utt-4', self.segmentations)
+            self.assertIn('raw', self.segmentations['utt-2'])
+            self.assertNotIn('raw', self.segmentations['utt-1'])
+
+            read.assert_not_called()
+
+    def test_contains_stops_at_first_source(self):
+        self.assertIn('utt-1', self.segmentations)
+
+        self.assertIsNotNone(self.segmentations._sources['text']._ranges)
+        self.assertIsNone(self.segmentations._sources['raw']._ranges)
+
+    def test_removed_segmentation(self):
+        del self.segmentations['utt-2']['text']
+
+        self.assertIn('utt-2', self.segmentations)
+        self.assertListEqual(['raw'], list(self.segmentations['utt-2'].keys()))
+
+        del self.segmentations['utt-2']
+
+        self.assertNotIn('utt-2', self.segmentations)
+        self.assertListEqual(['utt-1', 'utt-3'], sorted(self.segmentations.keys()))
+        self.assertEqual(2, len(self.segmentations))
@@ -25,4 +25,78 @@ class DatasetTest(unittest.TestCase):
 
         self.assertSetEqual(set(['wav_3']), set(view.files.keys()))
         self.assertSetEqual(set(['utt-3', 'utt-4']), set(view.utterances.keys()))
-        self.assertSetEqual(filtered_spks, set(view.speakers.keys()))
\ No newline at end of file
+        self.assertSetEqual(filtered_spks, set(view.speakers.keys()))
+
+    def test_filter_patterns(self):
+        view = subview.Subview(dataset=self.testset)
+        view.utterance_idx_patterns.add('utt-[34]')
+        view.speaker_idx_not_patterns.add('spk-3')
+
+        self.assertSetEqual(set(['utt-3', 'utt-4']), set(view.utterances.keys()))
+
+    def test_filtered_utterances_keep_order_of_dataset(self):
+        self.testset.remove_utterances(['utt-3'])
+        self.testset.add_utterance('wav_3', utterance_idx='utt-3', speaker_idx='spk-2')
+
+        for materialized in (False, True):
+            view = subview.Subview(filtered_utterances=set(['utt-3', 'utt-4', 'utt-2', 'unknown']), dataset=self.testset,
+                                   materialized=materialized)
+
+            self.assertListEqual(['utt-2', 'utt-4', 'utt-3'], list(view.utterances.keys()))
+
+    def test_utterances_inserted_directly(self):
+        utt = self.testset.utterances['utt-4']
+        utt.idx = 'utt-4-imp'
+        self.testset.utterances[utt.idx] = utt
+        del self.testset.utterances['utt-4']
+
+        for materialized in (False, True):
+            view = subview.Subview(filtered_utterances=set(['utt-4-imp', 'utt-2']), dataset=self.testset, materialized=materialized)
+
+            self.assertListEqual(['utt-2', 'utt-4-imp'], list(view.utterances.keys()))
+
+
+class MaterializedSubviewTest(unittest.TestCase):
+    def setUp(self):
+        self.testset = resources.create_dataset()
+        self.view = subview.Subview(filtered_speakers=set(['spk-2']), dataset=self.testset, materialized=True)
+
+    def test_result_is_cached(self):
+        self.assertSetEqual(set(['utt-3', 'utt-4']), set(self.view.utterances.keys()))
+        self.assertIs(self.view.utterances, self.view.utterances)
+        self.assertSetEqual(set(['wav_3']), set(self.view.files.keys()))
+
+    def test_cached_mappings_are_read_only(self):
+        with self.assertRaises(TypeError):
+            self.view.utterances['utt-2'] = self.testset.utterances['utt-2']
+
+        with self.assertRaises(TypeError):
+            del self.view.segmentations['utt-3']['text']
+
+        self.testset.add_subview('m', self.view)
+
+        self.assertSetEqual(set(['utt-3', 'utt-4']), set(self.testset.export_subview('m').utterances.keys()))
+
+    def test_invalidated_by_dataset_modification(self):
+        self.assertEqual(2, self.view.num_utterances)
+
+        self.testset.add_utterance('wav_2', utterance_idx='utt-6', speaker_idx='spk-2')
+
+        self.assertEqual(3, self.view.num_utterances)
+        self.assertSetEqual(set(['wav_2', 'wav_3']), set(self.view.files.keys()))
+
+        self.testset.remove_utterances(['utt-3'])
+
+        self.assertSetEqual(set(['utt-4', 'utt-6']), set(self.view.utterances.keys()))
+
+    def test_invalidated_by_filter_change(self):
+        self.assertEqual(2, self.view.num_utterances)
+
+        self.view.filtered_speaker_idxs = set(['spk-3'])
+
+        self.assertEqual(1, self.view.num_utterances)
+
+        self.view.utterance_idx_not_patterns.add('.*')
+        self.view.invalidate()
+
+        self.assertEqual(0, self.view.num_utterances)
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from spych.data.features import cmvn
+from spych.data.features import container
+from spych.data.features import pipeline
+from spych.data.features import pool
+
+
+class CMVNTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.fc = container.FeatureContainer(os.path.join(self.tempdir, 'feats'))
+
+        rng = np.random.RandomState(11)
+        self.matrices = {
+            'utt-1': rng.normal(1.0, 2.0, (30, 3)).astype(np.float32),
+            'utt-2': rng.normal(-4.0, 0.5, (12, 3)).astype(np.float32),
+            'utt-3': rng.normal(8.0, 3.0, (25, 3)).astype(np.float32)
+        }
+        self.speakers = {'utt-1': 'spk-a', 'utt-2': 'spk-b', 'utt-3': 'spk-a'}
+
+        with self.fc:
+            for utt_id, matrix in self.matrices.items():
+                self.fc.add(utt_id, matrix)
+
+    def tearDown(self):
+        pool.default_pool.close_idle()
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def frames(self, utterance_ids):
+        return np.concatenate([self.matrices[utt_id] for utt_id in utterance_ids]).astype(np.float64)
+
+    def test_compute_global_statistics(self):
+        stats = cmvn.compute_cmvn_statistics(self.fc)
+        frames = self.frames(['utt-1', 'utt-2', 'utt-3'])
+
+        self.assertListEqual(['global'], stats.keys)
+        self.assertListEqual([67], stats.counts.tolist())
+        self.assertTrue(np.allclose(np.mean(frames, axis=0), stats.means[0]))
+        self.assertTrue(np.allclose(np.var(frames, axis=0), stats.variances[0]))
+        self.assertListEqual([0, 0], stats.rows(['utt-2', 'unknown']).tolist())
+
+    def test_compute_speaker_statistics(self):
+        stats = cmvn.compute_cmvn_statistics(self.fc, mode=cmvn.MODE_SPEAKER, utterance_keys=self.speakers)
+
+        self.assertListEqual(['spk-a', 'spk-b'], stats.keys)
+        self.assertListEqual([0, 1, 0], stats.rows(['utt-1', 'utt-2', 'utt-3']).tolist())
+        self.assertTrue(np.allclose(np.mean(self.frames(['utt-1', 'utt-3']), axis=0), stats.means[0]))
+        self.assertTrue(np.allclose(np.var(self.frames(['utt-2']), axis=0), stats.variances[1]))
+
+        with self.assertRaises(ValueError):
+            stats.rows(['unknown'])
+
+        with self.assertRaises(ValueError):
+            cmvn.compute_cmvn_statistics(self.fc, mode=cmvn.MODE_SPEAKER)
+
+    def test_save_and_load(self):
+        stats = cmvn.compute_cmvn_statistics(self.fc, mode=cmvn.MODE_UTTERANCE)
+        path = cmvn.statistics_path(self.fc.path, stats.mode)
+        stats.save(path)
+
+        loaded = cmvn.load_cached_statistics(self.fc.path, cmvn.MODE_UTTERANCE)
+
+        self.assertEqual(stats.digest, loaded.digest)
+        self.assertListEqual(stats.keys, loaded.keys)
+        self.assertDictEqual(stats.utterance_keys(), loaded.utterance_keys())
+        self.assertIsNone(cmvn.load_cached_statistics(self.fc.path, cmvn.MODE_GLOBAL))
+
+        # Stale if the container changed
+        os.utime(self.fc.path, (os.path.getmtime(path) + 10, os.path.getmtime(path) + 10))
+        self.assertIsNone(cmvn.load_cached_statistics(self.fc.path, cmvn.MODE_UTTERANCE))
+
+    def test_stage_normalizes_per_speaker(self):
+        stats = cmvn.compute_cmvn_statistics(self.fc, mode=cmvn.MODE_SPEAKER, utterance_keys=self.speakers)
+        feature_pipeline = pipeline.Pipeline(stages=[pipeline.CMVNStage(stats)])
+        utterance_ids = ['utt-1', 'utt-2', 'utt-3']
+
+        outputs = feature_pipeline.process_batch([self.matrices[utt_id] for utt_id in utterance_ids], utterance_ids=utterance_ids)
+        speaker_a = np.concatenate([outputs[0], outputs[2]])
+
+        self.assertEqual(np.float32, outputs[0].dtype)
+        self.assertTrue(np.allclose(0.0, np.mean(speaker_a, axis=0), atol=1e-5))
+        self.assertTrue(np.allclose(1.0, np.std(speaker_a, axis=0), atol=1e-5))
+        self.assertTrue(np.allclose(0.0, np.mean(outputs[1], axis=0), atol=1e-5))
+
+        for utt_id, output in zip(utterance_ids, outputs):
+            self.assertTrue(np.allclose(output, feature_pipeline.process(self.matrices[utt_id], utterance_idx=utt_id), atol=1e-6))
+
+        with self.assertRaises(ValueError):
+            feature_pipeline.process(self.matrices['utt-1'])
+
+    def test_stage_mean_only(self):
+        stats = cmvn.compute_cmvn_statistics(self.fc)
+        stage = pipeline.CMVNStage(stats, normalize_variance=False)
+
+        output = stage.process(self.matrices['utt-2'])
+
+        self.assertTrue(np.allclose(self.matrices['utt-2'] - stats.means[0], output, atol=1e-5))
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from spych.data.features import container
+
+
+class FeatureContainerTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.fc = container.FeatureContainer(os.path.join(self.tempdir, 'feats'))
+        self.fc.open()
+
+        self.matrices = {
+            'utt-1': np.random.rand(5, 3).astype(np.float32),
+            'utt-2': np.random.rand(2, 3).astype(np.float32),
+            'utt-3': np.zeros((0, 3), dtype=np.float32),
+            'utt-4': np.random.rand(7, 3).astype(np.float32)
+        }
+
+        for utt_id in ['utt-4', 'utt-3', 'utt-1', 'utt-2']:
+            self.fc.add(utt_id, self.matrices[utt_id])
+
+    def tearDown(self):
+        self.fc.close()
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_get_many(self):
+        matrices = self.fc.get_many(['utt-2', 'utt-x', 'utt-1'])
+
+        self.assertIsNone(matrices[1])
+        self.assertTrue(np.array_equal(self.matrices['utt-2'], matrices[0]))
+        self.assertTrue(np.array_equal(self.matrices['utt-1'], matrices[2]))
+
+    def test_get_many_packed(self):
+        utt_ids = ['utt-1', 'utt-3', 'utt-4', 'utt-2']
+
+        frames, offsets = self.fc.get_many(utt_ids, packed=True)
+
+        self.assertListEqual([0, 5, 5, 12, 14], offsets.tolist())
+        self.assertTrue(np.array_equal(np.concatenate([self.matrices[utt_id] for utt_id in utt_ids]), frames))
+
+    def test_get_many_into_buffer(self):
+        out = np.zeros((20, 3), dtype=np.float64)
+
+        frames, offsets = self.fc.get_many(['utt-4', 'utt-1'], out=out)
+
+        self.assertTrue(np.may_share_memory(out, frames))
+        self.assertEqual(12, frames.shape[0])
+        self.assertTrue(np.allclose(self.matrices['utt-1'], frames[offsets[1]:offsets[2]]))
+
+        with self.assertRaises(ValueError):
+            self.fc.get_many(['utt-4', 'utt-1', 'utt-4', 'utt-2'], out=out)
+
+    def test_get_many_packed_missing_features(self):
+        with self.assertRaises(ValueError):
+            self.fc.get_many(['utt-1', 'utt-x'], packed=True)
+
+
+class FeatureContainerStorageOptionsTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_storage_options(self):
+        features = np.random.rand(30, 4).astype(np.float32)
+
+        for options in [{}, {'compression': 'none'}, {'compression': 'gzip', 'compression_level': 9, 'shuffle': True},
+                        {'compression': 'none', 'chunk_frames': 8}, {'dtype': 'float16'}]:
+            fc = container.FeatureContainer(os.path.join(self.tempdir, str(len(os.listdir(self.tempdir)))), **options)
+
+            with fc:
+                fc.add('utt-1', features)
+                fc.add('utt-2', features[:0])
+
+                stored = fc.file['utt-1']
+                self.assertEqual(options.get('compression', 'lzf') if options.get('compression') != 'none' else None, stored.compression)
+                self.assertEqual(options.get('shuffle', False), stored.shuffle)
+
+                if 'chunk_frames' in options:
+                    self.assertTupleEqual((8, 4), stored.chunks)
+
+                self.assertEqual(np.float32, fc.get('utt-1').dtype)
+                self.assertEqual(0, fc.get('utt-2').shape[0])
+                self.assertTrue(np.allclose(features, fc.get('utt-1'), atol=1e-3))
+                self.assertTrue(np.allclose(features, fc.get_many(['utt-1'], packed=True)[0], atol=1e-3))
+
+            self.assertDictEqual(options, fc.storage_options())
+
+    def test_invalid_storage_options(self):
+        with self.assertRaises(ValueError):
+            container.FeatureContainer('x', compression='zstd')
+
+        with self.assertRaises(ValueError):
+            container.FeatureContainer('x', compression='lzf', compression_level=3)
+
+    def test_parse_storage_options(self):
+        options = container.FeatureContainer.parse_storage_options({'compression': 'gzip', 'compression_level': '3', 'shuffle': 'True',
+                                                                    'chunk_frames': '100'})
+
+        self.assertDictEqual({'compression': 'gzip', 'compression_level': 3, 'shuffle': True, 'chunk_frames': 100}, options)
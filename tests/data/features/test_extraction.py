@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+import librosa
+
+from spych.data.features.pipeline import convertion
+from spych.data.features.pipeline import extraction
+
+
+class ExtractionTest(unittest.TestCase):
+    def setUp(self):
+        self.samples = np.random.RandomState(3).uniform(-1, 1, 8000).astype(np.float32)
+
+    def test_mel_filterbank_is_cached(self):
+        mel_filter = extraction.mel_filterbank(16000, 400, 23)
+
+        self.assertIs(mel_filter, extraction.mel_filterbank(16000, 400, 23))
+        self.assertEqual((23, 201), mel_filter.shape)
+        self.assertFalse(mel_filter.flags.writeable)
+
+    def test_mfcc_extraction_equals_librosa(self):
+        stage = extraction.MFCCExtractionStage(num_mfcc=13, num_mel=23)
+
+        spec = np.abs(librosa.stft(self.samples, n_fft=400, hop_length=160)) ** 2
+        mel = np.dot(librosa.filters.mel(sr=16000, n_fft=400, n_mels=23), spec)
+        expected = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=13).T
+
+        self.assertTrue(np.allclose(expected, stage.extract(self.samples, 16000), atol=1e-4))
+
+    def test_mel_to_mfcc_uses_num_mfcc(self):
+        mel = extraction.MelFilterbankExtractionStage(num_mel=23).extract(self.samples, 16000)
+
+        mfcc = convertion.MelToMFCCStage(num_mfcc=20).process(mel)
+
+        self.assertEqual(20, mfcc.shape[1])
+        self.assertTrue(np.allclose(librosa.feature.mfcc(S=librosa.power_to_db(mel.T), n_mfcc=20).T, mfcc, atol=1e-4))
+
+    def test_mel_to_mfcc_default_num_mfcc(self):
+        mel = extraction.MelFilterbankExtractionStage(num_mel=23).extract(self.samples, 16000)
+
+        mfcc = convertion.MelToMFCCStage().process(mel)
+
+        self.assertEqual(13, mfcc.shape[1])
+        self.assertTrue(np.allclose(convertion.MelToMFCCStage(num_mfcc=20).process(mel)[:, :13], mfcc))
+
+    def test_dct_matrix_is_cached(self):
+        basis = extraction.dct_matrix(13, 23)
+
+        self.assertIs(basis, extraction.dct_matrix(13, 23))
+        self.assertEqual((13, 23), basis.shape)
+        self.assertFalse(basis.flags.writeable)
+
+    def test_extract_stream_equals_extract(self):
+        chunks = [self.samples[i:i + 997] for i in range(0, self.samples.size, 997)]
+
+        for stage in [extraction.SpectrumExtractionStage(win_length=400, win_step=160),
+                      extraction.MelFilterbankExtractionStage(num_mel=23),
+                      extraction.MFCCExtractionStage(num_mfcc=13, top_db=None)]:
+            streamed = np.concatenate(list(stage.extract_stream(chunks, 16000)))
+
+            self.assertTrue(np.allclose(stage.extract(self.samples, 16000), streamed, rtol=1e-4, atol=1e-4))
+
+    def test_extract_stream_with_tiny_chunks(self):
+        stage = extraction.SpectrumExtractionStage(win_length=400, win_step=160)
+        chunks = [self.samples[i:i + 50] for i in range(0, self.samples.size, 50)]
+
+        streamed = np.concatenate(list(stage.extract_stream(chunks, 16000)))
+
+        self.assertTrue(np.allclose(stage.extract(self.samples, 16000), streamed, rtol=1e-4, atol=1e-6))
+
+    def test_mfcc_extract_stream_requires_top_db_none(self):
+        with self.assertRaises(ValueError):
+            extraction.MFCCExtractionStage().extract_stream([self.samples], 16000)
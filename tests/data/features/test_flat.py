@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from spych.data import features
+from spych.data.features import flat
+
+
+class FlatFeatureContainerTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'feats')
+
+        self.matrices = {
+            'utt-1': np.random.rand(5, 3).astype(np.float32),
+            'utt-2': np.random.rand(2, 3).astype(np.float32),
+            'utt-3': np.random.rand(7, 3).astype(np.float32)
+        }
+
+        with flat.FlatFeatureContainer(self.path) as fc:
+            for utt_id in sorted(self.matrices.keys()):
+                fc.add(utt_id, self.matrices[utt_id], attributes={'num': np.int64(3)})
+
+            fc.attributes['name'] = 'test'
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_get_returns_view(self):
+        fc = flat.FlatFeatureContainer(self.path)
+        fc.open(mode='r')
+
+        features = fc.get('utt-2')
+
+        self.assertTrue(np.array_equal(self.matrices['utt-2'], features))
+        self.assertFalse(features.flags.writeable)
+        self.assertIsNone(fc.get('utt-x'))
+        self.assertEqual(3, fc.feature_size())
+        self.assertDictEqual({'num': 3}, fc.get_attributes('utt-1'))
+        self.assertEqual('test', fc.attributes['name'])
+
+        with self.assertRaises(ValueError):
+            fc.add('utt-4', np.zeros((1, 3)))
+
+        fc.close()
+
+    def test_replace_remove_and_compact(self):
+        with flat.FlatFeatureContainer(self.path) as fc:
+            fc.add('utt-1', np.ones((4, 3)))
+            fc.remove('utt-2')
+
+            self.assertEqual(4, fc.get('utt-1').shape[0])
+
+        with flat.FlatFeatureContainer(self.path) as fc:
+            self.assertListEqual(['utt-1', 'utt-3'], sorted(fc.keys()))
+            self.assertTrue(np.array_equal(np.ones((4, 3)), fc.get('utt-1')))
+
+            fc.compact()
+
+            self.assertEqual(11 * 3 * 4, os.path.getsize(os.path.join(self.path, flat.FRAMES_FILE_NAME)))
+            self.assertTrue(np.array_equal(self.matrices['utt-3'], fc.get('utt-3')))
+
+            fc.add('utt-2', self.matrices['utt-2'])
+
+        with flat.FlatFeatureContainer(self.path) as fc:
+            self.assertTrue(np.array_equal(self.matrices['utt-2'], fc.get('utt-2')))
+            self.assertTrue(np.array_equal(np.ones((4, 3)), fc.get('utt-1')))
+
+    def test_recover_interrupted_write(self):
+        with open(os.path.join(self.path, flat.FRAMES_FILE_NAME), 'ab') as f:
+            f.write(b'\x00' * 7)
+
+        with open(os.path.join(self.path, flat.INDEX_FILE_NAME), 'a') as f:
+            f.write('utt-4 14 1 {}')
+
+        with flat.FlatFeatureContainer(self.path) as fc:
+            self.assertListEqual(['utt-1', 'utt-2', 'utt-3'], sorted(fc.keys()))
+
+            fc.add('utt-4', np.full((1, 3), 2.0))
+
+        with flat.FlatFeatureContainer(self.path) as fc:
+            self.assertTrue(np.array_equal(np.full((1, 3), 2.0), fc.get('utt-4')))
+            self.assertTrue(np.array_equal(self.matrices['utt-3'], fc.get('utt-3')))
+
+    def test_get_many_packed(self):
+        with flat.FlatFeatureContainer(self.path) as fc:
+            frames, offsets = fc.get_many(['utt-3', 'utt-1'], packed=True)
+
+        self.assertListEqual([0, 7, 12], offsets.tolist())
+        self.assertTrue(np.array_equal(np.concatenate([self.matrices['utt-3'], self.matrices['utt-1']]), frames))
+
+    def test_create_container_detects_backend(self):
+        self.assertIsInstance(features.create_container(self.path), flat.FlatFeatureContainer)
+        self.assertIsInstance(features.create_container(os.path.join(self.tempdir, 'other')), features.FeatureContainer)
+
+        new_path = os.path.join(self.tempdir, 'new')
+        features.create_container(new_path, backend=features.BACKEND_FLAT)
+        self.assertIsInstance(features.create_container(new_path), flat.FlatFeatureContainer)
+
+    def test_reopen_uses_cached_index(self):
+        fc = flat.FlatFeatureContainer(self.path)
+
+        with mock.patch.object(flat.FlatFeatureContainer, '_load', autospec=True, side_effect=flat.FlatFeatureContainer._load) as load:
+            for __ in range(5):
+                fc.open(mode='r')
+                self.assertTrue(np.array_equal(self.matrices['utt-2'], fc.get('utt-2')))
+                fc.close()
+
+            self.assertEqual(0, load.call_count)
+
+            # Changes of another container are loaded
+            with flat.FlatFeatureContainer(self.path) as other:
+                other.add('utt-4', np.ones((2, 3)))
+
+            fc.open(mode='r')
+            self.assertTrue(np.array_equal(np.ones((2, 3)), fc.get('utt-4')))
+            self.assertDictEqual({'num': 3}, fc.get_attributes('utt-1'))
+            fc.close()
+
+            os.remove(os.path.join(self.path, flat.INDEX_FILE_NAME))
+
+            fc.open(mode='r')
+            self.assertListEqual([], fc.keys())
+            fc.close()
+
+            self.assertEqual(1, load.call_count)
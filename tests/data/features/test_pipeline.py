@@ -0,0 +1,147 @@
+import unittest
+
+import numpy as np
+
+from spych.data.features import pipeline
+from spych.data.features.pipeline import extraction
+
+
+class PipelineTest(unittest.TestCase):
+    def test_fingerprint(self):
+        mfcc = pipeline.mfcc_extraction_pipeline()
+
+        self.assertEqual(mfcc.fingerprint(), pipeline.mfcc_extraction_pipeline().fingerprint())
+        self.assertNotEqual(mfcc.fingerprint(), pipeline.mfcc_extraction_pipeline(num_mfcc=20).fingerprint())
+        self.assertNotEqual(mfcc.fingerprint(), pipeline.mel_extraction_pipeline().fingerprint())
+
+        mfcc.stages = [pipeline.LogStage()]
+        self.assertNotEqual(pipeline.mfcc_extraction_pipeline().fingerprint(), mfcc.fingerprint())
+
+    def test_fingerprint_ignores_private_attributes(self):
+        mfcc = pipeline.mfcc_extraction_pipeline()
+        fingerprint = mfcc.fingerprint()
+
+        mfcc.extract_stage._cache = object()
+
+        self.assertEqual(fingerprint, mfcc.fingerprint())
+
+    def test_process_batch_equals_process(self):
+        matrices = [np.random.rand(7, 3) + 0.1, np.random.rand(1, 3) + 0.1, np.zeros((0, 3)), np.random.rand(12, 3) + 0.1]
+
+        for stages in [[pipeline.LogStage(), pipeline.ExponentialStage()],
+                       [pipeline.RescalingStage()],
+                       [pipeline.RescalingStage(reference_min=0.0, reference_max=2.0)],
+                       [pipeline.SpliceStage(splice_size=2, splice_step=1)],
+                       [pipeline.SpliceStage(splice_size=1, splice_step=3), pipeline.UnspliceStage(splice_size=1, splice_step=3)]]:
+            feature_pipeline = pipeline.Pipeline(stages=stages)
+            outputs = feature_pipeline.process_batch(matrices)
+
+            self.assertEqual(len(matrices), len(outputs))
+
+            for matrix, output in zip(matrices, outputs):
+                if matrix.shape[0] > 0:
+                    self.assertTrue(np.allclose(feature_pipeline.process(matrix), output))
+                else:
+                    self.assertEqual(0, output.shape[0])
+
+    def test_process_stream_equals_process(self):
+        matrix = np.random.rand(23, 3) + 0.1
+
+        for stages in [[pipeline.LogStage(), pipeline.ExponentialStage()],
+                       [pipeline.RescalingStage()],
+                       [pipeline.SpliceStage(splice_size=2, splice_step=1)],
+                       [pipeline.SpliceStage(splice_size=1, splice_step=3), pipeline.UnspliceStage(splice_size=1, splice_step=3)],
+                       [pipeline.SpliceStage(splice_size=1, splice_step=4)]]:
+            for block_size in [1, 2, 5, 23]:
+                blocks = [matrix[i:i + block_size] for i in range(0, matrix.shape[0], block_size)]
+                feature_pipeline = pipeline.Pipeline(stages=stages)
+
+                output = feature_pipeline.process(matrix)
+                streamed = list(blocks)
+
+                for stage in stages:
+                    streamed = stage.process_stream(streamed)
+
+                self.assertTrue(np.allclose(output, np.concatenate(list(streamed))))
+
+    def test_process_signal_stream_equals_process_signal(self):
+        samples = np.random.RandomState(5).uniform(-1, 1, 7000).astype(np.float32)
+        chunks = [samples[i:i + 1234] for i in range(0, samples.size, 1234)]
+
+        feature_pipeline = pipeline.mel_extraction_pipeline()
+        feature_pipeline.stages = [pipeline.LogStage(), pipeline.SpliceStage(splice_size=3)]
+
+        blocks = list(feature_pipeline.process_signal_stream(chunks, 16000))
+
+        self.assertTrue(all(block.shape[0] > 0 for block in blocks))
+        self.assertTrue(np.allclose(feature_pipeline.process_signal(samples, 16000), np.concatenate(blocks), rtol=1e-4, atol=1e-4))
+
+    def test_profiling(self):
+        feature_pipeline = pipeline.mel_extraction_pipeline()
+        feature_pipeline.stages = [pipeline.LogStage(), pipeline.SpliceStage(splice_size=1)]
+        samples = np.random.RandomState(5).uniform(-1, 1, 3200).astype(np.float32)
+
+        self.assertIsNone(feature_pipeline.profile)
+
+        profile = feature_pipeline.enable_profiling()
+        feature_pipeline.process_signal(samples, 16000)
+        feature_pipeline.process_batch([np.random.rand(4, 23), np.random.rand(3, 23)])
+
+        self.assertListEqual(['extract MelFilterbankExtractionStage', '0 LogStage', '1 SpliceStage'], list(profile.stages.keys()))
+        self.assertEqual(1, profile.stages['extract MelFilterbankExtractionStage']['calls'])
+        self.assertEqual(3200 * 4, profile.stages['extract MelFilterbankExtractionStage']['input_bytes'])
+        self.assertEqual(2, profile.stages['1 SpliceStage']['calls'])
+        self.assertListEqual([7, 69], profile.stages['1 SpliceStage']['output_shape'])
+        self.assertEqual(3, len(profile.summary()))
+
+        self.assertIs(profile, feature_pipeline.disable_profiling())
+        self.assertIsNone(feature_pipeline.profile)
+
+    def test_profiling_counts_only_allocated_outputs(self):
+        feature_pipeline = pipeline.Pipeline(stages=[pipeline.SpliceStage(splice_size=1), pipeline.LogStage(), pipeline.SpliceStage(splice_size=1)],
+                                             fused=True)
+        matrix = np.random.rand(10, 3).astype(np.float32) + 0.1
+
+        profile = feature_pipeline.enable_profiling()
+        feature_pipeline.process(matrix)
+        feature_pipeline.process(matrix)
+
+        # The first splice writes into a reused buffer, the log stage works in place, only the final output is new
+        self.assertEqual(0, profile.stages['0 SpliceStage']['output_bytes'])
+        self.assertEqual(0, profile.stages['1 LogStage']['output_bytes'])
+        self.assertEqual(2 * 10 * 27 * 4, profile.stages['2 SpliceStage']['output_bytes'])
+
+    def test_fused_process_equals_process(self):
+        for stages in [[pipeline.LogStage(), pipeline.ExponentialStage()],
+                       [pipeline.RescalingStage(), pipeline.LogStage()],
+                       [pipeline.LogStage(), pipeline.SpliceStage(splice_size=2), pipeline.RescalingStage(reference_min=-5.0, reference_max=5.0)],
+                       [pipeline.SpliceStage(splice_size=1, splice_step=3), pipeline.UnspliceStage(splice_size=1, splice_step=3), pipeline.LogStage()],
+                       [pipeline.SpliceStage(splice_size=1), pipeline.UnspliceStage(splice_size=1, merge_type=pipeline.UnspliceMergeType.COMPUTE_MEAN)]]:
+            fused_pipeline = pipeline.Pipeline(stages=stages, fused=True)
+            outputs = []
+
+            for num_frames in [9, 4, 12]:
+                matrix = np.random.rand(num_frames, 3).astype(np.float32) + 0.1
+                matrix_copy = matrix.copy()
+
+                output = fused_pipeline.process(matrix)
+                expected = pipeline.Pipeline(stages=stages).process(matrix_copy)
+
+                self.assertTrue(np.array_equal(matrix_copy, matrix))
+                self.assertEqual(expected.dtype, output.dtype)
+                self.assertTrue(np.allclose(expected, output))
+
+                outputs.append((output, output.copy()))
+
+            # Outputs of previous calls are not overwritten
+            for output, output_copy in outputs:
+                self.assertTrue(np.array_equal(output_copy, output))
+
+    def test_fused_process_signal_equals_process_signal(self):
+        samples = np.random.RandomState(5).uniform(-1, 1, 3200).astype(np.float32)
+        stages = [pipeline.LogStage(), pipeline.SpliceStage(splice_size=2), pipeline.UnspliceStage(splice_size=2)]
+
+        feature_pipeline = pipeline.Pipeline(stages=stages, extract_stage=extraction.MelFilterbankExtractionStage())
+        fused_pipeline = pipeline.Pipeline(stages=stages, extract_stage=extraction.MelFilterbankExtractionStage(), fused=True)
+
+        self.assertTrue(np.allclose(feature_pipeline.process_signal(samples, 16000), fused_pipeline.process_signal(samples, 16000)))
@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from spych.data.features import container
+from spych.data.features import pool
+
+
+def _read_in_child(fc, queue):
+    queue.put(fc.get('utt-1').tolist())
+
+
+def _write_in_child(path):
+    with container.FeatureContainer(path) as fc:
+        fc.add('utt-2', np.zeros((2, 2)))
+
+
+class HandlePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'feats')
+        self.pool = pool.HandlePool(max_idle=1)
+
+        with container.FeatureContainer(self.path, handle_pool=self.pool) as fc:
+            fc.add('utt-1', np.arange(6, dtype=np.float32).reshape(3, 2))
+
+    def tearDown(self):
+        self.pool.close_idle()
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_read_only_file_stays_open(self):
+        fc = container.FeatureContainer(self.path, handle_pool=self.pool)
+
+        fc.open(mode='r')
+        h5_file = fc.file
+        fc.close()
+
+        self.assertIsNone(fc.file)
+        self.assertTrue(self.pool.is_open(self.path))
+
+        fc.open(mode='r')
+        self.assertIs(h5_file, fc.file)
+        self.assertEqual('r', fc.file.mode)
+        fc.close()
+
+    def test_containers_share_file_and_switch_to_append(self):
+        reader = container.FeatureContainer(self.path, handle_pool=self.pool)
+        writer = container.FeatureContainer(self.path, handle_pool=self.pool)
+
+        reader.open(mode='r')
+        writer.open()
+
+        self.assertEqual(2, self.pool.references(self.path))
+        self.assertEqual('r+', reader.file.mode)
+
+        writer.add('utt-2', np.zeros((2, 2)))
+        self.assertEqual(2, reader.get('utt-2').shape[0])
+
+        writer.close()
+        reader.close()
+
+        # Files opened for writing are closed when unused
+        self.assertFalse(self.pool.is_open(self.path))
+
+    def test_open_and_close_are_reference_counted(self):
+        fc = container.FeatureContainer(self.path, handle_pool=self.pool)
+
+        with fc:
+            with fc:
+                pass
+
+            self.assertIsNotNone(fc.file)
+
+        self.assertIsNone(fc.file)
+        self.assertEqual(0, self.pool.references(self.path))
+
+    def test_reopen_if_file_changed(self):
+        fc = container.FeatureContainer(self.path, handle_pool=self.pool)
+
+        fc.open(mode='r')
+        fc.get('utt-1')
+        fc.close()
+
+        # Replace the file (the idle handle keeps a lock on the old file)
+        new_path = os.path.join(self.tempdir, 'new_feats')
+
+        with container.FeatureContainer(new_path, handle_pool=pool.HandlePool(max_idle=0)) as other_fc:
+            other_fc.add('utt-3', np.zeros((4, 2)))
+
+        os.replace(new_path, self.path)
+
+        fc.open(mode='r')
+        self.assertEqual(4, fc.get('utt-3').shape[0])
+        fc.close()
+
+    def test_use_in_forked_process(self):
+        fc = container.FeatureContainer(self.path)
+        fc.open(mode='r')
+
+        try:
+            queue = multiprocessing.get_context('fork').Queue()
+            process = multiprocessing.get_context('fork').Process(target=_read_in_child, args=(fc, queue))
+            process.start()
+            result = queue.get(timeout=30)
+            process.join()
+
+            self.assertListEqual([[0, 1], [2, 3], [4, 5]], result)
+            self.assertEqual(2, fc.get('utt-1').shape[1])
+        finally:
+            fc.close()
+            pool.default_pool.close_idle()
+
+    def test_swmr_file_is_not_locked(self):
+        reader = container.FeatureContainer(self.path, handle_pool=self.pool)
+        reader.open(mode=pool.SWMR)
+        self.assertEqual(3, reader.get('utt-1').shape[0])
+
+        # A writer in another process isn't blocked by the reader
+        process = multiprocessing.get_context('spawn').Process(target=_write_in_child, args=(self.path,))
+        process.start()
+        process.join(timeout=60)
+        self.assertEqual(0, process.exitcode)
+
+        reader.close()
+
+        # The changed file is reopened
+        reader.open(mode=pool.READ)
+        self.assertEqual(2, reader.get('utt-2').shape[0])
+        reader.close()
+
+    def test_swmr_switch_to_append(self):
+        reader = container.FeatureContainer(self.path, handle_pool=self.pool)
+        reader.open(mode=pool.SWMR)
+        reader.get('utt-1')
+        reader.open()
+
+        self.assertEqual('r+', reader.file.mode)
+
+        reader.close()
+        reader.close()
+
+        with self.assertRaises(ValueError):
+            reader.open(mode='w')
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from spych.data.features import container
+from spych.data.features import flat
+from spych.data.features import pool
+from spych.data.features import statistics
+
+
+class FeatureStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        self.matrices = [rng.normal(5.0, 2.0, (num_frames, 4)).astype(np.float32) for num_frames in (1, 17, 250, 3, 0)]
+        self.all_frames = np.concatenate(self.matrices).astype(np.float64)
+
+    def test_add_matches_numpy(self):
+        stats = statistics.FeatureStatistics()
+
+        for matrix in self.matrices:
+            stats.add(matrix)
+
+        self.assertEqual(271, stats.count)
+        self.assertTrue(np.allclose(np.mean(self.all_frames, axis=0), stats.mean))
+        self.assertTrue(np.allclose(np.var(self.all_frames, axis=0), stats.var))
+        self.assertTrue(np.allclose(np.std(self.all_frames, axis=0), stats.std))
+        self.assertTrue(np.array_equal(np.min(self.all_frames, axis=0), stats.min))
+        self.assertTrue(np.array_equal(np.max(self.all_frames, axis=0), stats.max))
+
+        min, max, mean, var, stdev = stats.global_statistics()
+
+        self.assertAlmostEqual(np.mean(self.all_frames), mean)
+        self.assertAlmostEqual(np.var(self.all_frames), var)
+        self.assertAlmostEqual(np.std(self.all_frames), stdev)
+
+    def test_merge(self):
+        first = statistics.FeatureStatistics()
+        second = statistics.FeatureStatistics()
+
+        first.add(self.matrices[0])
+        first.add(self.matrices[1])
+        second.add(self.matrices[2])
+
+        first.merge(second)
+        first.merge(statistics.FeatureStatistics())
+
+        frames = np.concatenate(self.matrices[:3]).astype(np.float64)
+
+        self.assertEqual(frames.shape[0], first.count)
+        self.assertTrue(np.allclose(np.mean(frames, axis=0), first.mean))
+        self.assertTrue(np.allclose(np.var(frames, axis=0), first.var))
+
+    def test_merge_different_feature_size_raises_error(self):
+        stats = statistics.FeatureStatistics(feature_size=3)
+
+        with self.assertRaises(ValueError):
+            stats.add(np.zeros((2, 4)))
+
+    def test_empty(self):
+        stats = statistics.FeatureStatistics()
+
+        self.assertIsNone(stats.var)
+        self.assertIsNone(stats.global_statistics())
+
+
+class ComputeStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        rng = np.random.RandomState(7)
+        self.matrices = {'utt-{}'.format(index): rng.normal(-1.0, 3.0, (rng.randint(1, 40), 5)).astype(np.float32) for index in range(20)}
+        self.all_frames = np.concatenate([self.matrices[utt_id] for utt_id in sorted(self.matrices.keys())]).astype(np.float64)
+
+    def tearDown(self):
+        pool.default_pool.close_idle()
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def fill(self, fc):
+        with fc:
+            for utt_id, matrix in self.matrices.items():
+                fc.add(utt_id, matrix)
+
+        return fc
+
+    def test_compute_statistics(self):
+        for fc in (self.fill(container.FeatureContainer(os.path.join(self.tempdir, 'feats'))),
+                   self.fill(flat.FlatFeatureContainer(os.path.join(self.tempdir, 'flat')))):
+            stats = fc.compute_statistics()
+
+            self.assertEqual(self.all_frames.shape[0], stats.count)
+            self.assertTrue(np.allclose(np.mean(self.all_frames, axis=0), stats.mean))
+            self.assertTrue(np.allclose(np.var(self.all_frames, axis=0), stats.var))
+
+            min, max, mean, var, stdev = fc.get_statistics()
+
+            self.assertAlmostEqual(np.min(self.all_frames), min, places=5)
+            self.assertAlmostEqual(np.std(self.all_frames), stdev)
+
+    def test_compute_statistics_of_utterances_with_multiple_workers(self):
+        fc = self.fill(container.FeatureContainer(os.path.join(self.tempdir, 'feats')))
+        utterance_ids = ['utt-{}'.format(index) for index in range(10)]
+        frames = np.concatenate([self.matrices[utt_id] for utt_id in utterance_ids]).astype(np.float64)
+
+        stats = statistics.compute_statistics(fc, utterance_ids=utterance_ids, num_workers=2, batch_size=3)
+
+        self.assertEqual(frames.shape[0], stats.count)
+        self.assertTrue(np.allclose(np.mean(frames, axis=0), stats.mean))
+        self.assertTrue(np.allclose(np.var(frames, axis=0), stats.var))
+        self.assertTrue(np.array_equal(np.max(frames, axis=0), stats.max))
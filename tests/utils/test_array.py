@@ -110,3 +110,28 @@ class MathUtilsTest(unittest.TestCase):
 
         result = array.unsplice_features(self.output_features_odd_step_two, splice_size=2, splice_step=2)
         np.testing.assert_array_equal(output, result)
+
+    def test_pack_and_unpack(self):
+        matrices = [np.ones((3, 2)), np.zeros((0, 2)), np.arange(4).reshape(2, 2)]
+
+        frames, offsets = array.pack(matrices)
+
+        self.assertEqual((5, 2), frames.shape)
+        self.assertListEqual([0, 3, 3, 5], offsets.tolist())
+
+        unpacked = array.unpack(frames, offsets)
+
+        self.assertEqual(3, len(unpacked))
+
+        for matrix, unpacked_matrix in zip(matrices, unpacked):
+            self.assertTrue(np.array_equal(matrix, unpacked_matrix))
+
+
+class SpliceFeaturesTest(unittest.TestCase):
+    def test_splice_fortran_ordered_matrix(self):
+        features = np.random.rand(10, 3)
+
+        spliced = array.splice_features(np.asfortranarray(features), splice_size=1)
+
+        self.assertTrue(np.allclose(array.splice_features(features, splice_size=1), spliced))
+        self.assertTrue(np.allclose(features[0:3].flatten(), spliced[1]))
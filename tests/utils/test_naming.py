@@ -0,0 +1,32 @@
+import unittest
+
+from spych.utils import naming
+
+
+class IndexNameIfInListTest(unittest.TestCase):
+    def test_index_name_if_in_list(self):
+        self.assertEqual('a_2', naming.index_name_if_in_list('a', ['a', 'a_1', 'b']))
+        self.assertEqual('c', naming.index_name_if_in_list('c', ['a', 'a_1', 'b']))
+
+
+class IdAllocatorTest(unittest.TestCase):
+    def test_generate_is_unique(self):
+        allocator = naming.IdAllocator(seed=3, length=2)
+        names = [allocator.generate() for i in range(26 ** 2)]
+
+        self.assertEqual(26 ** 2, len(set(names)))
+        self.assertTrue(all(len(name) == 2 for name in names))
+
+    def test_generate_with_seed_is_reproducible(self):
+        allocator_a = naming.IdAllocator(seed=7)
+        allocator_b = naming.IdAllocator(seed=7)
+        names_a = [allocator_a.generate() for i in range(3)]
+        names_b = [allocator_b.generate() for i in range(3)]
+
+        self.assertListEqual(names_a, names_b)
+
+    def test_generate_not_in(self):
+        existing = set([naming.IdAllocator(seed=5).generate()])
+        name = naming.IdAllocator(seed=5).generate(not_in=existing)
+
+        self.assertNotIn(name, existing)